@@ -110,15 +110,20 @@ document.addEventListener('DOMContentLoaded', () => {
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ url }),
+                body: JSON.stringify({ url, async: true }),
             });
 
-            const data = await response.json();
+            let data = await response.json();
 
             if (!response.ok) {
                 throw new Error(data.error || 'Failed to scan website');
             }
 
+            // Servers that support scan jobs answer 202 with a job to follow
+            if (response.status === 202 && data.jobId) {
+                data = await waitForScanJob(data);
+            }
+
             currentReportId = data.reportId;
             currentReportData = data;
             displayResults(data);
@@ -131,6 +136,62 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    const scanStageMessages = {
+        cached: 'Loading recent results...',
+        fetched: 'Website downloaded, reading content...',
+        parsed: 'Analyzing website structure...',
+        scored: 'Scoring AI readiness...',
+        recommendations: 'Preparing recommendations...'
+    };
+
+    function waitForScanJob(job) {
+        // Prefer the progress stream; fall back to polling the job status
+        if (typeof EventSource === 'undefined') {
+            return pollScanJob(job);
+        }
+        return new Promise((resolve, reject) => {
+            const events = new EventSource(job.eventsUrl);
+            events.addEventListener('progress', (e) => {
+                const progress = JSON.parse(e.data);
+                updateLoadingMessage(scanStageMessages[progress.stage] || 'Analyzing your website...');
+            });
+            events.addEventListener('done', (e) => {
+                events.close();
+                resolve(JSON.parse(e.data));
+            });
+            events.addEventListener('error', (e) => {
+                events.close();
+                if (e.data) {
+                    reject(new Error(JSON.parse(e.data).error || 'Failed to scan website'));
+                } else {
+                    // Stream dropped (proxy, network) - keep following the job by polling
+                    pollScanJob(job).then(resolve, reject);
+                }
+            });
+        });
+    }
+
+    async function pollScanJob(job) {
+        while (true) {
+            const response = await fetch(job.statusUrl);
+            const status = await response.json();
+            if (!response.ok) {
+                throw new Error(status.error || 'Failed to scan website');
+            }
+            if (status.progress && status.progress.length > 0) {
+                const latest = status.progress[status.progress.length - 1];
+                updateLoadingMessage(scanStageMessages[latest.stage] || 'Analyzing your website...');
+            }
+            if (status.status === 'done') {
+                return status.result;
+            }
+            if (status.status === 'error') {
+                throw new Error(status.error || 'Failed to scan website');
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+
     function displayResults(data) {
         // 1. AI Interpretability Score (large numeric, no animation > 500ms)
         scoreValue.textContent = data.score;
@@ -5,29 +5,170 @@ Uses only Python standard library
 """
 
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs, unquote
+from urllib.parse import urlparse, urljoin, parse_qs, unquote
 from html.parser import HTMLParser
 import json
-import urllib.request
 import urllib.error
+import urllib.robotparser
+import http.client
 import ssl
+import socket
 import sys
 import re
 import smtplib
+import sqlite3
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 import uuid
 import time
+import threading
+import queue
+import heapq
+import signal
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import OrderedDict, deque
 from datetime import datetime
 import base64
 import os
+import zlib
+import codecs
+import copy
+import xml.etree.ElementTree as ElementTree
+import functools
+
+# Text signals for HTMLAuditParser.analyze_text
+PHONE_PATTERN = re.compile(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
+RATING_PATTERN = re.compile(r'\d+\.?\d*\s*(star|rating|out of)')
+RATING_SYMBOL_PATTERN = re.compile(r'[⭐★]')
+
+LOCATION_KEYWORDS = ['address', 'location', 'street', 'avenue', 'road', 'zip', 'postal']
+
+# Parser flags set to True when any of their keywords appears in a text node
+TEXT_FLAG_KEYWORDS = {
+    'location_info': LOCATION_KEYWORDS,
+    'address_info': LOCATION_KEYWORDS,
+    'hours_info': ['hours', 'open', 'closed', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday', 'am', 'pm'],
+    'review_mentions': ['review', 'rating', 'star', 'yelp', 'tripadvisor', 'google review'],
+    'events_calendar': ['event', 'calendar', 'upcoming', 'schedule', 'reservation', 'book'],
+    'gift_cards': ['gift card', 'gift certificate', 'gift'],
+    'catering_info': ['catering'],
+    'private_dining': ['private dining', 'private room', 'private event', 'event space'],
+    'delivery_takeout': ['delivery', 'takeout', 'take-out', 'pickup', 'pick-up', 'order online'],
+    'parking_info': ['parking', 'valet', 'garage', 'lot'],
+    'wifi_info': ['wifi', 'wi-fi', 'wireless', 'internet'],
+    'cuisine_mentions': ['cuisine', 'italian', 'mexican', 'asian', 'american', 'french', 'japanese', 'chinese', 'indian', 'mediterranean', 'steakhouse', 'seafood', 'pizza', 'sushi', 'bar', 'pub', 'bistro', 'cafe', 'restaurant'],
+    'price_range_mentions': ['$', 'price', 'affordable', 'moderate', 'upscale', 'fine dining', 'budget']
+}
+
+# Parser lists that collect each keyword found (title-cased, once)
+TEXT_COLLECTION_KEYWORDS = {
+    'cuisine_type': ['italian', 'mexican', 'chinese', 'japanese', 'thai', 'indian', 'french', 'mediterranean',
+                     'american', 'seafood', 'steakhouse', 'pizza', 'sushi', 'bbq', 'barbecue', 'asian',
+                     'fusion', 'tapas', 'bistro', 'cafe', 'brasserie', 'pub', 'bar', 'grill', 'diner'],
+    'dietary_restrictions': ['vegan', 'vegetarian', 'gluten-free', 'gluten free', 'dairy-free', 'dairy free',
+                             'keto', 'paleo', 'halal', 'kosher', 'nut-free', 'nut free', 'allergy', 'allergen'],
+    'special_features': ['outdoor seating', 'patio', 'terrace', 'live music', 'entertainment', 'happy hour',
+                         'brunch', 'breakfast', 'lunch', 'dinner', 'late night', 'late-night', 'wine bar',
+                         'cocktail', 'craft beer', 'draft beer', 'full bar', 'bar', 'rooftop', 'waterfront',
+                         'view', 'fireplace', 'private room', 'private dining', 'event space', 'catering',
+                         'takeout', 'take-out', 'delivery', 'curbside', 'drive-thru', 'drive through',
+                         'parking', 'valet', 'wifi', 'wi-fi', 'free wifi', 'pet friendly', 'dog friendly']
+}
+
+def build_keyword_actions(flag_keywords, collection_keywords):
+    """Build the keyword -> [(attr, value)] tables used by HTMLAuditParser.analyze_text.
+    value is None for flags and the title-cased keyword for collections.
+
+    Returns (own_actions, actions): own_actions are each keyword's direct effects, while
+    actions also include those of every keyword it contains ("wine bar" also counts as
+    "bar"). keyword_pattern() reports the longest keyword starting at each position, so
+    applying actions to its hits is identical to testing `keyword in text` for every keyword."""
+    own_actions = {}
+    for attr, keywords in flag_keywords.items():
+        for keyword in keywords:
+            own_actions.setdefault(keyword, []).append((attr, None))
+    for attr, keywords in collection_keywords.items():
+        for keyword in keywords:
+            own_actions.setdefault(keyword, []).append((attr, keyword.title()))
+    actions = {}
+    for keyword in own_actions:
+        actions[keyword] = [action for contained in own_actions if contained in keyword for action in own_actions[contained]]
+    return own_actions, actions
+
+@functools.lru_cache(maxsize=256)
+def keyword_pattern(keywords):
+    """Compile a frozenset of keywords into one pattern that is tried at every position.
+    Each branch consumes a keyword's first character (so the regex engine can skip ahead
+    on characters no keyword starts with) and looks ahead for the longest matching rest.
+    A hit's keyword is match.group(0) + match.group(match.lastindex)."""
+    by_first_char = {}
+    for keyword in sorted(keywords, key=len, reverse=True):
+        by_first_char.setdefault(keyword[0], []).append(re.escape(keyword[1:]))
+    return re.compile('|'.join(f'{re.escape(first)}(?=({"|".join(rests)}))' for first, rests in by_first_char.items()))
+
+@functools.lru_cache(maxsize=32)
+def text_keyword_tables(attrs):
+    """Return (own_actions, actions, pattern) for the keyword signals in a frozenset of parser attributes.
+    pattern is None when none of them is a keyword signal"""
+    own_actions, actions = build_keyword_actions(
+        {attr: keywords for attr, keywords in TEXT_FLAG_KEYWORDS.items() if attr in attrs},
+        {attr: keywords for attr, keywords in TEXT_COLLECTION_KEYWORDS.items() if attr in attrs})
+    return own_actions, actions, keyword_pattern(frozenset(actions)) if actions else None
+
+TEXT_KEYWORD_OWN_ACTIONS, TEXT_KEYWORD_ACTIONS, TEXT_KEYWORD_PATTERN = text_keyword_tables(
+    frozenset(TEXT_FLAG_KEYWORDS) | frozenset(TEXT_COLLECTION_KEYWORDS))
+# Text nodes to analyze before the keyword pattern may be recompiled for the still-open keywords
+KEYWORD_PATTERN_REBUILD_NODES = 256
+
+SEMANTIC_ELEMENTS = frozenset(['header', 'nav', 'main', 'article', 'section', 'aside', 'footer'])
+
+# Substrings looked for anywhere in the raw markup (tags, scripts, comments and text)
+REVIEW_WIDGET_TOKENS = frozenset(['google', 'review', 'rating', 'maps/embed', 'place_id', 'tripadvisor', 'yelp'])
+WAIT_TIME_TOKENS = frozenset(['wait', 'slow', 'time'])
+
+# Review platform name -> link substrings that point to it
+REVIEW_PLATFORM_LINKS = {
+    'Google': ('google.com/maps', 'maps.google.', 'g.page/', 'maps.app.goo.gl', 'goo.gl/maps', 'search.google.com/local', 'business.google.com'),
+    'TripAdvisor': ('tripadvisor.',),
+    'Yelp': ('yelp.',),
+    'OpenTable': ('opentable.',)
+}
+SOCIAL_MEDIA_HOSTS = ('facebook.com', 'instagram.com', 'twitter.com', 'x.com', 'tiktok.com', 'youtube.com', 'pinterest.com', 'linkedin.com')
+
+# schema.org @type substrings that mark a restaurant/bar in JSON-LD
+RESTAURANT_SCHEMA_TYPES = ('restaurant', 'foodestablishment', 'bar')
+
+def has_restaurant_schema(data):
+    """True when any node of decoded JSON-LD, including nested @graph entries and lists, has a restaurant/bar @type"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            schema_types = node.get('@type')
+            if not isinstance(schema_types, list):
+                schema_types = [schema_types]
+            for schema_type in schema_types:
+                if isinstance(schema_type, str) and any(name in schema_type.lower() for name in RESTAURANT_SCHEMA_TYPES):
+                    return True
+            stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+    return False
+
+# Signals every parser tracks, whatever it was asked for: they are cheap and early stop relies on them
+ALWAYS_PARSED_SIGNALS = frozenset(['title', 'content_length', 'head_closed'])
+# Signals filled in by scan_attributes
+ATTRIBUTE_SIGNALS = frozenset(['microdata_count', 'aria_labels', 'landmarks'])
 
 class HTMLAuditParser(HTMLParser):
-    """Custom HTML parser to extract audit information"""
-    def __init__(self):
+    """Custom HTML parser to extract audit information.
+    signals limits parsing to the attributes a check profile reads (see profile_signals);
+    None parses everything"""
+    def __init__(self, signals=None):
         super().__init__()
+        self.signals = None if signals is None else frozenset(signals) | ALWAYS_PARSED_SIGNALS
         self.title = ''
         self.meta_description = ''
         self.json_ld_count = 0
@@ -53,6 +194,7 @@ class HTMLAuditParser(HTMLParser):
         self.twitter_card = False
         self.canonical_url = ''
         self.sitemap_reference = False
+        self.ai_crawler_access = None  # AI user agent -> allowed by robots.txt, set by apply_site_files
         self.analytics_tracking = False
         self.content_length = 0
         self.aria_labels = 0
@@ -86,596 +228,1360 @@ class HTMLAuditParser(HTMLParser):
         self.delivery_takeout = False
         self.parking_info = False
         self.wifi_info = False
+        # Text received since the last tag (see handle_data)
+        self.pending_text = []
+        # Only run the tag handlers, attribute scan and text checks that feed a wanted signal
+        if self.signals is None:
+            self.tag_handlers = self.TAG_HANDLERS
+            self.keyword_own_actions, self.keyword_actions, self.keyword_pattern = \
+                TEXT_KEYWORD_OWN_ACTIONS, TEXT_KEYWORD_ACTIONS, TEXT_KEYWORD_PATTERN
+        else:
+            self.tag_handlers = {tag: handler for tag, handler in self.TAG_HANDLERS.items()
+                                 if self.signals & self.HANDLER_SIGNALS[handler]}
+            self.keyword_own_actions, self.keyword_actions, self.keyword_pattern = text_keyword_tables(self.signals)
+        self.attribute_scan = self.wants_any(ATTRIBUTE_SIGNALS)
+        self.phone_open = self.wants('phone_number')
+        self.rating_open = self.wants('rating_mentions')
+        # Values already in each keyword collection, for O(1) dedupe
+        self.keywords_seen = {attr: set() for attr in TEXT_COLLECTION_KEYWORDS}
+        # Keywords that can still change a signal; the pattern shrinks as they resolve
+        self.open_keywords = set(self.keyword_own_actions)
+        self.keyword_pattern_size = len(self.open_keywords)
+        self.nodes_since_pattern_build = 0
+        self.wait_time_mentions = False
+        # Raw-markup tokens still being looked for, those found, and the end of the last chunk
+        # (so a token split across two chunks is still found)
+        self.raw_open_tokens = set()
+        if self.wants('review_widgets'):
+            self.raw_open_tokens |= REVIEW_WIDGET_TOKENS
+        if self.wants('wait_time_mentions'):
+            self.raw_open_tokens |= WAIT_TIME_TOKENS
+        self.raw_tokens = set()
+        self.raw_tail = ''
+        # Body of the JSON-LD script being parsed, or None outside one
+        self.json_ld_text = None
+        # Set once <head> is over, for early-stop fetches
+        self.head_closed = False
         
+    def wants(self, signal):
+        return self.signals is None or signal in self.signals
+    
+    def wants_any(self, signals):
+        return self.signals is None or not self.signals.isdisjoint(signals)
+    
+    def feed(self, data):
+        if self.raw_open_tokens:
+            self.scan_raw_html(data)
+        super().feed(data)
+    
+    def scan_raw_html(self, data):
+        """Record which raw-markup tokens appear, as `token in html.lower()` would on the whole document"""
+        text = self.raw_tail + data.lower()
+        for match in keyword_pattern(frozenset(self.raw_open_tokens)).finditer(text):
+            self.raw_tokens.add(match.group(0) + match.group(match.lastindex))
+        self.raw_open_tokens -= self.raw_tokens
+        longest = max((len(token) for token in self.raw_open_tokens), default=0)
+        self.raw_tail = text[-(longest - 1):] if longest > 1 else ''
+    
     def handle_starttag(self, tag, attrs):
-        attrs_dict = dict(attrs)
-        
-        # Title tag
-        if tag == 'title':
-            self.in_title = True
-            
-        # Meta description
-        if tag == 'meta' and attrs_dict.get('name') == 'description':
-            self.meta_description = attrs_dict.get('content', '')
-            
-        # Robots meta
-        if tag == 'meta' and attrs_dict.get('name') == 'robots':
-            self.robots_meta = attrs_dict.get('content', '')
-            
-        # Open Graph tags
-        if tag == 'meta' and attrs_dict.get('property', '').startswith('og:'):
-            self.og_tags.append(attrs_dict.get('property', ''))
-            
-        # JSON-LD
-        if tag == 'script' and attrs_dict.get('type') == 'application/ld+json':
-            self.json_ld_count += 1
-            
+        self.flush_text()
+        handler = self.tag_handlers.get(tag)
+        if handler:
+            handler(self, tag, dict(attrs))
+        if self.attribute_scan and (attrs or tag in SEMANTIC_ELEMENTS):
+            self.scan_attributes(tag, attrs)
+    
+    def scan_attributes(self, tag, attrs):
+        """Attribute checks that apply to every tag: microdata, ARIA labels and landmarks"""
+        names = {name for name, value in attrs}
         # Microdata
-        if 'itemscope' in attrs_dict:
+        if 'itemscope' in names:
             self.microdata_count += 1
-            
-        # Semantic elements
-        if tag in ['header', 'nav', 'main', 'article', 'section', 'aside', 'footer']:
-            self.semantic_elements.append(tag)
-            
-        # Images
-        if tag == 'img':
-            self.images.append({
-                'has_alt': 'alt' in attrs_dict
-            })
-            
-        # Headings
-        if tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-            self.headings[tag] += 1
-            
-        # Links
-        if tag == 'a':
-            href = attrs_dict.get('href', '')
-            if href:
-                self.links.append(href)
-                # Check for menu links
-                href_lower = href.lower()
-                if 'menu' in href_lower:
-                    self.menu_links.append(href)
-                # Check for reservation links
-                if any(keyword in href_lower for keyword in ['reserv', 'book', 'table', 'booking']):
-                    self.reservation_links.append(href)
-                # Check for menu links
-                link_text = attrs_dict.get('text', '').lower() if 'text' in attrs_dict else ''
-                href_lower = href.lower()
-                if 'menu' in href_lower or 'menu' in link_text:
-                    self.menu_links.append(href)
-                # Check for reservation links
-                if 'reserv' in href_lower or 'book' in href_lower or 'table' in href_lower or 'reserv' in link_text or 'book' in link_text:
-                    self.reservation_links.append(href)
-                
-        # Forms
-        if tag == 'form':
-            self.forms.append(attrs_dict)
-            
-        # Videos
-        if tag in ['video', 'iframe']:
-            if tag == 'video':
-                self.videos.append(attrs_dict)
-            else:
-                self.iframes.append(attrs_dict)
-                
-        # Scripts
-        if tag == 'script':
-            src = attrs_dict.get('src', '')
-            if 'analytics' in src.lower() or 'gtag' in src.lower() or 'ga(' in src.lower():
-                self.analytics_tracking = True
-            self.scripts.append(src)
-            
-        # Stylesheets
-        if tag == 'link' and attrs_dict.get('rel') == 'stylesheet':
-            self.stylesheets.append(attrs_dict.get('href', ''))
-            
-        # Language
-        if tag == 'html':
-            self.lang_attribute = attrs_dict.get('lang', '')
-            
-        # Charset
-        if tag == 'meta' and attrs_dict.get('charset'):
-            self.charset = attrs_dict.get('charset', '')
-            
-        # Viewport
-        if tag == 'meta' and attrs_dict.get('name') == 'viewport':
-            self.viewport = attrs_dict.get('content', '')
-            
-        # Keywords
-        if tag == 'meta' and attrs_dict.get('name') == 'keywords':
-            self.keywords_meta = attrs_dict.get('content', '')
-            
-        # Author
-        if tag == 'meta' and attrs_dict.get('name') == 'author':
-            self.author_meta = attrs_dict.get('content', '')
-            
-        # Twitter Card
-        if tag == 'meta' and attrs_dict.get('name', '').startswith('twitter:'):
-            self.twitter_card = True
-            
-        # Canonical URL
-        if tag == 'link' and attrs_dict.get('rel') == 'canonical':
-            self.canonical_url = attrs_dict.get('href', '')
-            
-        # Sitemap reference
-        if tag == 'link' and attrs_dict.get('rel') == 'sitemap':
-            self.sitemap_reference = True
-            
         # ARIA labels and landmarks
-        if 'aria-label' in attrs_dict or 'aria-labelledby' in attrs_dict:
+        if 'aria-label' in names or 'aria-labelledby' in names:
             self.aria_labels += 1
-        if tag in ['header', 'nav', 'main', 'article', 'section', 'aside', 'footer'] or 'role' in attrs_dict:
+        if tag in SEMANTIC_ELEMENTS or 'role' in names:
             self.landmarks += 1
-            
+    
+    def start_html(self, tag, attrs):
+        # Language
+        self.lang_attribute = attrs.get('lang', '')
+    
+    def start_body(self, tag, attrs):
+        self.head_closed = True
+    
+    def start_title(self, tag, attrs):
+        self.in_title = True
+    
+    def start_meta(self, tag, attrs):
+        name = attrs.get('name') or ''
+        meta_property = attrs.get('property') or ''
+        if name == 'description':
+            self.meta_description = attrs.get('content', '')
+        elif name == 'robots':
+            self.robots_meta = attrs.get('content', '')
+        elif name == 'viewport':
+            self.viewport = attrs.get('content', '')
+        elif name == 'keywords':
+            self.keywords_meta = attrs.get('content', '')
+        elif name == 'author':
+            self.author_meta = attrs.get('content', '')
+        elif name.startswith('twitter:'):
+            self.twitter_card = True
+        # Open Graph tags
+        if meta_property.startswith('og:'):
+            self.og_tags.append(meta_property)
+        # Charset
+        if attrs.get('charset'):
+            self.charset = attrs['charset']
+    
+    def start_link(self, tag, attrs):
+        rel = attrs.get('rel')
+        if rel == 'stylesheet':
+            self.stylesheets.append(attrs.get('href', ''))
+        elif rel == 'canonical':
+            self.canonical_url = attrs.get('href', '')
+        elif rel == 'sitemap':
+            self.sitemap_reference = True
+    
+    def start_script(self, tag, attrs):
+        # JSON-LD
+        script_type = attrs.get('type') or ''
+        if script_type == 'application/ld+json':
+            self.json_ld_count += 1
+        if script_type.lower() == 'application/ld+json' and not self.restaurant_schema and self.wants('restaurant_schema'):
+            self.json_ld_text = []
+        src = attrs.get('src') or ''
+        src_lower = src.lower()
+        if 'analytics' in src_lower or 'gtag' in src_lower or 'ga(' in src_lower:
+            self.analytics_tracking = True
+        self.scripts.append(src)
+    
+    def start_semantic(self, tag, attrs):
+        self.semantic_elements.append(tag)
+    
+    def start_heading(self, tag, attrs):
+        self.headings[tag] += 1
+    
+    def start_img(self, tag, attrs):
+        self.images.append({
+            'has_alt': 'alt' in attrs
+        })
+    
+    def start_a(self, tag, attrs):
+        href = attrs.get('href')
+        if not href:
+            return
+        self.links.append(href)
+        href_lower = href.lower()
+        link_text = (attrs.get('text') or '').lower()
+        # Menu links
+        if 'menu' in href_lower or 'menu' in link_text:
+            self.menu_links.append(href)
+        # Reservation links
+        if any(keyword in href_lower for keyword in ('reserv', 'book', 'table')) or 'reserv' in link_text or 'book' in link_text:
+            self.reservation_links.append(href)
+        # Review platform and social media profiles
+        for platform, link_patterns in REVIEW_PLATFORM_LINKS.items():
+            if platform not in self.review_platforms and any(pattern in href_lower for pattern in link_patterns):
+                self.review_platforms.append(platform)
+        if '//' in href_lower:
+            host = urlparse(href_lower).netloc.rsplit('@', 1)[-1].split(':')[0]
+            if any(host == domain or host.endswith('.' + domain) for domain in SOCIAL_MEDIA_HOSTS):
+                self.social_media_links.append(href)
+    
+    def start_form(self, tag, attrs):
+        self.forms.append(attrs)
+    
+    def start_video(self, tag, attrs):
+        self.videos.append(attrs)
+    
+    def start_iframe(self, tag, attrs):
+        self.iframes.append(attrs)
+    
+    # Tag name -> start handler; tags not listed only go through scan_attributes
+    TAG_HANDLERS = {
+        'html': start_html,
+        'body': start_body,
+        'title': start_title,
+        'meta': start_meta,
+        'link': start_link,
+        'script': start_script,
+        'img': start_img,
+        'a': start_a,
+        'form': start_form,
+        'video': start_video,
+        'iframe': start_iframe,
+        **dict.fromkeys(SEMANTIC_ELEMENTS, start_semantic),
+        **dict.fromkeys(('h1', 'h2', 'h3', 'h4', 'h5', 'h6'), start_heading)
+    }
+    # Start handler -> the signals it fills in
+    HANDLER_SIGNALS = {
+        start_html: frozenset(['lang_attribute']),
+        start_body: frozenset(['head_closed']),
+        start_title: frozenset(['title']),
+        start_meta: frozenset(['meta_description', 'robots_meta', 'viewport', 'keywords_meta', 'author_meta',
+                               'twitter_card', 'og_tags', 'charset']),
+        start_link: frozenset(['stylesheets', 'canonical_url', 'sitemap_reference']),
+        start_script: frozenset(['json_ld_count', 'restaurant_schema', 'analytics_tracking', 'scripts']),
+        start_semantic: frozenset(['semantic_elements']),
+        start_heading: frozenset(['headings']),
+        start_img: frozenset(['images']),
+        start_a: frozenset(['links', 'menu_links', 'reservation_links', 'review_platforms', 'social_media_links']),
+        start_form: frozenset(['forms']),
+        start_video: frozenset(['videos']),
+        start_iframe: frozenset(['iframes'])
+    }
+    
     def handle_endtag(self, tag):
-        if tag == 'title':
+        self.flush_text()
+        if tag == 'script' and self.json_ld_text is not None:
+            self.analyze_json_ld(''.join(self.json_ld_text))
+            self.json_ld_text = None
+        elif tag == 'title':
             self.in_title = False
-            
+        elif tag == 'head':
+            self.head_closed = True
+    
+    def above_the_fold_read(self, min_text):
+        """True once <head> is complete and at least min_text characters of content were seen"""
+        return self.head_closed and self.content_length >= min_text
+    
     def handle_data(self, data):
+        # When the page is fed in chunks a text node can arrive in pieces; collect
+        # it until the next tag so keyword checks see whole text nodes
+        self.pending_text.append(data)
+        if self.json_ld_text is not None:
+            self.json_ld_text.append(data)
+    
+    def handle_comment(self, data):
+        self.flush_text()
+    
+    def handle_decl(self, decl):
+        self.flush_text()
+    
+    def handle_pi(self, data):
+        self.flush_text()
+    
+    def analyze_json_ld(self, text):
+        try:
+            data = json.loads(text)
+        except (ValueError, RecursionError):
+            return  # Malformed JSON-LD is ignored, as search engines do
+        if has_restaurant_schema(data):
+            self.restaurant_schema = True
+    
+    def close(self):
+        super().close()
+        self.flush_text()
+        if self.wants('review_widgets'):
+            self.review_widgets = detect_review_widgets(self.raw_tokens)
+        self.wait_time_mentions = not WAIT_TIME_TOKENS.isdisjoint(self.raw_tokens)
+    
+    def flush_text(self):
+        if self.pending_text:
+            data = ''.join(self.pending_text)
+            self.pending_text = []
+            self.analyze_text(data)
+    
+    def analyze_text(self, data):
         if self.in_title:
             self.title += data
         self.content_length += len(data)
         
+        if not (self.open_keywords or self.phone_open or self.rating_open):
+            return  # Every wanted text signal is resolved
+        if data.isspace():
+            return  # Nothing to match in whitespace between tags
+        
         # Check for restaurant/bar specific content
         data_lower = data.lower()
-        # Location/address detection
-        if any(keyword in data_lower for keyword in ['address', 'location', 'street', 'avenue', 'road', 'zip', 'postal']):
-            self.location_info = True
-            self.address_info = True
-        # Hours detection
-        if any(keyword in data_lower for keyword in ['hours', 'open', 'closed', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday', 'am', 'pm']):
-            self.hours_info = True
         # Phone detection
-        if re.search(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', data):
+        if self.phone_open and PHONE_PATTERN.search(data):
             self.phone_number = True
-        # Review mentions
-        if any(keyword in data_lower for keyword in ['review', 'rating', 'star', 'yelp', 'tripadvisor', 'google review']):
-            self.review_mentions = True
+            self.phone_open = False
         # Rating detection (stars, ratings)
-        if re.search(r'\d+\.?\d*\s*(star|rating|out of)', data_lower) or re.search(r'[⭐★]', data):
+        if self.rating_open and (RATING_PATTERN.search(data_lower) or RATING_SYMBOL_PATTERN.search(data)):
             self.rating_mentions = True
+            self.rating_open = False
+        if not self.open_keywords:
+            return
         
-        # Cuisine type detection
-        cuisine_keywords = ['italian', 'mexican', 'chinese', 'japanese', 'thai', 'indian', 'french', 'mediterranean', 
-                           'american', 'seafood', 'steakhouse', 'pizza', 'sushi', 'bbq', 'barbecue', 'asian', 
-                           'fusion', 'tapas', 'bistro', 'cafe', 'brasserie', 'pub', 'bar', 'grill', 'diner']
-        for cuisine in cuisine_keywords:
-            if cuisine in data_lower and cuisine.title() not in self.cuisine_type:
-                self.cuisine_type.append(cuisine.title())
-        
-        # Dietary restrictions
-        dietary_keywords = ['vegan', 'vegetarian', 'gluten-free', 'gluten free', 'dairy-free', 'dairy free', 
-                           'keto', 'paleo', 'halal', 'kosher', 'nut-free', 'nut free', 'allergy', 'allergen']
-        for dietary in dietary_keywords:
-            if dietary in data_lower and dietary.title() not in [d.lower() for d in self.dietary_restrictions]:
-                self.dietary_restrictions.append(dietary.title())
-        
-        # Special features
-        feature_keywords = ['outdoor seating', 'patio', 'terrace', 'live music', 'entertainment', 'happy hour', 
-                           'brunch', 'breakfast', 'lunch', 'dinner', 'late night', 'late-night', 'wine bar', 
-                           'cocktail', 'craft beer', 'draft beer', 'full bar', 'bar', 'rooftop', 'waterfront', 
-                           'view', 'fireplace', 'private room', 'private dining', 'event space', 'catering', 
-                           'takeout', 'take-out', 'delivery', 'curbside', 'drive-thru', 'drive through', 
-                           'parking', 'valet', 'wifi', 'wi-fi', 'free wifi', 'pet friendly', 'dog friendly']
-        for feature in feature_keywords:
-            if feature in data_lower and feature.title() not in [f.lower() for f in self.special_features]:
-                self.special_features.append(feature.title())
-        
-        # Events/Calendar
-        if any(keyword in data_lower for keyword in ['event', 'calendar', 'upcoming', 'schedule', 'reservation', 'book']):
-            self.events_calendar = True
-        
-        # Gift cards
-        if any(keyword in data_lower for keyword in ['gift card', 'gift certificate', 'gift']):
-            self.gift_cards = True
-        
-        # Catering
-        if 'catering' in data_lower:
-            self.catering_info = True
-        
-        # Private dining
-        if any(keyword in data_lower for keyword in ['private dining', 'private room', 'private event', 'event space']):
-            self.private_dining = True
-        
-        # Delivery/Takeout
-        if any(keyword in data_lower for keyword in ['delivery', 'takeout', 'take-out', 'pickup', 'pick-up', 'order online']):
-            self.delivery_takeout = True
-        
-        # Parking
-        if any(keyword in data_lower for keyword in ['parking', 'valet', 'garage', 'lot']):
-            self.parking_info = True
-        
-        # WiFi
-        if any(keyword in data_lower for keyword in ['wifi', 'wi-fi', 'wireless', 'internet']):
-            self.wifi_info = True
-        # Cuisine mentions
-        if any(keyword in data_lower for keyword in ['cuisine', 'italian', 'mexican', 'asian', 'american', 'french', 'japanese', 'chinese', 'indian', 'mediterranean', 'steakhouse', 'seafood', 'pizza', 'sushi', 'bar', 'pub', 'bistro', 'cafe', 'restaurant']):
-            self.cuisine_mentions = True
-        # Price range
-        if any(keyword in data_lower for keyword in ['$', 'price', 'affordable', 'moderate', 'upscale', 'fine dining', 'budget']):
-            self.price_range_mentions = True
-
-def perform_ai_audit(url):
-    """Perform AI audit on a website using only standard library"""
-    try:
-        # Create SSL context that doesn't verify certificates (for testing)
-        # This allows us to test HTTPS sites without certificate issues
-        ssl_context = ssl._create_unverified_context()
-        
-        # Fetch the website with comprehensive browser headers to avoid 403 errors
-        # Note: We don't include Accept-Encoding because urllib doesn't auto-decompress
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Cache-Control': 'max-age=0'
-        }
-        req = urllib.request.Request(url, headers=headers)
-        
-        # Use the unverified SSL context for HTTPS connections
-        # Handle 403 errors by retrying with simpler headers
+        # Every open keyword signal in one pass (see keyword_pattern)
+        self.nodes_since_pattern_build += 1
+        if (self.nodes_since_pattern_build >= KEYWORD_PATTERN_REBUILD_NODES
+                and len(self.open_keywords) * 2 <= self.keyword_pattern_size):
+            # Enough keywords resolved that a smaller pattern pays for its compile
+            self.keyword_pattern = keyword_pattern(frozenset(self.open_keywords))
+            self.keyword_pattern_size = len(self.open_keywords)
+            self.nodes_since_pattern_build = 0
+        changed = False
+        hits = dict.fromkeys(match.group(0) + match.group(match.lastindex) for match in self.keyword_pattern.finditer(data_lower))
+        for keyword in hits:
+            for attr, value in self.keyword_actions[keyword]:
+                if value is None:
+                    if not getattr(self, attr):
+                        setattr(self, attr, True)
+                        changed = True
+                elif value not in self.keywords_seen[attr]:
+                    self.keywords_seen[attr].add(value)
+                    getattr(self, attr).append(value)
+                    changed = True
+        if changed:
+            self.close_resolved_keywords()
+    
+    def close_resolved_keywords(self):
+        """Drop keywords whose flags are all set and whose collection values are all found"""
+        resolved = [keyword for keyword in self.open_keywords
+                    if all(getattr(self, attr) if value is None else value in self.keywords_seen[attr]
+                           for attr, value in self.keyword_own_actions[keyword])]
+        self.open_keywords.difference_update(resolved)
+
+class PageAnalysis:
+    """A page fetched and parsed once, shared by scoring, recommendations and later scan stages"""
+    def __init__(self, url, parser, partial_reason=None, final_url=None):
+        self.url = url
+        self.final_url = final_url or url  # Where the request ended up after redirects
+        self.parser = parser
+        self.partial_reason = partial_reason  # size_limit, deadline or early_stop when not fully read
+        self.crawler_access = None  # robots.txt/sitemap report, set by apply_site_files
+    
+    @property
+    def partial(self):
+        return self.partial_reason is not None
+
+    @property
+    def review_widgets(self):
+        return self.parser.review_widgets
+
+def detect_review_widgets(tokens):
+    """Detect embedded review widgets (Google, TripAdvisor, Yelp) from the REVIEW_WIDGET_TOKENS found in the raw HTML"""
+    review_widgets_found = []
+    if 'google' in tokens and ('review' in tokens or 'rating' in tokens):
+        if 'maps/embed' in tokens or 'place_id' in tokens:
+            review_widgets_found.append('Google Reviews Widget')
+    if 'tripadvisor' in tokens:
+        review_widgets_found.append('TripAdvisor Widget')
+    if 'yelp' in tokens and 'review' in tokens:
+        review_widgets_found.append('Yelp Widget')
+    return review_widgets_found
+
+# How many URLs keep their validators and parsed page for conditional re-fetches
+PAGE_VALIDATOR_CACHE_SIZE = int(os.environ.get('PAGE_VALIDATOR_CACHE_SIZE', '200'))
+
+class PageValidatorStore:
+    """Remembers each URL's ETag/Last-Modified and parsed page so re-scans can use conditional GETs"""
+    def __init__(self, max_entries=PAGE_VALIDATOR_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (etag, last_modified, page)
+        self.lock = threading.Lock()
+        self.conditional_requests = 0
+        self.not_modified = 0
+    
+    def lookup(self, key):
+        """Return (conditional request headers, stored page) for a URL, or ({}, None)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return {}, None
+            self.entries.move_to_end(key)
+            self.conditional_requests += 1
+        etag, last_modified, page = entry
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers, page
+    
+    def remember(self, key, response_headers, page):
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if self.max_entries <= 0 or not (etag or last_modified):
+            return
+        with self.lock:
+            self.entries[key] = (etag, last_modified, page)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def record_not_modified(self):
+        with self.lock:
+            self.not_modified += 1
+    
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'maxEntries': self.max_entries,
+                'conditionalRequests': self.conditional_requests,
+                'notModified': self.not_modified
+            }
+
+page_validators = PageValidatorStore()
+
+# Bytes read from the network per chunk while downloading a page
+FETCH_CHUNK_SIZE = 64 * 1024
+# Largest decoded page body we read, and the total time allowed for one page fetch
+MAX_PAGE_BYTES = int(os.environ.get('MAX_PAGE_BYTES', str(5 * 1024 * 1024)))
+FETCH_DEADLINE = float(os.environ.get('FETCH_DEADLINE', '25'))
+# Early-stop scans stop reading once <head> is done and this much body text was seen
+EARLY_STOP_TEXT = int(os.environ.get('EARLY_STOP_TEXT', '3000'))
+# Content encodings the page fetcher can decode. Not br: brotli decoders can't cap their output,
+# so a small compressed bomb could expand past MAX_PAGE_BYTES in memory
+ACCEPT_ENCODING = 'gzip, deflate'
+
+class ContentDecoder:
+    """Incrementally decodes a gzip or deflate response body chunk by chunk"""
+    def __init__(self, content_encoding):
+        self.encoding = (content_encoding or 'identity').strip().lower()
+        self.decompressor = None
+        self.pending = b''  # Opening byte of a deflate body, held until the header can be checked
+        if self.encoding in ('gzip', 'x-gzip'):
+            self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    
+    def decode(self, data, max_length=0):
+        """Decode a chunk; max_length bounds the output so compressed bombs can't blow past the size cap"""
+        if self.encoding == 'deflate' and self.decompressor is None:
+            # "deflate" is zlib-wrapped per the spec, but some servers send raw deflate. Telling them
+            # apart takes the first two bytes, and a read can return just one
+            data = self.pending + data
+            if len(data) < 2:
+                self.pending = data
+                return b''
+            self.pending = b''
+            zlib_header = data[0] & 0x0F == 8 and (data[0] * 256 + data[1]) % 31 == 0
+            self.decompressor = zlib.decompressobj(zlib.MAX_WBITS if zlib_header else -zlib.MAX_WBITS)
+        if self.decompressor is None:
+            return data
+        return self.decompressor.decompress(data, max_length)
+    
+    def flush(self):
+        if self.pending:
+            # A one-byte body can't carry a zlib header
+            self.decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            data, self.pending = self.decompressor.decompress(self.pending), b''
+            return data + self.decompressor.flush()
+        if self.decompressor is not None:
+            return self.decompressor.flush()
+        return b''
+
+class ResponseTextReader:
+    """Streams a response body as decoded text, one network chunk at a time,
+    stopping early when the size cap or the deadline is reached"""
+    def __init__(self, response, max_bytes=MAX_PAGE_BYTES, deadline=None):
+        self.response = response
+        self.max_bytes = max_bytes
+        self.deadline = deadline
+        self.bytes_read = 0
+        self.truncated_reason = None  # size_limit or deadline
+    
+    def __iter__(self):
+        content_decoder = ContentDecoder(self.response.headers.get('Content-Encoding'))
+        text_decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        while True:
+            time_left = self.deadline - time.time() if self.deadline else None
+            if time_left is not None and time_left <= 0:
+                self.truncated_reason = 'deadline'
+                break
+            # read1 returns as soon as any bytes arrive, and the socket waits no longer than the
+            # deadline, so a server dripping a few bytes at a time can't hold the fetch past it
+            try:
+                chunk = self.response.read1(FETCH_CHUNK_SIZE, timeout=None if time_left is None else max(0.1, time_left))
+            except socket.timeout:
+                self.truncated_reason = 'deadline'
+                break
+            if not chunk:
+                break
+            remaining = self.max_bytes - self.bytes_read
+            data = content_decoder.decode(chunk, remaining + 1)
+            if len(data) > remaining:
+                data = data[:remaining]
+                self.truncated_reason = 'size_limit'
+            self.bytes_read += len(data)
+            text = text_decoder.decode(data)
+            if text:
+                yield text
+            if self.truncated_reason:
+                break
+        if self.truncated_reason:
+            self.response.close()  # Don't download the rest
+            return
+        text = text_decoder.decode(content_decoder.flush(), final=True)
+        if text:
+            yield text
+
+# Seconds resolved addresses are reused, and how long a "no such domain" answer is remembered
+DNS_CACHE_TTL = int(os.environ.get('DNS_CACHE_TTL', '300'))
+DNS_NEGATIVE_TTL = int(os.environ.get('DNS_NEGATIVE_TTL', '60'))
+DNS_CACHE_SIZE = 1000
+# getaddrinfo errors meaning the domain doesn't exist (rather than a resolver hiccup)
+NXDOMAIN_ERRNOS = tuple(code for code in (socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', None)) if code is not None)
+
+class DNSCache:
+    """Caches getaddrinfo results per (host, port) for page fetches, including NXDOMAIN answers.
+    getaddrinfo doesn't report record TTLs, so entries live for a fixed TTL"""
+    def __init__(self, ttl=DNS_CACHE_TTL, negative_ttl=DNS_NEGATIVE_TTL, max_entries=DNS_CACHE_SIZE):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # (host, port) -> (expires, addresses or (errno, message))
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+    
+    def resolve(self, host, port):
+        key = (host.lower(), port)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > time.time():
+                self.entries.move_to_end(key)
+                addresses = entry[1]
+                if isinstance(addresses, tuple):
+                    self.negative_hits += 1
+                    raise socket.gaierror(*addresses)
+                self.hits += 1
+                return addresses
+            self.misses += 1
         try:
-            response = urllib.request.urlopen(req, timeout=10, context=ssl_context)
-        except urllib.error.HTTPError as e:
-            # Some sites return 403 even with good headers - try with minimal headers
-            if e.code == 403:
-                # Retry with just User-Agent
-                simple_headers = {
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                }
-                req = urllib.request.Request(url, headers=simple_headers)
-                try:
-                    response = urllib.request.urlopen(req, timeout=10, context=ssl_context)
-                except urllib.error.HTTPError as e2:
-                    if e2.code == 403:
-                        raise Exception('Website blocked the request (403 Forbidden). Some websites block automated requests for security reasons. Try a different website or contact the website owner.')
-                    raise
-            else:
+            addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        except socket.gaierror as error:
+            if error.errno in NXDOMAIN_ERRNOS and self.negative_ttl > 0:
+                self.store(key, (error.errno, error.strerror), self.negative_ttl)
+            raise
+        if self.ttl > 0:
+            self.store(key, addresses, self.ttl)
+        return addresses
+    
+    def store(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (time.time() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def create_connection(self, address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+        """socket.create_connection, resolving through the cache"""
+        host, port = address
+        last_error = None
+        for family, socktype, proto, canonname, sockaddr in self.resolve(host, port):
+            sock = None
+            try:
+                sock = socket.socket(family, socktype, proto)
+                if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    sock.settimeout(timeout)
+                if source_address:
+                    sock.bind(source_address)
+                sock.connect(sockaddr)
+                return sock
+            except OSError as error:
+                last_error = error
+                if sock is not None:
+                    sock.close()
+        raise last_error or OSError(f'getaddrinfo returned no addresses for {host}')
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'ttl': self.ttl,
+                'negativeTtl': self.negative_ttl,
+                'hits': self.hits,
+                'negativeHits': self.negative_hits,
+                'misses': self.misses,
+                'hitRate': round((self.hits + self.negative_hits) / lookups, 3) if lookups else 0
+            }
+
+dns_cache = DNSCache()
+
+# Idle keep-alive connections kept per host, and in total, for outbound page fetches
+OUTBOUND_POOL_PER_HOST = int(os.environ.get('OUTBOUND_POOL_PER_HOST', '4'))
+OUTBOUND_POOL_MAX = int(os.environ.get('OUTBOUND_POOL_MAX', '64'))
+# Seconds an idle connection is kept before it is closed instead of reused
+OUTBOUND_IDLE_TIMEOUT = 30
+MAX_REDIRECTS = 5
+# Error/redirect bodies up to this size are read off so the connection can be reused
+DRAIN_LIMIT = 64 * 1024
+
+class CachedDNSHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection that resolves its host through dns_cache"""
+    def __init__(self, host, port=None, timeout=None):
+        super().__init__(host, port, timeout=timeout)
+        self._create_connection = dns_cache.create_connection
+
+class SessionReusingHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS connection that resolves through dns_cache and resumes the host's last TLS session
+    instead of doing a full handshake"""
+    def __init__(self, host, port=None, timeout=None, context=None, tls_sessions=None):
+        super().__init__(host, port, timeout=timeout, context=context)
+        self._create_connection = dns_cache.create_connection
+        self.tls_sessions = tls_sessions
+    
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        key = (self.host, self.port)
+        session = self.tls_sessions.get(key)
+        try:
+            self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host, session=session)
+        except ssl.SSLError:
+            if session is None:
                 raise
-        
-        html = response.read().decode('utf-8', errors='ignore')
-        
-        # Check for restaurant schema in JSON-LD before parsing
-        import json
-        restaurant_schema_found = False
+            # The server rejected the stored session; handshake from scratch on a new socket
+            self.tls_sessions.forget(key)
+            self.sock.close()
+            http.client.HTTPConnection.connect(self)
+            self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host)
+        self.tls_sessions.resumed(self.sock.session_reused)
+
+class TLSSessionStore:
+    """The most recent TLS session per host, bounded like the other caches"""
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.resumptions = 0
+    
+    def get(self, key):
+        with self.lock:
+            return self.sessions.get(key)
+    
+    def remember(self, key, session):
+        if session is None:
+            return
+        with self.lock:
+            self.sessions[key] = session
+            self.sessions.move_to_end(key)
+            while len(self.sessions) > self.max_entries:
+                self.sessions.popitem(last=False)
+    
+    def forget(self, key):
+        with self.lock:
+            self.sessions.pop(key, None)
+    
+    def resumed(self, reused):
+        if reused:
+            with self.lock:
+                self.resumptions += 1
+
+class PooledResponse:
+    """A response whose connection goes back to the pool once the body is read to the end.
+    Closing it early discards the connection, since the rest of the body is still on the wire"""
+    def __init__(self, pool, key, connection, response, url):
+        self.pool = pool
+        self.key = key
+        self.connection = connection
+        self.response = response
+        self.url = url
+        self.status = response.status
+        self.headers = response.headers
+    
+    def read(self, amt=None):
+        data = self.response.read(amt)
+        if not data or self.response.isclosed():
+            self.release()
+        return data
+    
+    def read1(self, amt, timeout=None):
+        """Return whatever part of the body has arrived (up to amt bytes) without waiting for the rest.
+        timeout bounds the wait for the next bytes; socket.timeout is raised when it passes"""
+        if timeout is not None and self.connection is not None and self.connection.sock:
+            self.connection.sock.settimeout(timeout)
+        data = self.response.read1(amt)
+        if not data or self.response.isclosed():
+            self.release()
+        return data
+    
+    def release(self):
+        if self.connection is None:
+            return
+        connection, self.connection = self.connection, None
+        if self.response.isclosed() and not self.response.will_close:
+            self.pool.put(self.key, connection)
+        else:
+            connection.close()
+    
+    def close(self):
+        if self.connection is not None:
+            connection, self.connection = self.connection, None
+            connection.close()
+        self.response.close()
+
+class OutboundConnectionPool:
+    """Keep-alive HTTP(S) connections for page fetches, pooled per host with TLS session reuse.
+    open() behaves like urllib.request.urlopen: redirects are followed, HTTP errors raise
+    urllib.error.HTTPError and network errors raise urllib.error.URLError"""
+    def __init__(self, per_host=OUTBOUND_POOL_PER_HOST, max_idle=OUTBOUND_POOL_MAX, idle_timeout=OUTBOUND_IDLE_TIMEOUT):
+        self.per_host = per_host
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        # Certificates aren't verified (for testing), matching the previous urlopen context
+        self.ssl_context = ssl._create_unverified_context()
+        self.tls_sessions = TLSSessionStore()
+        self.idle = OrderedDict()  # (scheme, host, port) -> [(connection, idle since)]
+        self.idle_count = 0
+        self.lock = threading.Lock()
+        self.connections_opened = 0
+        self.connections_reused = 0
+    
+    def get(self, key, timeout):
+        """Return (connection, reused): an idle pooled connection if one is fresh, else a new one"""
+        with self.lock:
+            connections = self.idle.get(key)
+            while connections:
+                connection, idle_since = connections.pop()
+                self.idle_count -= 1
+                if time.time() - idle_since < self.idle_timeout:
+                    if not connections:
+                        del self.idle[key]
+                    self.connections_reused += 1
+                    connection.timeout = timeout
+                    if connection.sock:
+                        connection.sock.settimeout(timeout)
+                    return connection, True
+                connection.close()
+            self.idle.pop(key, None)
+            self.connections_opened += 1
+        scheme, host, port = key
+        if scheme == 'https':
+            return SessionReusingHTTPSConnection(host, port, timeout=timeout, context=self.ssl_context,
+                                                 tls_sessions=self.tls_sessions), False
+        return CachedDNSHTTPConnection(host, port, timeout=timeout), False
+    
+    def put(self, key, connection):
+        """Return a connection whose response was fully read"""
+        if isinstance(connection, SessionReusingHTTPSConnection) and connection.sock:
+            self.tls_sessions.remember((connection.host, connection.port), connection.sock.session)
+        with self.lock:
+            connections = self.idle.setdefault(key, [])
+            self.idle.move_to_end(key)
+            if len(connections) >= self.per_host:
+                connection.close()
+                return
+            connections.append((connection, time.time()))
+            self.idle_count += 1
+            # Over the total limit: close connections of the least recently used hosts
+            while self.idle_count > self.max_idle:
+                oldest_key = next(iter(self.idle))
+                oldest = self.idle[oldest_key]
+                oldest.pop(0)[0].close()
+                self.idle_count -= 1
+                if not oldest:
+                    del self.idle[oldest_key]
+    
+    def open(self, url, headers, timeout=10):
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self.request(url, headers, timeout)
+            status = response.status
+            if status in (301, 302, 303, 307, 308) and response.headers.get('Location'):
+                self.drain(response)
+                url = urljoin(url, response.headers['Location'])
+                continue
+            if status >= 300:
+                self.drain(response)
+                raise urllib.error.HTTPError(url, status, response.response.reason, response.headers, None)
+            return response
+        raise urllib.error.HTTPError(url, status, 'Too many redirects', response.headers, None)
+    
+    def request(self, url, headers, timeout):
+        parsed = urlparse(url)
+        scheme = parsed.scheme.lower()
+        if scheme not in ('http', 'https') or not parsed.hostname:
+            raise urllib.error.URLError(f'unsupported URL: {url}')
+        key = (scheme, parsed.hostname, parsed.port or (443 if scheme == 'https' else 80))
+        target = parsed.path or '/'
+        if parsed.query:
+            target += '?' + parsed.query
+        while True:
+            connection, reused = self.get(key, timeout)
+            try:
+                connection.request('GET', target, headers=headers)
+                response = connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as error:
+                connection.close()
+                if reused:
+                    continue  # The server dropped the idle connection; retry on a new one
+                raise urllib.error.URLError(error)
+            except (OSError, http.client.HTTPException) as error:
+                connection.close()
+                raise urllib.error.URLError(error)
+            return PooledResponse(self, key, connection, response, url)
+    
+    def drain(self, response):
+        """Read off a small body so its connection can be reused; close the response otherwise"""
         try:
-            # Find all JSON-LD scripts
-            json_ld_pattern = r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>'
-            json_ld_matches = re.findall(json_ld_pattern, html, re.DOTALL | re.IGNORECASE)
-            for json_str in json_ld_matches:
-                try:
-                    data = json.loads(json_str)
-                    # Check if it's a restaurant schema
-                    if isinstance(data, dict):
-                        schema_type = data.get('@type', '').lower()
-                        if 'restaurant' in schema_type or 'foodestablishment' in schema_type or 'bar' in schema_type:
-                            restaurant_schema_found = True
-                            break
-                    elif isinstance(data, list):
-                        for item in data:
-                            if isinstance(item, dict):
-                                schema_type = item.get('@type', '').lower()
-                                if 'restaurant' in schema_type or 'foodestablishment' in schema_type or 'bar' in schema_type:
-                                    restaurant_schema_found = True
-                                    break
-                except:
-                    pass
-        except:
-            pass
-        
-        # Parse HTML
-        parser = HTMLAuditParser()
-        parser.feed(html)
-        parser.restaurant_schema = restaurant_schema_found
-        
-        audit_results = []
-        total_score = 0
-        max_score = 0
-        
-        # 1. Check for title tag
-        title = parser.title.strip()
-        title_score = 10 if title else 0
-        audit_results.append({
-            'name': 'Has Title Tag',
-            'points': title_score,
-            'maxPoints': 10,
-            'status': 'pass' if title_score == 10 else 'fail'
-        })
-        total_score += title_score
-        max_score += 10
-        
-        # 2. Check for meta description
-        meta_description = parser.meta_description
-        meta_desc_score = 10 if meta_description and len(meta_description) > 50 else (5 if meta_description else 0)
-        audit_results.append({
-            'name': 'Has Meta Description',
-            'points': meta_desc_score,
-            'maxPoints': 10,
-            'status': 'pass' if meta_desc_score == 10 else ('warning' if meta_desc_score == 5 else 'fail')
-        })
-        total_score += meta_desc_score
-        max_score += 10
-        
-        # 3. Check for structured data
-        structured_data_score = 15 if parser.json_ld_count > 0 else (10 if parser.microdata_count > 0 else 0)
-        audit_results.append({
-            'name': 'Structured Data (Schema.org)',
-            'points': structured_data_score,
-            'maxPoints': 15,
-            'status': 'pass' if structured_data_score >= 10 else 'fail'
-        })
-        total_score += structured_data_score
-        max_score += 15
-        
-        # 4. Check for semantic HTML
-        semantic_count = len(parser.semantic_elements)
-        semantic_score = 15 if semantic_count >= 3 else (8 if semantic_count > 0 else 0)
-        audit_results.append({
-            'name': 'Semantic HTML Elements',
-            'points': semantic_score,
-            'maxPoints': 15,
-            'status': 'pass' if semantic_score >= 10 else ('warning' if semantic_score > 0 else 'fail')
-        })
-        total_score += semantic_score
-        max_score += 15
-        
-        # 5. Check for alt text on images
-        images_count = len(parser.images)
-        images_with_alt = sum(1 for img in parser.images if img['has_alt'])
-        alt_text_score = 10 if images_count == 0 else round((images_with_alt / images_count) * 10)
-        audit_results.append({
-            'name': 'Image Alt Text',
-            'points': alt_text_score,
-            'maxPoints': 10,
-            'status': 'pass' if alt_text_score >= 8 else ('warning' if alt_text_score >= 5 else 'fail')
-        })
-        total_score += alt_text_score
-        max_score += 10
-        
-        # 6. Check for heading hierarchy
-        h1_count = parser.headings['h1']
-        h2_count = parser.headings['h2']
-        heading_score = 10 if h1_count == 1 and h2_count > 0 else (7 if h1_count == 1 else (5 if h1_count > 0 else 0))
-        audit_results.append({
-            'name': 'Proper Heading Hierarchy',
-            'points': heading_score,
-            'maxPoints': 10,
-            'status': 'pass' if heading_score >= 7 else ('warning' if heading_score > 0 else 'fail')
-        })
-        total_score += heading_score
-        max_score += 10
-        
-        # 7. Check for Open Graph tags
-        og_count = len(parser.og_tags)
-        og_score = 10 if og_count >= 3 else (5 if og_count > 0 else 0)
-        audit_results.append({
-            'name': 'Open Graph Tags',
-            'points': og_score,
-            'maxPoints': 10,
-            'status': 'pass' if og_score >= 7 else ('warning' if og_score > 0 else 'fail')
-        })
-        total_score += og_score
-        max_score += 10
-        
-        # 8. Check for robots meta tag
-        robots_content = parser.robots_meta
-        robots_score = 10 if not robots_content or 'noindex' not in robots_content else 0
-        audit_results.append({
-            'name': 'Crawlable by AI (Robots)',
-            'points': robots_score,
-            'maxPoints': 10,
-            'status': 'pass' if robots_score == 10 else 'fail'
-        })
-        total_score += robots_score
-        max_score += 10
-        
-        # 9. Check for language attribute
-        lang_score = 10 if parser.lang_attribute else 0
-        audit_results.append({
-            'name': 'HTML Language Attribute',
-            'points': lang_score,
-            'maxPoints': 10,
-            'status': 'pass' if lang_score == 10 else 'fail'
-        })
-        total_score += lang_score
-        max_score += 10
-        
-        # 10. Check for viewport meta tag (mobile-friendly)
-        viewport_score = 10 if parser.viewport else 0
-        audit_results.append({
-            'name': 'Mobile Viewport Meta Tag',
-            'points': viewport_score,
-            'maxPoints': 10,
-            'status': 'pass' if viewport_score == 10 else 'fail'
-        })
-        total_score += viewport_score
-        max_score += 10
-        
-        # 11. Check for charset declaration
-        charset_score = 10 if parser.charset else 0
-        audit_results.append({
-            'name': 'Character Encoding Declaration',
-            'points': charset_score,
-            'maxPoints': 10,
-            'status': 'pass' if charset_score == 10 else 'fail'
-        })
-        total_score += charset_score
-        max_score += 10
-        
-        # 12. Check for canonical URL
-        canonical_score = 10 if parser.canonical_url else 0
-        audit_results.append({
-            'name': 'Canonical URL',
-            'points': canonical_score,
-            'maxPoints': 10,
-            'status': 'pass' if canonical_score == 10 else 'fail'
-        })
-        total_score += canonical_score
-        max_score += 10
-        
-        # 13. Check for Twitter Card tags
-        twitter_score = 10 if parser.twitter_card else 0
-        audit_results.append({
-            'name': 'Twitter Card Tags',
-            'points': twitter_score,
-            'maxPoints': 10,
-            'status': 'pass' if twitter_score == 10 else 'fail'
-        })
-        total_score += twitter_score
-        max_score += 10
-        
-        # 14. Check for accessibility (ARIA labels)
-        aria_score = 10 if parser.aria_labels >= 3 else (5 if parser.aria_labels > 0 else 0)
-        audit_results.append({
-            'name': 'ARIA Labels & Accessibility',
-            'points': aria_score,
-            'maxPoints': 10,
-            'status': 'pass' if aria_score >= 8 else ('warning' if aria_score > 0 else 'fail')
-        })
-        total_score += aria_score
-        max_score += 10
-        
-        # 15. Check for content length (AI needs substantial content)
-        content_score = 10 if parser.content_length > 1000 else (5 if parser.content_length > 500 else 0)
-        audit_results.append({
-            'name': 'Content Length (AI Readable)',
-            'points': content_score,
-            'maxPoints': 10,
-            'status': 'pass' if content_score >= 8 else ('warning' if content_score > 0 else 'fail')
-        })
-        total_score += content_score
-        max_score += 10
-        
-        # 16. Check for internal linking structure
-        internal_links = sum(1 for link in parser.links if link.startswith('/') or link.startswith('#'))
-        link_score = 10 if internal_links >= 5 else (5 if internal_links > 0 else 0)
-        audit_results.append({
-            'name': 'Internal Linking Structure',
-            'points': link_score,
-            'maxPoints': 10,
-            'status': 'pass' if link_score >= 8 else ('warning' if link_score > 0 else 'fail')
-        })
-        total_score += link_score
-        max_score += 10
-        
-        # 17. Check for forms (interactivity)
-        form_score = 5 if len(parser.forms) > 0 else 0
-        audit_results.append({
-            'name': 'Interactive Forms',
-            'points': form_score,
-            'maxPoints': 5,
-            'status': 'pass' if form_score == 5 else 'fail'
-        })
-        total_score += form_score
-        max_score += 5
-        
-        # 18. Check for analytics tracking
-        analytics_score = 5 if parser.analytics_tracking else 0
-        audit_results.append({
-            'name': 'Analytics Tracking',
-            'points': analytics_score,
-            'maxPoints': 5,
-            'status': 'pass' if analytics_score == 5 else 'fail'
-        })
-        total_score += analytics_score
-        max_score += 5
-        
-        # 19. Check for proper heading structure (h1-h6 hierarchy)
-        heading_structure_score = 10 if parser.headings['h1'] == 1 and parser.headings['h2'] > 0 and parser.headings['h3'] >= 0 else (5 if parser.headings['h1'] == 1 else 0)
-        audit_results.append({
-            'name': 'Complete Heading Hierarchy',
-            'points': heading_structure_score,
-            'maxPoints': 10,
-            'status': 'pass' if heading_structure_score >= 8 else ('warning' if heading_structure_score > 0 else 'fail')
-        })
-        total_score += heading_structure_score
-        max_score += 10
-        
-        # 20. Check for video/media content
-        media_score = 5 if len(parser.videos) > 0 or len(parser.iframes) > 0 else 0
-        audit_results.append({
-            'name': 'Multimedia Content',
-            'points': media_score,
-            'maxPoints': 5,
-            'status': 'pass' if media_score == 5 else 'fail'
-        })
-        total_score += media_score
-        max_score += 5
-        
-        # Restaurant/Bar Specific Checks (21-25)
-        
-        # 21. Restaurant Schema (JSON-LD)
-        restaurant_schema_score = 15 if parser.restaurant_schema else 0
-        audit_results.append({
-            'name': 'Restaurant/Bar Schema Markup',
-            'points': restaurant_schema_score,
-            'maxPoints': 15,
-            'status': 'pass' if restaurant_schema_score == 15 else 'fail'
-        })
-        total_score += restaurant_schema_score
-        max_score += 15
-        
-        # 22. Menu Availability
-        menu_score = 10 if len(parser.menu_links) > 0 else 0
-        audit_results.append({
-            'name': 'Menu Information Available',
-            'points': menu_score,
-            'maxPoints': 10,
-            'status': 'pass' if menu_score == 10 else 'fail'
-        })
-        total_score += menu_score
-        max_score += 10
+            length = response.headers.get('Content-Length')
+            if length is not None and int(length) > DRAIN_LIMIT:
+                response.close()
+                return
+            drained = 0
+            while response.connection is not None and drained <= DRAIN_LIMIT:
+                drained += len(response.read(DRAIN_LIMIT))
+            if response.connection is not None:
+                response.close()  # More body than is worth reading
+        except (OSError, ValueError, http.client.HTTPException):
+            response.close()
+    
+    def close_idle(self):
+        with self.lock:
+            for connections in self.idle.values():
+                for connection, idle_since in connections:
+                    connection.close()
+            self.idle.clear()
+            self.idle_count = 0
+    
+    def stats(self):
+        with self.lock:
+            return {
+                'idleConnections': self.idle_count,
+                'hosts': len(self.idle),
+                'perHostLimit': self.per_host,
+                'maxIdle': self.max_idle,
+                'connectionsOpened': self.connections_opened,
+                'connectionsReused': self.connections_reused,
+                'tlsSessionsResumed': self.tls_sessions.resumptions
+            }
+
+outbound_pool = OutboundConnectionPool()
+
+def open_page(url, conditional_headers=None, stored_page=None):
+    """Request a page with browser-like headers, retrying a 403 with minimal headers.
+    Returns the response, or None when the server answers 304 Not Modified for stored_page"""
+    conditional_headers = conditional_headers or {}
+    # Fetch the website with comprehensive browser headers to avoid 403 errors
+    # Compressed responses are decoded by ResponseTextReader
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Encoding': ACCEPT_ENCODING,
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Cache-Control': 'max-age=0',
+        **conditional_headers
+    }
+    
+    # Fetch over pooled keep-alive connections (certificates aren't verified, for testing)
+    # Handle 403 errors by retrying with simpler headers; the retry reuses the same connection
+    response = None
+    try:
+        response = outbound_pool.open(url, headers, timeout=10)
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and stored_page:
+            pass  # Not modified since the last scan
+        elif e.code == 403:
+            # Some sites return 403 even with good headers - retry with just User-Agent
+            simple_headers = {
+                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                'Accept-Encoding': ACCEPT_ENCODING,
+                **conditional_headers
+            }
+            try:
+                response = outbound_pool.open(url, simple_headers, timeout=10)
+            except urllib.error.HTTPError as e2:
+                if e2.code == 304 and stored_page:
+                    pass  # Not modified since the last scan
+                elif e2.code == 403:
+                    raise Exception('Website blocked the request (403 Forbidden). Some websites block automated requests for security reasons. Try a different website or contact the website owner.')
+                else:
+                    raise
+        else:
+            raise
+    return response
+
+def fetch_error(error):
+    """The user-facing Exception for a URLError raised while fetching a page"""
+    error_msg = str(error)
+    if isinstance(error.reason, socket.gaierror) and error.reason.errno in NXDOMAIN_ERRNOS:
+        return Exception('Invalid URL or domain name not found. Please check the URL and try again.')
+    elif 'nodename nor servname provided' in error_msg or 'Name or service not known' in error_msg:
+        return Exception('Invalid URL or domain name not found. Please check the URL and try again.')
+    elif 'timed out' in error_msg.lower() or 'timeout' in error_msg.lower():
+        return Exception('Request timed out. The website may be slow or unreachable. Please try again.')
+    elif '403' in error_msg or 'Forbidden' in error_msg:
+        return Exception('Website blocked the request (403 Forbidden). Some websites block automated requests.')
+    elif '404' in error_msg or 'Not Found' in error_msg:
+        return Exception('Website not found (404). Please check the URL and try again.')
+    else:
+        return Exception(f'Failed to fetch website: {error_msg}. Please verify the URL is correct and accessible.')
+
+def fetch_and_parse(url, progress=None, early_stop=False, profile='full', signals=None, deadline=None):
+    """Fetch a website once and parse it, returning a reusable PageAnalysis.
+    Only the signals the scan profile's checks read (or the given signals) are parsed.
+    With early_stop the download ends once <head> and the above-the-fold content are parsed.
+    deadline can bring the end of the download forward from FETCH_DEADLINE"""
+    signals = signals or profile_signals(profile)
+    deadline = min(deadline or float('inf'), time.time() + FETCH_DEADLINE)
+    try:
+        # Revalidate pages we've parsed before instead of downloading them again
+        # (per signal set, since a lighter parse lacks signals a fuller one needs)
+        cache_key = (normalize_url(url), signals)
+        conditional_headers, stored_page = page_validators.lookup(cache_key)
         
-        # 23. Location & Contact Information
-        location_score = 10 if parser.location_info and parser.phone_number else (5 if parser.location_info or parser.phone_number else 0)
-        audit_results.append({
-            'name': 'Location & Contact Information',
-            'points': location_score,
-            'maxPoints': 10,
-            'status': 'pass' if location_score >= 8 else ('warning' if location_score > 0 else 'fail')
-        })
-        total_score += location_score
-        max_score += 10
+        response = open_page(url, conditional_headers, stored_page)
+        if response is None:
+            # 304 Not Modified: the stored parse is still current
+            page_validators.record_not_modified()
+            if progress:
+                progress('fetched')
+                progress('parsed')
+            return stored_page
         
-        # 24. Operating Hours
-        hours_score = 10 if parser.hours_info else 0
-        audit_results.append({
-            'name': 'Operating Hours Information',
-            'points': hours_score,
-            'maxPoints': 10,
-            'status': 'pass' if hours_score == 10 else 'fail'
-        })
-        total_score += hours_score
-        max_score += 10
+        # Parse while downloading: each chunk is fed to the parser as it arrives
+        parser = HTMLAuditParser(signals)
+        reader = ResponseTextReader(response, max_bytes=MAX_PAGE_BYTES, deadline=deadline)
+        partial_reason = None
+        for text in reader:
+            parser.feed(text)
+            if early_stop and parser.above_the_fold_read(EARLY_STOP_TEXT):
+                partial_reason = 'early_stop'
+                response.close()
+                break
+        parser.close()
+        partial_reason = partial_reason or reader.truncated_reason
+        if progress:
+            progress('fetched')
+            progress('parsed')
         
-        # 25. Reservation/Booking System
-        reservation_score = 10 if len(parser.reservation_links) > 0 else 0
-        audit_results.append({
-            'name': 'Reservation/Booking System',
-            'points': reservation_score,
-            'maxPoints': 10,
-            'status': 'pass' if reservation_score == 10 else 'fail'
-        })
-        total_score += reservation_score
-        max_score += 10
+        page = PageAnalysis(url, parser, partial_reason, response.url)
+        if not page.partial:
+            page_validators.remember(cache_key, response.headers, page)
+        return page
+    except urllib.error.URLError as error:
+        raise fetch_error(error)
+    except Exception as error:
+        error_msg = str(error)
+        if 'Failed to fetch or analyze website' in error_msg:
+            raise  # Re-raise our custom errors
+        raise Exception(f'Failed to fetch or analyze website: {error_msg}')
+
+# robots.txt user agents of AI crawlers and assistants, reported by the robots check
+AI_USER_AGENTS = ('GPTBot', 'ChatGPT-User', 'OAI-SearchBot', 'ClaudeBot', 'Claude-User', 'PerplexityBot',
+                  'Google-Extended', 'Applebot-Extended', 'CCBot')
+# Seconds a host's robots.txt and sitemap are reused (failed fetches are retried sooner)
+SITE_FILES_TTL = int(os.environ.get('SITE_FILES_TTL', '3600'))
+SITE_FILES_ERROR_TTL = 60
+SITE_FILES_CACHE_SIZE = 1000
+# Crawlers only read the first 500 KiB of a robots.txt
+ROBOTS_MAX_BYTES = 500 * 1024
+SITE_FILES_TIMEOUT = 10
+# The sitemap is only summarized, never scored: a short download, and entries past the cap aren't counted
+SITEMAP_MAX_BYTES = 256 * 1024
+SITEMAP_TIMEOUT = 3
+
+class SiteFiles:
+    """A host's robots.txt rules and sitemap summary"""
+    def __init__(self, robots_status, rules=None, sitemaps=None, sitemap=None, sitemap_ready=True):
+        self.robots_status = robots_status  # found, missing (4xx), unreachable (5xx) or error
+        self.rules = rules  # RobotFileParser when robots.txt was found
+        self.sitemaps = sitemaps or []  # Sitemap: lines in robots.txt
+        self.sitemap = sitemap  # Summary of the first sitemap found, or None
+        self.sitemap_ready = sitemap_ready  # False while the sitemap is still downloading
+    
+    def ai_crawler_access(self, url):
+        """AI user agent -> whether robots.txt lets it fetch url, or None when robots.txt couldn't be fetched.
+        As crawlers do (RFC 9309), a missing robots.txt allows everything and a failing one blocks everything"""
+        if self.robots_status == 'error':
+            return None
+        if self.rules is None:
+            return {agent: self.robots_status == 'missing' for agent in AI_USER_AGENTS}
+        return {agent: self.rules.can_fetch(agent, url) for agent in AI_USER_AGENTS}
+    
+    def report(self, url):
+        """The crawler access report; 'sitemap' is left out while the sitemap is still downloading"""
+        access = self.ai_crawler_access(url)
+        report = {
+            'robotsTxt': self.robots_status,
+            'aiAgentsAllowed': None if access is None else [agent for agent, allowed in access.items() if allowed],
+            'aiAgentsBlocked': None if access is None else [agent for agent, allowed in access.items() if not allowed],
+            'sitemaps': self.sitemaps
+        }
+        if self.sitemap_ready:
+            report['sitemap'] = self.sitemap
+        return report
+
+def fetch_site_file(url, max_bytes, timeout=SITE_FILES_TIMEOUT):
+    """Download a small text file; returns (status, text), text being None unless the status is 200"""
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept-Encoding': ACCEPT_ENCODING
+    }
+    try:
+        response = outbound_pool.open(url, headers, timeout=timeout)
+    except urllib.error.HTTPError as error:
+        return error.code, None
+    reader = ResponseTextReader(response, max_bytes=max_bytes, deadline=time.time() + timeout)
+    return 200, ''.join(reader)
+
+def fetch_robots_txt(origin):
+    """SiteFiles for an origin's robots.txt (without the sitemap)"""
+    try:
+        status, text = fetch_site_file(f'{origin}/robots.txt', ROBOTS_MAX_BYTES)
+    except Exception:
+        return SiteFiles('error')
+    if status >= 500:
+        return SiteFiles('unreachable')
+    if text is None:
+        return SiteFiles('missing')
+    rules = urllib.robotparser.RobotFileParser(f'{origin}/robots.txt')
+    rules.parse(text.splitlines())
+    return SiteFiles('found', rules, rules.site_maps())
+
+def summarize_sitemap(url, text):
+    """{'url', 'type', 'entries', 'truncated'} for sitemap XML, or None when text isn't a sitemap"""
+    parser = ElementTree.XMLPullParser(events=('start', 'end'))
+    root_type = None
+    entries = 0
+    try:
+        parser.feed(text)
+        for event, element in parser.read_events():
+            tag = element.tag.rsplit('}', 1)[-1]
+            if root_type is None:
+                if tag not in ('urlset', 'sitemapindex'):
+                    return None
+                root_type = tag
+            elif event == 'end' and tag in ('url', 'sitemap'):
+                entries += 1
+                element.clear()
+        parser.close()
+        truncated = False
+    except ElementTree.ParseError:
+        if root_type is None:
+            return None
+        truncated = True  # Cut off at the size cap (or malformed past this point)
+    return {'url': url, 'type': root_type, 'entries': entries, 'truncated': truncated}
+
+def fetch_sitemap(origin, robots_future):
+    """Summary of /sitemap.xml, or of the first sitemap robots.txt declares when that one is missing"""
+    candidates = [f'{origin}/sitemap.xml']
+    for attempt in range(2):
+        for url in candidates:
+            try:
+                status, text = fetch_site_file(url, SITEMAP_MAX_BYTES, SITEMAP_TIMEOUT)
+            except Exception:
+                continue
+            summary = summarize_sitemap(url, text) if text else None
+            if summary:
+                return summary
+        if attempt == 0:
+            # Only now wait on robots.txt, which was requested first and usually has finished
+            declared = robots_future.result().sitemaps
+            candidates = [url for url in declared[:1] if url not in candidates]
+    return None
+
+class SiteFilesCache:
+    """robots.txt and sitemap per origin (scheme://host), fetched in the background and reused for
+    SITE_FILES_TTL, so batch and repeat scans of a host download them once. Concurrent lookups of
+    an origin share the same fetch"""
+    def __init__(self, ttl=SITE_FILES_TTL, max_size=SITE_FILES_CACHE_SIZE, workers=8):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='site-files')
+        self.entries = OrderedDict()  # origin -> [expires at, robots future, sitemap future]
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def origin(url):
+        parsed = urlparse(url)
+        return f'{parsed.scheme.lower()}://{parsed.netloc.lower()}'
+    
+    def prefetch(self, url):
+        """Start fetching url's robots.txt and sitemap unless they're cached; returns the cache entry"""
+        origin = self.origin(url)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(origin)
+            if entry and entry[0] > now:
+                self.entries.move_to_end(origin)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            # robots.txt is submitted first: the sitemap fetch may wait on it
+            robots_future = self.executor.submit(fetch_robots_txt, origin)
+            sitemap_future = self.executor.submit(fetch_sitemap, origin, robots_future)
+            entry = [now + self.ttl, robots_future, sitemap_future]
+            self.entries[origin] = entry
+            self.entries.move_to_end(origin)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            return entry
+    
+    def get(self, url, timeout=SITE_FILES_TIMEOUT * 2):
+        """SiteFiles for url's origin, waiting up to timeout for a robots.txt fetch in progress.
+        Scores only read robots.txt, so the sitemap is never waited for: it is included once downloaded"""
+        with self.lock:
+            entry = self.entries.get(self.origin(url))
+        if entry is None or entry[0] <= time.time():
+            entry = self.prefetch(url)
+        _, robots_future, sitemap_future = entry
+        try:
+            robots = robots_future.result(timeout=timeout)
+        except Exception:
+            return SiteFiles('error')
+        if robots.robots_status == 'error':
+            with self.lock:
+                entry[0] = min(entry[0], time.time() + SITE_FILES_ERROR_TTL)
+        sitemap_ready = sitemap_future.done() and not sitemap_future.cancelled()
+        sitemap = sitemap_future.result() if sitemap_ready and sitemap_future.exception() is None else None
+        return SiteFiles(robots.robots_status, robots.rules, robots.sitemaps, sitemap, sitemap_ready)
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'ttlSeconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+site_files_cache = SiteFilesCache()
+
+# Parser signals filled from robots.txt rather than the page, by apply_site_files
+SITE_FILE_SIGNALS = frozenset(['ai_crawler_access'])
+
+def apply_site_files(page, site_files):
+    """A copy of a parsed page with the host's robots.txt verdicts for its URL attached.
+    The page itself is left alone: it may be the stored copy PageValidatorStore hands to other scans"""
+    parser = copy.copy(page.parser)
+    parser.ai_crawler_access = site_files.ai_crawler_access(page.url)
+    with_site_files = PageAnalysis(page.url, parser, page.partial_reason, page.final_url)
+    with_site_files.crawler_access = site_files.report(page.url)
+    return with_site_files
+
+class AuditCheck:
+    """One scored check: the parser signals it reads and the function that turns them into points"""
+    def __init__(self, key, name, max_points, signals, score, pass_at=None, warning_at=None):
+        self.key = key
+        self.name = name
+        self.max_points = max_points
+        self.signals = frozenset(signals)
+        self.score = score
+        self.pass_at = max_points if pass_at is None else pass_at
+        self.warning_at = warning_at  # None when the check is pass/fail only
+    
+    def run(self, parser):
+        points = self.score(parser)
+        if points >= self.pass_at:
+            status = 'pass'
+        elif self.warning_at is not None and points >= self.warning_at:
+            status = 'warning'
+        else:
+            status = 'fail'
+        return {
+            'name': self.name,
+            'points': points,
+            'maxPoints': self.max_points,
+            'status': status
+        }
+
+# Check key -> AuditCheck, in report order
+AUDIT_CHECKS = {}
+
+def audit_check(key, name, max_points, signals, pass_at=None, warning_at=None):
+    """Register the decorated score(parser) function as an audit check"""
+    def register(score):
+        AUDIT_CHECKS[key] = AuditCheck(key, name, max_points, signals, score, pass_at, warning_at)
+        return score
+    return register
+
+# 1. Check for title tag
+@audit_check('title', 'Has Title Tag', 10, ['title'])
+def score_title(parser):
+    return 10 if parser.title.strip() else 0
+
+# 2. Check for meta description
+@audit_check('meta_description', 'Has Meta Description', 10, ['meta_description'], warning_at=5)
+def score_meta_description(parser):
+    meta_description = parser.meta_description
+    return 10 if meta_description and len(meta_description) > 50 else (5 if meta_description else 0)
+
+# 3. Check for structured data
+@audit_check('structured_data', 'Structured Data (Schema.org)', 15, ['json_ld_count', 'microdata_count'], pass_at=10)
+def score_structured_data(parser):
+    return 15 if parser.json_ld_count > 0 else (10 if parser.microdata_count > 0 else 0)
+
+# 4. Check for semantic HTML
+@audit_check('semantic_html', 'Semantic HTML Elements', 15, ['semantic_elements'], pass_at=10, warning_at=1)
+def score_semantic_html(parser):
+    semantic_count = len(parser.semantic_elements)
+    return 15 if semantic_count >= 3 else (8 if semantic_count > 0 else 0)
+
+# 5. Check for alt text on images
+@audit_check('image_alt_text', 'Image Alt Text', 10, ['images'], pass_at=8, warning_at=5)
+def score_image_alt_text(parser):
+    images_count = len(parser.images)
+    images_with_alt = sum(1 for img in parser.images if img['has_alt'])
+    return 10 if images_count == 0 else round((images_with_alt / images_count) * 10)
+
+# 6. Check for heading hierarchy
+@audit_check('heading_hierarchy', 'Proper Heading Hierarchy', 10, ['headings'], pass_at=7, warning_at=1)
+def score_heading_hierarchy(parser):
+    h1_count = parser.headings['h1']
+    h2_count = parser.headings['h2']
+    return 10 if h1_count == 1 and h2_count > 0 else (7 if h1_count == 1 else (5 if h1_count > 0 else 0))
+
+# 7. Check for Open Graph tags
+@audit_check('open_graph', 'Open Graph Tags', 10, ['og_tags'], pass_at=7, warning_at=1)
+def score_open_graph(parser):
+    og_count = len(parser.og_tags)
+    return 10 if og_count >= 3 else (5 if og_count > 0 else 0)
+
+# 8. Check for robots meta tag and the AI crawlers robots.txt allows
+@audit_check('robots', 'Crawlable by AI (Robots)', 10, ['robots_meta', 'ai_crawler_access'], warning_at=1)
+def score_robots(parser):
+    robots_content = parser.robots_meta
+    if robots_content and 'noindex' in robots_content:
+        return 0
+    access = parser.ai_crawler_access
+    if not access:
+        return 10  # robots.txt unknown: judge by the meta tag alone
+    return round(10 * sum(access.values()) / len(access))
+
+# 9. Check for language attribute
+@audit_check('language', 'HTML Language Attribute', 10, ['lang_attribute'])
+def score_language(parser):
+    return 10 if parser.lang_attribute else 0
+
+# 10. Check for viewport meta tag (mobile-friendly)
+@audit_check('viewport', 'Mobile Viewport Meta Tag', 10, ['viewport'])
+def score_viewport(parser):
+    return 10 if parser.viewport else 0
+
+# 11. Check for charset declaration
+@audit_check('charset', 'Character Encoding Declaration', 10, ['charset'])
+def score_charset(parser):
+    return 10 if parser.charset else 0
+
+# 12. Check for canonical URL
+@audit_check('canonical_url', 'Canonical URL', 10, ['canonical_url'])
+def score_canonical_url(parser):
+    return 10 if parser.canonical_url else 0
+
+# 13. Check for Twitter Card tags
+@audit_check('twitter_card', 'Twitter Card Tags', 10, ['twitter_card'])
+def score_twitter_card(parser):
+    return 10 if parser.twitter_card else 0
+
+# 14. Check for accessibility (ARIA labels)
+@audit_check('aria_labels', 'ARIA Labels & Accessibility', 10, ['aria_labels'], pass_at=8, warning_at=1)
+def score_aria_labels(parser):
+    return 10 if parser.aria_labels >= 3 else (5 if parser.aria_labels > 0 else 0)
+
+# 15. Check for content length (AI needs substantial content)
+@audit_check('content_length', 'Content Length (AI Readable)', 10, ['content_length'], pass_at=8, warning_at=1)
+def score_content_length(parser):
+    return 10 if parser.content_length > 1000 else (5 if parser.content_length > 500 else 0)
+
+# 16. Check for internal linking structure
+@audit_check('internal_links', 'Internal Linking Structure', 10, ['links'], pass_at=8, warning_at=1)
+def score_internal_links(parser):
+    internal_links = sum(1 for link in parser.links if link.startswith('/') or link.startswith('#'))
+    return 10 if internal_links >= 5 else (5 if internal_links > 0 else 0)
+
+# 17. Check for forms (interactivity)
+@audit_check('forms', 'Interactive Forms', 5, ['forms'])
+def score_forms(parser):
+    return 5 if len(parser.forms) > 0 else 0
+
+# 18. Check for analytics tracking
+@audit_check('analytics', 'Analytics Tracking', 5, ['analytics_tracking'])
+def score_analytics(parser):
+    return 5 if parser.analytics_tracking else 0
+
+# 19. Check for proper heading structure (h1-h6 hierarchy)
+@audit_check('heading_structure', 'Complete Heading Hierarchy', 10, ['headings'], pass_at=8, warning_at=1)
+def score_heading_structure(parser):
+    return 10 if parser.headings['h1'] == 1 and parser.headings['h2'] > 0 and parser.headings['h3'] >= 0 else (5 if parser.headings['h1'] == 1 else 0)
+
+# 20. Check for video/media content
+@audit_check('multimedia', 'Multimedia Content', 5, ['videos', 'iframes'])
+def score_multimedia(parser):
+    return 5 if len(parser.videos) > 0 or len(parser.iframes) > 0 else 0
+
+# Restaurant/Bar Specific Checks (21-26)
+
+# 21. Restaurant Schema (JSON-LD)
+@audit_check('restaurant_schema', 'Restaurant/Bar Schema Markup', 15, ['restaurant_schema'])
+def score_restaurant_schema(parser):
+    return 15 if parser.restaurant_schema else 0
+
+# 22. Menu Availability
+@audit_check('menu', 'Menu Information Available', 10, ['menu_links'])
+def score_menu(parser):
+    return 10 if len(parser.menu_links) > 0 else 0
+
+# 23. Location & Contact Information
+@audit_check('location_contact', 'Location & Contact Information', 10, ['location_info', 'phone_number'], pass_at=8, warning_at=1)
+def score_location_contact(parser):
+    return 10 if parser.location_info and parser.phone_number else (5 if parser.location_info or parser.phone_number else 0)
+
+# 24. Operating Hours
+@audit_check('hours', 'Operating Hours Information', 10, ['hours_info'])
+def score_hours(parser):
+    return 10 if parser.hours_info else 0
+
+# 25. Reservation/Booking System
+@audit_check('reservations', 'Reservation/Booking System', 10, ['reservation_links'])
+def score_reservations(parser):
+    return 10 if len(parser.reservation_links) > 0 else 0
+
+# 26. Review Visibility & Integration
+@audit_check('review_visibility', 'Review Visibility & Integration', 10,
+             ['review_platforms', 'review_widgets', 'review_mentions', 'rating_mentions'], pass_at=8, warning_at=1)
+def score_review_visibility(parser):
+    return 10 if len(parser.review_platforms) > 0 or len(parser.review_widgets) > 0 else (5 if parser.review_mentions or parser.rating_mentions else 0)
+
+# Parser signals read by generate_review_recommendations
+REVIEW_RECOMMENDATION_SIGNALS = frozenset(['review_platforms', 'review_widgets', 'social_media_links', 'wait_time_mentions',
+                                           'hours_info', 'menu_links', 'images', 'price_range_mentions'])
+
+# Scan profiles: which checks run (None for all of them) and whether review recommendations are built.
+# Each profile parses only the signals its checks read, so lighter profiles scan faster
+AUDIT_PROFILES = {
+    'full': {'checks': None, 'review_recommendations': True},
+    'quick_seo': {
+        'checks': ['title', 'meta_description', 'structured_data', 'semantic_html', 'image_alt_text',
+                   'heading_hierarchy', 'open_graph', 'robots', 'language', 'viewport', 'charset',
+                   'canonical_url', 'twitter_card', 'content_length', 'heading_structure'],
+        'review_recommendations': False
+    }
+}
+
+def profile_checks(profile):
+    keys = AUDIT_PROFILES[profile]['checks']
+    return list(AUDIT_CHECKS.values()) if keys is None else [AUDIT_CHECKS[key] for key in keys]
+
+@functools.lru_cache(maxsize=None)
+def profile_signals(profile):
+    """The parser signals a profile's checks (and recommendations) read"""
+    signals = set()
+    for check in profile_checks(profile):
+        signals |= check.signals
+    if AUDIT_PROFILES[profile]['review_recommendations']:
+        signals |= REVIEW_RECOMMENDATION_SIGNALS
+    return frozenset(signals)
+
+def perform_ai_audit(url, page=None, profile='full'):
+    """Perform AI audit on a website using only standard library"""
+    if page is None:
+        page = fetch_and_parse(url, profile=profile)
+    try:
+        parser = page.parser
         
-        # 26. Review Visibility & Integration
-        review_visibility_score = 10 if len(parser.review_platforms) > 0 or len(parser.review_widgets) > 0 else (5 if parser.review_mentions or parser.rating_mentions else 0)
-        audit_results.append({
-            'name': 'Review Visibility & Integration',
-            'points': review_visibility_score,
-            'maxPoints': 10,
-            'status': 'pass' if review_visibility_score >= 8 else ('warning' if review_visibility_score > 0 else 'fail')
-        })
-        total_score += review_visibility_score
-        max_score += 10
+        audit_results = [check.run(parser) for check in profile_checks(profile)]
+        total_score = sum(result['points'] for result in audit_results)
+        max_score = sum(result['maxPoints'] for result in audit_results)
         
         # Calculate final score
         final_score = round((total_score / max_score) * 100) if max_score > 0 else 0
@@ -683,30 +1589,516 @@ def perform_ai_audit(url):
         return {
             'score': final_score,
             'details': audit_results,
-            'totalChecks': len(audit_results)
+            'totalChecks': len(audit_results),
+            'profile': profile,
+            'partial': page.partial,
+            'partialReason': page.partial_reason,
+            'crawlerAccess': page.crawler_access
         }
-    except urllib.error.URLError as error:
-        error_msg = str(error)
-        if 'nodename nor servname provided' in error_msg or 'Name or service not known' in error_msg:
-            raise Exception('Invalid URL or domain name not found. Please check the URL and try again.')
-        elif 'timed out' in error_msg.lower() or 'timeout' in error_msg.lower():
-            raise Exception('Request timed out. The website may be slow or unreachable. Please try again.')
-        elif '403' in error_msg or 'Forbidden' in error_msg:
-            raise Exception('Website blocked the request (403 Forbidden). Some websites block automated requests.')
-        elif '404' in error_msg or 'Not Found' in error_msg:
-            raise Exception('Website not found (404). Please check the URL and try again.')
-        else:
-            raise Exception(f'Failed to fetch website: {error_msg}. Please verify the URL is correct and accessible.')
     except Exception as error:
-        error_msg = str(error)
-        if 'Failed to fetch or analyze website' in error_msg:
-            raise  # Re-raise our custom errors
-        raise Exception(f'Failed to fetch or analyze website: {error_msg}')
+        raise Exception(f'Failed to fetch or analyze website: {error}')
+
+# Reports, payments and the admin scan list live in SQLite so restarts keep paid reports.
+# On Railway/Render point DATABASE_PATH at a mounted volume
+DATABASE_PATH = os.environ.get('DATABASE_PATH', 'audit_data.db')
+# Paying users were kept in this JSON file before; it is imported into the database once
+USER_DATABASE_FILE = 'user_database.json'
+# Recently used reports kept in memory (count and approximate MB of report JSON);
+# the rest stay zlib-compressed in the database until /api/unlock or /api/pdf needs them
+REPORT_CACHE_SIZE = int(os.environ.get('REPORT_CACHE_SIZE', '200'))
+REPORT_CACHE_MB = float(os.environ.get('REPORT_CACHE_MB', '32'))
+# Seconds unpaid reports are kept (0 keeps them forever), and how often expired ones are deleted
+UNPAID_REPORT_TTL = int(os.environ.get('UNPAID_REPORT_TTL', str(7 * 24 * 3600)))
+REPORT_PURGE_INTERVAL = 600
+
+class ResidentReportCache:
+    """Thread-safe LRU of decoded reports, bounded by entry count and by the size of their JSON"""
+    def __init__(self, max_entries=REPORT_CACHE_SIZE, max_bytes=int(REPORT_CACHE_MB * 1024 * 1024)):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # report_id -> (report, JSON size)
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, report_id):
+        with self.lock:
+            entry = self.entries.get(report_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(report_id)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, report_id, report, size):
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self.lock:
+            old = self.entries.pop(report_id, None)
+            if old:
+                self.bytes -= old[1]
+            self.entries[report_id] = (report, size)
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+    
+    def discard_older_than(self, cutoff):
+        """Drop reports stored before cutoff (a UNIX time)"""
+        with self.lock:
+            for report_id in [report_id for report_id, (report, _) in self.entries.items() if report['timestamp'] < cutoff]:
+                self.bytes -= self.entries.pop(report_id)[1]
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'resident': len(self.entries),
+                'residentBytes': self.bytes,
+                'maxEntries': self.max_entries,
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': round(self.hits / lookups, 3) if lookups else 0
+            }
+
+class ReportRepository:
+    """SQLite (WAL mode) storage for reports, payments and admin scans, indexed by report ID, URL and time.
+    Each thread keeps its own connection; WAL lets readers run while a write commits"""
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS reports (
+            report_id TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            full_report BLOB NOT NULL,
+            timestamp REAL NOT NULL,
+            timestamp_iso TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS reports_url ON reports (url);
+        CREATE INDEX IF NOT EXISTS reports_timestamp ON reports (timestamp);
+        CREATE TABLE IF NOT EXISTS payments (
+            payment_id TEXT PRIMARY KEY,
+            report_id TEXT NOT NULL,
+            email TEXT NOT NULL,
+            status TEXT NOT NULL,
+            timestamp REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS payments_report ON payments (report_id, status);
+        CREATE TABLE IF NOT EXISTS admin_scans (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id TEXT NOT NULL UNIQUE,
+            url TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            timestamp TEXT NOT NULL,
+            payment_status TEXT NOT NULL,
+            change_seq INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS admin_scans_url ON admin_scans (url);
+        CREATE INDEX IF NOT EXISTS admin_scans_timestamp ON admin_scans (timestamp);
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL,
+            url TEXT NOT NULL,
+            report_id TEXT NOT NULL,
+            score INTEGER,
+            timestamp TEXT NOT NULL,
+            date TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS users_email ON users (email);
+        CREATE INDEX IF NOT EXISTS users_report ON users (report_id);
+        CREATE TABLE IF NOT EXISTS email_deliveries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id TEXT NOT NULL,
+            email TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS email_deliveries_status ON email_deliveries (status);
+        CREATE TABLE IF NOT EXISTS migrations (
+            name TEXT PRIMARY KEY,
+            applied_at TEXT NOT NULL
+        );
+    """
+    USER_FIELDS = ('email', 'url', 'report_id', 'score', 'timestamp', 'date')
+    
+    def __init__(self, path=DATABASE_PATH, user_file=USER_DATABASE_FILE, unpaid_ttl=UNPAID_REPORT_TTL):
+        self.path = path
+        self.local = threading.local()
+        self.cache = ResidentReportCache()
+        self.unpaid_ttl = unpaid_ttl
+        self.expired = 0
+        self.purge_thread = None
+        self.purge_lock = threading.Lock()
+        self.purge_stopping = threading.Event()
+        self.connection().executescript(self.SCHEMA)
+        self.migrate_change_seq()
+        if user_file:
+            self.migrate_user_file(user_file)
+        # Admin scan change feed: every insert or payment-status update gets the next change_seq,
+        # and waiting admin streams are woken through this condition
+        self.changed = threading.Condition()
+        self.last_change, self.scan_count = self.connection().execute(
+            'SELECT COALESCE(MAX(change_seq), 0), COUNT(*) FROM admin_scans').fetchone()
+        self.closed = False
+    
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')  # Durable at checkpoints; safe against corruption
+            self.local.connection = connection
+        return connection
+    
+    def add_report(self, report_id, url, full_report, score):
+        """Store a scan's full report (compressed) and its admin scan row; the report also stays resident"""
+        now = time.time()
+        timestamp_iso = datetime.fromtimestamp(now).isoformat()
+        report_json = json.dumps(full_report, separators=(',', ':')).encode('utf-8')
+        with self.changed, self.connection() as connection:
+            connection.execute('INSERT INTO reports VALUES (?, ?, ?, ?, ?)',
+                               (report_id, url, zlib.compress(report_json), now, timestamp_iso))
+            connection.execute('INSERT INTO admin_scans (report_id, url, score, timestamp, payment_status, change_seq) '
+                               "VALUES (?, ?, ?, ?, 'free', ?)", (report_id, url, score, timestamp_iso, self.last_change + 1))
+            connection.commit()
+            self.last_change += 1
+            self.scan_count += 1
+            self.changed.notify_all()
+        report = {'url': url, 'full_report': full_report, 'timestamp': now, 'timestamp_iso': timestamp_iso}
+        self.cache.put(report_id, report, len(report_json))
+    
+    def get_report(self, report_id):
+        """{'url', 'full_report', 'timestamp', 'timestamp_iso'} for a report, or None.
+        Reports that aren't resident are loaded from the database and kept resident"""
+        report = self.cache.get(report_id)
+        if report is not None:
+            return report
+        row = self.connection().execute('SELECT url, full_report, timestamp, timestamp_iso FROM reports WHERE report_id = ?',
+                                        (report_id,)).fetchone()
+        if row is None:
+            return None
+        report_json = row['full_report']
+        if isinstance(report_json, bytes):
+            report_json = zlib.decompress(report_json)
+        report = {
+            'url': row['url'],
+            'full_report': json.loads(report_json),
+            'timestamp': row['timestamp'],
+            'timestamp_iso': row['timestamp_iso']
+        }
+        self.cache.put(report_id, report, len(report_json))
+        return report
+    
+    def report_exists(self, report_id):
+        if self.cache.get(report_id) is not None:
+            return True
+        return self.connection().execute('SELECT 1 FROM reports WHERE report_id = ?', (report_id,)).fetchone() is not None
+    
+    def purge_expired(self):
+        """Delete unpaid reports older than the TTL (their admin scan rows are kept).
+        One DELETE checks for a payment and deletes, so a report paid meanwhile is never removed;
+        add_payment waits on the same lock, so it can't act on a resident copy being dropped"""
+        if self.unpaid_ttl <= 0:
+            return 0
+        cutoff = time.time() - self.unpaid_ttl
+        with self.changed, self.connection() as connection:
+            expired = connection.execute(
+                "DELETE FROM reports WHERE timestamp < ? AND report_id NOT IN "
+                "(SELECT report_id FROM payments WHERE status = 'completed')", (cutoff,)).rowcount
+            connection.commit()
+            # Paid reports dropped from memory here are reloaded from the database when next read
+            self.cache.discard_older_than(cutoff)
+            self.expired += expired
+        return expired
+    
+    def start_purging(self, interval=REPORT_PURGE_INTERVAL):
+        """Purge expired reports now and then every interval seconds on a background thread (started once)"""
+        with self.purge_lock:
+            if self.purge_thread:
+                return
+            self.purge_thread = threading.Thread(target=self.purge_periodically, args=(interval,),
+                                                 name='report-purge', daemon=True)
+            self.purge_thread.start()
+    
+    def purge_periodically(self, interval):
+        while not self.purge_stopping.is_set():
+            try:
+                self.purge_expired()
+            except Exception as error:
+                print(f'⚠️ Report purge failed: {error}', file=sys.stderr)
+            self.purge_stopping.wait(interval)
+    
+    def stop_purging(self, timeout=10):
+        self.purge_stopping.set()
+        with self.purge_lock:
+            if self.purge_thread:
+                self.purge_thread.join(timeout)
+    
+    def report_stats(self):
+        stats = self.cache.stats()
+        stored = self.connection().execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+        stats.update(stored=stored, spilled=max(0, stored - stats['resident']),
+                     unpaidTtlSeconds=self.unpaid_ttl, expired=self.expired)
+        return stats
+    
+    def add_payment(self, payment_id, report_id, email, status='completed'):
+        """Record a payment and mark the report's admin scan as paid"""
+        with self.changed, self.connection() as connection:
+            connection.execute('INSERT INTO payments VALUES (?, ?, ?, ?, ?)', (payment_id, report_id, email, status, time.time()))
+            if status == 'completed':
+                connection.execute("UPDATE admin_scans SET payment_status = 'paid', change_seq = ? WHERE report_id = ?",
+                                   (self.last_change + 1, report_id))
+            connection.commit()
+            if status == 'completed':
+                self.last_change += 1
+                self.changed.notify_all()
+    
+    def is_paid(self, report_id):
+        """Whether a completed payment exists for the report"""
+        return self.connection().execute("SELECT 1 FROM payments WHERE report_id = ? AND status = 'completed' LIMIT 1",
+                                         (report_id,)).fetchone() is not None
+    
+    def recent_scans(self, limit=100):
+        rows = self.connection().execute('SELECT report_id, url, score, timestamp, payment_status FROM admin_scans '
+                                         'ORDER BY timestamp DESC LIMIT ?', (limit,))
+        return [dict(row) for row in rows]
+    
+    def count_scans(self):
+        with self.changed:
+            return self.scan_count
+    
+    def latest_change(self):
+        with self.changed:
+            return self.last_change
+    
+    def scan_changes(self, since, limit=100):
+        """Admin scans added or updated after the since cursor, oldest change first.
+        Returns (scans, cursor to pass next time, whether more changes are waiting)"""
+        rows = self.connection().execute('SELECT report_id, url, score, timestamp, payment_status, change_seq FROM admin_scans '
+                                         'WHERE change_seq > ? ORDER BY change_seq LIMIT ?', (since, limit + 1)).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        cursor = rows[-1]['change_seq'] if rows else since
+        scans = [{key: row[key] for key in row.keys() if key != 'change_seq'} for row in rows]
+        return scans, cursor, has_more
+    
+    def wait_for_change(self, cursor, timeout):
+        """Block until a change after cursor is committed (True) or the timeout passes or streams are closed (False)"""
+        with self.changed:
+            if self.last_change <= cursor and not self.closed:
+                self.changed.wait(timeout)
+            return self.last_change > cursor and not self.closed
+    
+    def close_change_waiters(self):
+        """End admin streams, so shutdown doesn't wait for them"""
+        with self.changed:
+            self.closed = True
+            self.changed.notify_all()
+    
+    def migrate_change_seq(self):
+        """Databases created before the admin change feed: number existing scans in insertion order"""
+        connection = self.connection()
+        columns = [row['name'] for row in connection.execute('PRAGMA table_info(admin_scans)')]
+        with connection:
+            if 'change_seq' not in columns:
+                connection.execute('ALTER TABLE admin_scans ADD COLUMN change_seq INTEGER')
+                connection.execute('UPDATE admin_scans SET change_seq = seq')
+            connection.execute('CREATE INDEX IF NOT EXISTS admin_scans_change ON admin_scans (change_seq)')
+    
+    def add_user(self, email, url, report_id, score):
+        """Record a paying user: one indexed insert, committed on its own"""
+        now = datetime.now()
+        with self.connection() as connection:
+            connection.execute('INSERT INTO users (email, url, report_id, score, timestamp, date) VALUES (?, ?, ?, ?, ?, ?)',
+                               (email, url, report_id, score, now.isoformat(), now.strftime('%Y-%m-%d %H:%M:%S')))
+    
+    def users_by_email(self, email):
+        rows = self.connection().execute(f'SELECT {", ".join(self.USER_FIELDS)} FROM users WHERE email = ? ORDER BY id',
+                                         (email,))
+        return [dict(row) for row in rows]
+    
+    def users_by_report(self, report_id):
+        rows = self.connection().execute(f'SELECT {", ".join(self.USER_FIELDS)} FROM users WHERE report_id = ? ORDER BY id',
+                                         (report_id,))
+        return [dict(row) for row in rows]
+    
+    def add_email_delivery(self, report_id, email):
+        """Record a queued report email; returns its delivery ID"""
+        now = time.time()
+        with self.connection() as connection:
+            cursor = connection.execute("INSERT INTO email_deliveries (report_id, email, status, created_at, updated_at) "
+                                        "VALUES (?, ?, 'queued', ?, ?)", (report_id, email, now, now))
+            return cursor.lastrowid
+    
+    def get_email_delivery(self, delivery_id):
+        row = self.connection().execute('SELECT * FROM email_deliveries WHERE id = ?', (delivery_id,)).fetchone()
+        return dict(row) if row else None
+    
+    def update_email_delivery(self, delivery_id, status, attempts, error=None):
+        """status is queued (waiting for a retry), sent or failed; error is the last failure"""
+        with self.connection() as connection:
+            connection.execute('UPDATE email_deliveries SET status = ?, attempts = ?, last_error = ?, updated_at = ? WHERE id = ?',
+                               (status, attempts, error, time.time(), delivery_id))
+    
+    def queued_email_deliveries(self):
+        rows = self.connection().execute("SELECT id, attempts FROM email_deliveries WHERE status = 'queued' ORDER BY id")
+        return [dict(row) for row in rows]
+    
+    def email_delivery_counts(self):
+        rows = self.connection().execute('SELECT status, COUNT(*) FROM email_deliveries GROUP BY status')
+        return {status: count for status, count in rows}
+    
+    def migrate_user_file(self, path):
+        """One-time import of the old user_database.json into the users table.
+        The import and its migrations row commit together, so a rerun never imports twice;
+        the file is then renamed to PATH.migrated. Malformed entries are skipped and counted"""
+        if not os.path.exists(path):
+            return
+        with self.connection() as connection:
+            if connection.execute("SELECT 1 FROM migrations WHERE name = 'user_database_json'").fetchone():
+                return
+            try:
+                with open(path, 'r') as f:
+                    users = json.load(f)
+            except (OSError, ValueError) as error:
+                print(f'User database migration skipped: {error}', file=sys.stderr)
+                return
+            if not isinstance(users, list):
+                print(f'User database migration skipped: {path} does not hold a list of users', file=sys.stderr)
+                return
+            migrated = skipped = 0
+            for user in users:
+                row = tuple(user.get(field, '') for field in self.USER_FIELDS) if isinstance(user, dict) else None
+                try:
+                    if row is None:
+                        raise ValueError('not an object')
+                    connection.execute('INSERT INTO users (email, url, report_id, score, timestamp, date) VALUES (?, ?, ?, ?, ?, ?)',
+                                       row)
+                    migrated += 1
+                except (ValueError, sqlite3.Error) as error:
+                    # e.g. "email": null, or a nested object where a string belongs
+                    skipped += 1
+                    print(f'User database migration: skipped entry {migrated + skipped - 1}: {error}', file=sys.stderr)
+            connection.execute("INSERT INTO migrations VALUES ('user_database_json', ?)", (datetime.now().isoformat(),))
+        try:
+            os.replace(path, path + '.migrated')
+        except OSError:
+            pass
+        print(f'✅ Migrated {migrated} users from {path}' + (f' ({skipped} malformed entries skipped)' if skipped else ''),
+              flush=True)
+
+# The repository and email queue are built by open_storage() when the server starts, so importing
+# this module (e.g. for the audit CLI) creates no database and migrates no files
+report_repository = None
+
+# Concurrency limits (override with SERVER_WORKERS / SCAN_WORKERS environment variables)
+# Scans are capped below the worker count so static files and admin/unlock requests
+# always have free workers while slow target sites are being fetched
+SERVER_WORKERS = max(1, int(os.environ.get('SERVER_WORKERS', '32')))
+SCAN_WORKERS = max(1, min(int(os.environ.get('SCAN_WORKERS', '8')), SERVER_WORKERS - 1))
+scan_slots = threading.BoundedSemaphore(SCAN_WORKERS)
+# Async scan jobs: how many may wait in the queue, and how long finished jobs are kept
+SCAN_QUEUE_LIMIT = int(os.environ.get('SCAN_QUEUE_LIMIT', '100'))
+SCAN_JOB_TTL = int(os.environ.get('SCAN_JOB_TTL', '600'))
+# Job progress streams allowed at once: each holds an HTTP worker until its scan finishes,
+# so past the limit the page polls the job status instead
+SCAN_STREAM_LIMIT = max(0, int(os.environ.get('SCAN_STREAM_LIMIT', str(SERVER_WORKERS // 4))))
+scan_stream_slots = threading.BoundedSemaphore(SCAN_STREAM_LIMIT)
+# Audit result cache: seconds a result stays fresh (0 disables) and how many URLs to keep
+AUDIT_CACHE_TTL = int(os.environ.get('AUDIT_CACHE_TTL', '900'))
+AUDIT_CACHE_SIZE = int(os.environ.get('AUDIT_CACHE_SIZE', '500'))
+# Batch scans: URLs accepted per request, scans a batch runs at once, and scans allowed per host
+BATCH_MAX_URLS = int(os.environ.get('BATCH_MAX_URLS', '500'))
+BATCH_CONCURRENCY = max(1, int(os.environ.get('BATCH_CONCURRENCY', '4')))
+BATCH_PER_HOST = max(1, int(os.environ.get('BATCH_PER_HOST', '2')))
+# Batch scans run on their own slots, so batches can't use up the slots interactive /api/scan needs
+BATCH_SCAN_WORKERS = max(1, int(os.environ.get('BATCH_SCAN_WORKERS', str(max(1, SCAN_WORKERS // 2)))))
+batch_scan_slots = threading.BoundedSemaphore(BATCH_SCAN_WORKERS)
+# Batch requests streamed at once: each holds an HTTP worker until its last URL is scanned
+BATCH_REQUEST_LIMIT = max(0, int(os.environ.get('BATCH_REQUEST_LIMIT', '2')))
+batch_request_slots = threading.BoundedSemaphore(BATCH_REQUEST_LIMIT)
+# Crawl mode: deepest link depth and most pages a scan may request, total seconds per crawl,
+# and pages fetched at once
+CRAWL_MAX_DEPTH = max(1, int(os.environ.get('CRAWL_MAX_DEPTH', '2')))
+CRAWL_MAX_PAGES = max(1, int(os.environ.get('CRAWL_MAX_PAGES', '8')))
+CRAWL_DEADLINE = float(os.environ.get('CRAWL_DEADLINE', '30'))
+CRAWL_CONCURRENCY = max(1, int(os.environ.get('CRAWL_CONCURRENCY', '4')))
+crawl_executor = ThreadPoolExecutor(max_workers=CRAWL_CONCURRENCY * SCAN_WORKERS, thread_name_prefix='crawl-worker')
+# Admin feed: most scans returned per page or event, and live admin streams allowed at once
+ADMIN_SCANS_PAGE_LIMIT = 500
+ADMIN_STREAM_LIMIT = max(0, int(os.environ.get('ADMIN_STREAM_LIMIT', '4')))
+admin_stream_slots = threading.BoundedSemaphore(ADMIN_STREAM_LIMIT)
+
+class ServerBusyError(Exception):
+    """Raised when every scan slot is taken and the caller can't wait"""
+
+def normalize_url(url):
+    """Normalize a URL for use as a cache key (case-insensitive scheme/host, no default port or fragment)"""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    port = parsed.port
+    if port and not (scheme == 'http' and port == 80) and not (scheme == 'https' and port == 443):
+        host = f'{host}:{port}'
+    path = parsed.path or '/'
+    query = f'?{parsed.query}' if parsed.query else ''
+    return f'{scheme}://{host}{path}{query}'
+
+class AuditCache:
+    """Thread-safe LRU cache of audit results with a TTL and hit/miss counters"""
+    def __init__(self, ttl=AUDIT_CACHE_TTL, max_entries=AUDIT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (stored_at, value)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and time.time() - entry[0] < self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self.entries[key]  # Expired
+            self.misses += 1
+            return None
+    
+    def put(self, key, value):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.time(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'maxEntries': self.max_entries,
+                'ttlSeconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': round(self.hits / lookups, 3) if lookups else 0
+            }
 
-# In-memory storage for reports and payments (in production, use a database)
-reports_store = {}
-payments_store = {}
-admin_scans = []  # Store all scans for admin view
+audit_cache = AuditCache()
 
 def transform_to_interpretation(insight, url):
     """Transform audit check into AI interpretation insight"""
@@ -745,7 +2137,7 @@ def transform_to_interpretation(insight, url):
         },
         'Crawlable by AI (Robots)': {
             'title': 'Whether AI can access your content',
-            'explanation': f'{"AI systems can fully access and interpret your website." if status == "pass" else "Your website blocks AI access, preventing proper interpretation of your content."}'
+            'explanation': 'AI systems can fully access and interpret your website.' if status == 'pass' else 'Your robots.txt blocks some AI crawlers, so those assistants can\'t read your content.' if status == 'warning' else 'Your website blocks AI access, preventing proper interpretation of your content.'
         },
         'HTML Language Attribute': {
             'title': 'How AI identifies your content language',
@@ -928,7 +2320,7 @@ def generate_interpretive_summary(score):
     else:
         return "AI agents struggle to identify and understand your establishment, making you nearly invisible in food discovery searches and recommendations."
 
-def generate_review_recommendations(parser, url, html):
+def generate_review_recommendations(parser, url):
     """Generate recommendations based on review analysis and common restaurant review patterns"""
     recommendations = []
     
@@ -982,10 +2374,9 @@ def generate_review_recommendations(parser, url, html):
         })
     
     # Recommendation 4: Common Review Themes (Based on typical restaurant feedback)
-    html_lower = html.lower()
     
     # Check for common positive mentions
-    if 'wait' in html_lower or 'slow' in html_lower or 'time' in html_lower:
+    if parser.wait_time_mentions:
         recommendations.append({
             'category': 'Service Optimization',
             'priority': 'Medium',
@@ -1062,33 +2453,8 @@ def generate_review_recommendations(parser, url, html):
 def save_user_to_database(email, url, report_id, score):
     """Save user email to database for future purposes"""
     try:
-        db_file = 'user_database.json'
-        users = []
-        
-        # Load existing users
-        if os.path.exists(db_file):
-            try:
-                with open(db_file, 'r') as f:
-                    users = json.load(f)
-            except:
-                users = []
-        
-        # Add new user
-        user_entry = {
-            'email': email,
-            'url': url,
-            'report_id': report_id,
-            'score': score,
-            'timestamp': datetime.now().isoformat(),
-            'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        users.append(user_entry)
-        
-        # Save back to file
-        with open(db_file, 'w') as f:
-            json.dump(users, f, indent=2)
-        
+        # An indexed insert, instead of rewriting a JSON file of every user
+        report_repository.add_user(email, url, report_id, score)
         print(f"✅ User saved to database: {email}", flush=True)
         return True
     except Exception as e:
@@ -1096,29 +2462,49 @@ def save_user_to_database(email, url, report_id, score):
         return False
 
 def send_email_report(email, url, report_data, report_id):
-    """Send full report via email with PDF attachment"""
+    """Save the user and queue the full report email; the email worker renders and sends it.
+    Returns True once the email is queued"""
     try:
         # Save user to database
         save_user_to_database(email, url, report_id, report_data['score'])
-        
-        # Get SMTP settings from environment variables or use defaults
-        smtp_server = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
-        smtp_port = int(os.environ.get('SMTP_PORT', '587'))
-        smtp_user = os.environ.get('SMTP_USER', '')
-        smtp_password = os.environ.get('SMTP_PASSWORD', '')
-        from_email = os.environ.get('FROM_EMAIL', smtp_user)
-        
-        # Generate PDF HTML content
-        pdf_html = generate_email_pdf_html(report_id, url, report_data)
-        
-        # Create email message
-        msg = MIMEMultipart()
-        msg['From'] = from_email
-        msg['To'] = email
-        msg['Subject'] = f'AI Website Audit Report for {url}'
-        
-        # Email body
-        body_text = f"""
+        email_queue.enqueue(report_id, email)
+        return True
+    except Exception as e:
+        print(f"Email error: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        return False
+
+def smtp_settings():
+    """SMTP settings from environment variables or defaults.
+    Emails are sent when SMTP_USER/SMTP_PASSWORD are set, or with SMTP_LOCAL_TEST_SERVER=1
+    (no login, no STARTTLS unless SMTP_STARTTLS=1); otherwise they're saved to files"""
+    smtp_user = os.environ.get('SMTP_USER', '')
+    smtp_password = os.environ.get('SMTP_PASSWORD', '')
+    local_test_server = os.environ.get('SMTP_LOCAL_TEST_SERVER', '0').lower() in ('1', 'true', 'yes')
+    return {
+        'server': os.environ.get('SMTP_SERVER', 'smtp.gmail.com'),
+        'port': int(os.environ.get('SMTP_PORT', '587')),
+        'user': smtp_user,
+        'password': smtp_password,
+        'from_email': os.environ.get('FROM_EMAIL', smtp_user) or 'audit@localhost',  # A local server needs no account
+        'starttls': os.environ.get('SMTP_STARTTLS', '0' if local_test_server else '1').lower() not in ('0', 'false', 'no'),
+        'enabled': bool(smtp_user and smtp_password) or local_test_server
+    }
+
+def build_report_email(email, url, report_data, report_id, from_email):
+    """The report email with its HTML report attached; returns (message, body text, report HTML)"""
+    # Generate PDF HTML content
+    pdf_html = generate_email_pdf_html(report_id, url, report_data)
+    
+    # Create email message
+    msg = MIMEMultipart()
+    msg['From'] = from_email
+    msg['To'] = email
+    msg['Subject'] = f'AI Website Audit Report for {url}'
+    
+    # Email body
+    body_text = f"""
 Hello!
 
 Thank you for using our AI Website Audit service.
@@ -1130,52 +2516,228 @@ Please find your complete audit report attached as an HTML file that you can sav
 Best regards,
 AI Website Audit Team
 """
-        msg.attach(MIMEText(body_text, 'plain'))
-        
-        # Attach PDF HTML as file
-        attachment = MIMEBase('application', 'octet-stream')
-        attachment.set_payload(pdf_html.encode('utf-8'))
-        encoders.encode_base64(attachment)
-        attachment.add_header(
-            'Content-Disposition',
-            f'attachment; filename= "AI_Audit_Report_{url.replace("https://", "").replace("http://", "").replace("/", "_")}.html"'
-        )
-        msg.attach(attachment)
-        
-        # Send email if SMTP credentials are configured
-        if smtp_user and smtp_password:
+    msg.attach(MIMEText(body_text, 'plain'))
+    
+    # Attach PDF HTML as file
+    attachment = MIMEBase('application', 'octet-stream')
+    attachment.set_payload(pdf_html.encode('utf-8'))
+    encoders.encode_base64(attachment)
+    attachment.add_header(
+        'Content-Disposition',
+        f'attachment; filename= "AI_Audit_Report_{url.replace("https://", "").replace("http://", "").replace("/", "_")}.html"'
+    )
+    msg.attach(attachment)
+    return msg, body_text, pdf_html
+
+def save_email_to_file(email, msg, body_text, pdf_html, from_email):
+    """If no SMTP is configured, save the email to a file for manual sending"""
+    email_file = f"emails_to_send/email_{int(time.time())}_{email.replace('@', '_at_')}.eml"
+    os.makedirs('emails_to_send', exist_ok=True)
+    with open(email_file, 'w') as f:
+        f.write(f"To: {email}\n")
+        f.write(f"Subject: {msg['Subject']}\n")
+        f.write(f"From: {from_email}\n\n")
+        f.write(body_text)
+        f.write(f"\n\n--- PDF Report HTML ---\n{pdf_html}")
+    print(f"⚠️ SMTP not configured. Email saved to {email_file}", flush=True)
+    print(f"💡 To enable email sending, set environment variables:", flush=True)
+    print(f"   SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, FROM_EMAIL", flush=True)
+    print("   (or SMTP_LOCAL_TEST_SERVER=1 with SMTP_SERVER/SMTP_PORT for a local test server)", flush=True)
+
+# Report email delivery: messages sent per batch over one connection, attempts before a delivery
+# is marked failed, and the first retry delay in seconds (doubled after each failure)
+EMAIL_BATCH_SIZE = max(1, int(os.environ.get('EMAIL_BATCH_SIZE', '20')))
+EMAIL_MAX_ATTEMPTS = max(1, int(os.environ.get('EMAIL_MAX_ATTEMPTS', '5')))
+EMAIL_RETRY_DELAY = float(os.environ.get('EMAIL_RETRY_DELAY', '30'))
+# Seconds the warm SMTP connection may sit idle before it is closed
+SMTP_IDLE_TIMEOUT = 60
+
+class EmailDeliveryQueue:
+    """Sends report emails on a background thread so payment requests don't wait on SMTP.
+    The worker keeps one authenticated SMTP connection open across sends, takes up to
+    EMAIL_BATCH_SIZE queued emails at a time and retries failures with exponential backoff.
+    Deliveries are recorded in the report database: queued ones are resumed after a restart
+    and failed ones keep their last error"""
+    def __init__(self, batch_size=EMAIL_BATCH_SIZE, max_attempts=EMAIL_MAX_ATTEMPTS, retry_delay=EMAIL_RETRY_DELAY):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.jobs = queue.Queue()  # (delivery ID, attempts so far)
+        self.retries = []  # Heap of (due time, delivery ID, attempts so far); worker thread only
+        self.smtp = None
+        self.smtp_last_used = 0
+        self.thread = None
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.connections_opened = 0
+    
+    def start(self):
+        """Start the worker (once) and requeue deliveries left over from the last run"""
+        with self.lock:
+            if self.thread:
+                return
+            for delivery in report_repository.queued_email_deliveries():
+                self.jobs.put((delivery['id'], delivery['attempts']))
+            self.thread = threading.Thread(target=self.run, name='email-worker', daemon=True)
+            self.thread.start()
+    
+    def enqueue(self, report_id, email):
+        self.start()
+        self.jobs.put((report_repository.add_email_delivery(report_id, email), 0))
+    
+    def run(self):
+        while not self.stopping.is_set():
+            try:
+                batch = self.next_batch()
+                if batch:
+                    self.deliver(batch)
+                elif self.smtp and time.time() - self.smtp_last_used > SMTP_IDLE_TIMEOUT:
+                    self.close_smtp()
+            except Exception as error:
+                # Keep the worker alive; otherwise every later email would wait for a restart
+                print(f'⚠️ Email worker error: {error}', file=sys.stderr)
+                self.close_smtp()
+                self.stopping.wait(1)
+        self.close_smtp()
+    
+    def next_batch(self):
+        """Up to batch_size deliveries: retries that are due first, then newly queued ones"""
+        batch = []
+        now = time.time()
+        while self.retries and self.retries[0][0] <= now and len(batch) < self.batch_size:
+            _, delivery_id, attempts = heapq.heappop(self.retries)
+            batch.append((delivery_id, attempts))
+        try:
+            if not batch:
+                # Wake up for the next retry, the stop flag, or the idle connection
+                timeout = min(1.0, max(0.0, self.retries[0][0] - now)) if self.retries else 1.0
+                batch.append(self.jobs.get(timeout=timeout))
+            while len(batch) < self.batch_size:
+                batch.append(self.jobs.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+    
+    def deliver(self, batch):
+        for delivery_id, attempts in batch:
             try:
-                server = smtplib.SMTP(smtp_server, smtp_port)
-                server.starttls()
-                server.login(smtp_user, smtp_password)
-                server.send_message(msg)
-                server.quit()
+                self.deliver_one(delivery_id, attempts)
+            except Exception as error:
+                # Not a send failure (e.g. the database is locked): the rest of the batch still goes out,
+                # and this delivery is tried again later (it stays queued in the database meanwhile)
+                print(f'⚠️ Email delivery {delivery_id} hit an error: {error}', file=sys.stderr)
+                if attempts + 1 < self.max_attempts:
+                    heapq.heappush(self.retries, (time.time() + self.retry_delay * 2 ** attempts, delivery_id, attempts + 1))
+                    continue
+                # Out of attempts: record the failure, or the delivery is requeued on every restart
+                self.failed += 1
+                try:
+                    report_repository.update_email_delivery(delivery_id, 'failed', attempts + 1, str(error))
+                except Exception as update_error:
+                    print(f'⚠️ Email delivery {delivery_id} could not be marked failed: {update_error}', file=sys.stderr)
+    
+    def deliver_one(self, delivery_id, attempts):
+        delivery = report_repository.get_email_delivery(delivery_id)
+        if delivery is None:
+            self.failed += 1
+            print(f'⚠️ Email delivery {delivery_id} no longer exists; skipped', file=sys.stderr)
+            return
+        report = report_repository.get_report(delivery['report_id'])
+        if report is None:
+            # e.g. purged before the email went out: record why instead of leaving it queued forever
+            self.failed += 1
+            report_repository.update_email_delivery(delivery_id, 'failed', attempts, 'Report no longer exists')
+            print(f"⚠️ Email to {delivery['email']} not sent: report {delivery['report_id']} no longer exists", file=sys.stderr)
+            return
+        attempts += 1
+        try:
+            self.send(delivery['email'], report['url'], report['full_report'], delivery['report_id'])
+        except Exception as error:
+            self.close_smtp()  # Reconnect for the next message
+            if attempts >= self.max_attempts:
+                self.failed += 1
+                report_repository.update_email_delivery(delivery_id, 'failed', attempts, str(error))
+                print(f"⚠️ Email to {delivery['email']} failed after {attempts} attempts: {error}", file=sys.stderr)
+            else:
+                self.retried += 1
+                report_repository.update_email_delivery(delivery_id, 'queued', attempts, str(error))
+                due = time.time() + self.retry_delay * 2 ** (attempts - 1)
+                heapq.heappush(self.retries, (due, delivery_id, attempts))
+                print(f"⚠️ SMTP error sending to {delivery['email']} (attempt {attempts}, will retry): {error}", file=sys.stderr)
+            return
+        self.sent += 1
+        report_repository.update_email_delivery(delivery_id, 'sent', attempts)
+    
+    def send(self, email, url, report_data, report_id):
+        settings = smtp_settings()
+        msg, body_text, pdf_html = build_report_email(email, url, report_data, report_id, settings['from_email'])
+        if not settings['enabled']:
+            save_email_to_file(email, msg, body_text, pdf_html, settings['from_email'])
+            return
+        for attempt in range(2):
+            smtp = self.smtp_connection(settings)
+            try:
+                smtp.send_message(msg)
+                self.smtp_last_used = time.time()
                 print(f"✅ Email sent successfully to {email}", flush=True)
-                return True
-            except Exception as e:
-                print(f"⚠️ SMTP error (email saved to database): {e}", file=sys.stderr)
-                # Still return True because user is saved to database
-                return True
-        else:
-            # If no SMTP configured, save email to file for manual sending
-            email_file = f"emails_to_send/email_{int(time.time())}_{email.replace('@', '_at_')}.eml"
-            os.makedirs('emails_to_send', exist_ok=True)
-            with open(email_file, 'w') as f:
-                f.write(f"To: {email}\n")
-                f.write(f"Subject: {msg['Subject']}\n")
-                f.write(f"From: {from_email}\n\n")
-                f.write(body_text)
-                f.write(f"\n\n--- PDF Report HTML ---\n{pdf_html}")
-            print(f"⚠️ SMTP not configured. Email saved to {email_file}", flush=True)
-            print(f"💡 To enable email sending, set environment variables:", flush=True)
-            print(f"   SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, FROM_EMAIL", flush=True)
-            return True  # Still return True because user is saved
-        
-    except Exception as e:
-        print(f"Email error: {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc()
-        return False
+                return
+            except smtplib.SMTPServerDisconnected:
+                # The server closed the warm connection; retry once on a fresh one
+                self.close_smtp()
+                if attempt:
+                    raise
+    
+    def smtp_connection(self, settings):
+        if self.smtp is None:
+            smtp = smtplib.SMTP(settings['server'], settings['port'], timeout=30)
+            try:
+                if settings['starttls']:
+                    smtp.starttls()
+                if settings['user'] and settings['password']:
+                    smtp.login(settings['user'], settings['password'])
+            except Exception:
+                smtp.close()
+                raise
+            self.smtp = smtp
+            self.connections_opened += 1
+        return self.smtp
+    
+    def close_smtp(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except Exception:
+                self.smtp.close()
+            self.smtp = None
+    
+    def shutdown(self, timeout=10):
+        """Stop after the batch being sent; emails still queued are sent after the next start"""
+        self.stopping.set()
+        if self.thread:
+            self.thread.join(timeout)
+    
+    def stats(self):
+        return {
+            'queued': self.jobs.qsize(),
+            'waitingForRetry': len(self.retries),
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'smtpConnectionsOpened': self.connections_opened,
+            'deliveries': report_repository.email_delivery_counts()
+        }
+
+email_queue = None
+
+def open_storage():
+    """Open the report database (running migrations) and create the email queue, once"""
+    global report_repository, email_queue
+    if report_repository is None:
+        report_repository = ReportRepository()
+        email_queue = EmailDeliveryQueue()
 
 def generate_email_pdf_html(report_id, url, report_data):
     """Generate HTML content for PDF attachment"""
@@ -1265,6 +2827,479 @@ def generate_email_pdf_html(report_id, url, report_data):
     
     return html_content
 
+def audit_url(url, progress=None, early_stop=False, profile='full', crawl_depth=0, crawl_pages=CRAWL_MAX_PAGES):
+    """Fetch, score and build recommendations for a URL, returning the full audit result.
+    With crawl_depth the site's menu/contact pages are crawled too and scored together"""
+    # robots.txt and the sitemap download alongside the page (or come from the per-host cache)
+    wants_site_files = not profile_signals(profile).isdisjoint(SITE_FILE_SIGNALS)
+    if wants_site_files:
+        site_files_cache.prefetch(url)
+    crawl_report = None
+    if crawl_depth:
+        page, crawl_report = crawl_site(url, profile, crawl_depth, crawl_pages, progress, early_stop)
+    else:
+        # Fetch and parse once; scoring and recommendations share the result
+        page = fetch_and_parse(url, progress=progress, early_stop=early_stop, profile=profile)
+    if wants_site_files:
+        page = apply_site_files(page, site_files_cache.get(url))
+    audit_result = audit_page(url, page, profile, progress)
+    if crawl_report:
+        audit_result['crawl'] = crawl_report
+    return audit_result
+
+def audit_page(url, page, profile='full', progress=None):
+    """Score an already parsed page and add its review recommendations"""
+    audit_result = perform_ai_audit(url, page, profile)
+    if progress:
+        progress('scored')
+    
+    # Generate review-based recommendations
+    review_recommendations = []
+    if AUDIT_PROFILES[profile]['review_recommendations']:
+        review_recommendations = generate_review_recommendations(page.parser, url)
+        if progress:
+            progress('recommendations')
+    
+    # Add recommendations to audit result
+    audit_result['reviewRecommendations'] = review_recommendations
+    return audit_result
+
+# Parser signals a crawl needs to find the next pages, whatever the profile scores
+CRAWL_LINK_SIGNALS = frozenset(['links', 'menu_links'])
+# Internal links worth following besides menu links: contact/about/visit-us pages
+CRAWL_LINK_KEYWORDS = ('contact', 'about', 'location', 'hours', 'visit', 'find-us', 'reserv')
+# Signals that describe one page's markup; a crawled site is scored on its landing page's.
+# Every other signal is merged across pages (flags OR-ed, counts summed, lists combined)
+LANDING_PAGE_SIGNALS = frozenset(['title', 'meta_description', 'headings', 'semantic_elements', 'og_tags', 'robots_meta',
+                                  'lang_attribute', 'viewport', 'charset', 'canonical_url', 'twitter_card', 'keywords_meta',
+                                  'author_meta', 'head_closed'])
+
+class SiteSignals:
+    """Parser signals merged across a crawl's pages, read by the checks like an HTMLAuditParser"""
+    def __init__(self, parsers):
+        landing = parsers[0]
+        names = landing.signals if landing.signals is not None else [name for name in vars(landing) if not name.startswith('_')]
+        for name in names:
+            value = getattr(landing, name)
+            if not isinstance(value, (bool, int, str, list, dict)):
+                continue
+            if name in LANDING_PAGE_SIGNALS or isinstance(value, dict):
+                setattr(self, name, value)
+            elif isinstance(value, bool):
+                setattr(self, name, any(getattr(parser, name) for parser in parsers))
+            elif isinstance(value, int):
+                setattr(self, name, sum(getattr(parser, name) for parser in parsers))
+            elif isinstance(value, str):
+                setattr(self, name, value or next((getattr(parser, name) for parser in parsers if getattr(parser, name)), ''))
+            else:
+                merged = []
+                seen = set()
+                for parser in parsers:
+                    for item in getattr(parser, name):
+                        if isinstance(item, str):
+                            if item in seen:
+                                continue
+                            seen.add(item)
+                        merged.append(item)
+                setattr(self, name, merged)
+
+def crawl_links(page_url, parser, origin):
+    """Same-origin menu/contact/about links on a page, absolute and without fragments, menu links first"""
+    candidates = list(parser.menu_links)
+    candidates += [link for link in parser.links if any(keyword in link.lower() for keyword in CRAWL_LINK_KEYWORDS)]
+    found = []
+    for href in candidates:
+        if href.lower().startswith(('mailto:', 'tel:', 'javascript:', '#')):
+            continue
+        absolute = urljoin(page_url, href).split('#', 1)[0]
+        parsed = urlparse(absolute)
+        if (parsed.scheme.lower(), parsed.netloc.lower()) == origin and absolute not in found:
+            found.append(absolute)
+    return found
+
+def crawl_site(url, profile='full', max_depth=1, max_pages=CRAWL_MAX_PAGES, progress=None, early_stop=False):
+    """Fetch the landing page, then same-origin menu/contact pages breadth-first up to max_depth
+    links away, fetching each level in parallel. Stops at max_pages pages or the CRAWL_DEADLINE.
+    Returns (site PageAnalysis with merged signals, per-page report)"""
+    started = time.time()
+    deadline = started + CRAWL_DEADLINE
+    signals = profile_signals(profile) | CRAWL_LINK_SIGNALS
+    landing = fetch_and_parse(url, progress=progress, early_stop=early_stop, profile=profile,
+                              signals=signals, deadline=deadline)
+    # Same-origin is judged against where the landing page redirected to (e.g. http:// -> https://www.)
+    parsed_url = urlparse(landing.final_url)
+    origin = (parsed_url.scheme.lower(), parsed_url.netloc.lower())
+    pages = [{'url': url, 'depth': 0, 'status': 'ok', 'partial': landing.partial,
+              'elapsedMs': round((time.time() - started) * 1000)}]
+    parsers = [landing.parser]
+    visited = {normalize_url(url), normalize_url(landing.final_url)}
+    level = [(landing.final_url, landing.parser)]
+    deadline_reached = False
+    # The executor is shared by all crawls; this caps the pages this one fetches at once
+    fetch_slots = threading.Semaphore(CRAWL_CONCURRENCY)
+    
+    def fetch_page(page_url):
+        with fetch_slots:
+            page_started = time.time()
+            try:
+                page, error = fetch_and_parse(page_url, profile=profile, signals=signals, deadline=deadline), None
+            except Exception as failure:
+                page, error = None, failure
+            return page, error, round((time.time() - page_started) * 1000)
+    
+    for depth in range(1, max_depth + 1):
+        targets = []
+        for page_url, parser in level:
+            for link in crawl_links(page_url, parser, origin):
+                if len(pages) + len(targets) >= max_pages:
+                    break
+                key = normalize_url(link)
+                if key not in visited:
+                    visited.add(key)
+                    targets.append(link)
+        if not targets:
+            break
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            deadline_reached = True
+            break
+        futures = {crawl_executor.submit(fetch_page, link): link for link in targets}
+        done, not_done = wait(futures, timeout=remaining)
+        level = []
+        for future, link in futures.items():
+            if future not in done:
+                deadline_reached = True
+                future.cancel()
+                pages.append({'url': link, 'depth': depth, 'status': 'skipped', 'error': 'Crawl deadline reached'})
+                continue
+            page, error, elapsed_ms = future.result()
+            entry = {'url': link, 'depth': depth, 'elapsedMs': elapsed_ms}
+            if error:
+                entry.update(status='error', error=str(error))
+            else:
+                entry.update(status='ok', partial=page.partial)
+                parsers.append(page.parser)
+                level.append((page.final_url, page.parser))
+            pages.append(entry)
+        if deadline_reached:
+            break
+    if progress:
+        progress('crawled')
+    
+    site = PageAnalysis(url, SiteSignals(parsers), landing.partial_reason, landing.final_url)
+    report = {
+        'pages': pages,
+        'pagesScanned': len(parsers),
+        'maxDepth': max_depth,
+        'pageBudget': max_pages,
+        'deadlineReached': deadline_reached,
+        'elapsedMs': round((time.time() - started) * 1000)
+    }
+    return site, report
+
+def run_scan(url, progress=None, force_refresh=False, wait_for_slot=True, early_stop=False, profile='full',
+             crawl_depth=0, crawl_pages=CRAWL_MAX_PAGES, slots=scan_slots):
+    """Run the scan pipeline for a URL with a scan profile and return the partial (locked) report.
+    progress(stage) is called as each stage completes: fetched, parsed, (crawled,) scored, recommendations
+    (or cached when a fresh result for the URL is reused). slots is the semaphore the scan takes a slot from"""
+    cache_key = (normalize_url(url), profile, crawl_depth, crawl_pages if crawl_depth else 0)
+    audit_result = None if force_refresh else audit_cache.get(cache_key)
+    cached = audit_result is not None
+    if cached:
+        if progress:
+            progress('cached')
+    else:
+        # Don't let scans take every worker thread
+        if not slots.acquire(blocking=wait_for_slot):
+            raise ServerBusyError('The server is busy with other scans. Please try again in a few seconds.')
+        try:
+            audit_result = audit_url(url, progress, early_stop, profile, crawl_depth, crawl_pages)
+        finally:
+            slots.release()
+        # Partial results (early stop, deadline or size cap) would stand in for the whole page; don't cache them
+        if not audit_result.get('partial'):
+            audit_cache.put(cache_key, audit_result)
+    
+    # Store full report (and its row in the admin view)
+    report_id = str(uuid.uuid4())
+    report_repository.add_report(report_id, url, audit_result, audit_result['score'])
+    
+    # Transform audit checks into AI interpretation insights
+    total_checks = len(audit_result['details'])
+    score = audit_result['score']
+    
+    # Dynamic logic: Lower score = fewer free insights, Higher score = more free insights
+    # Score 0-30: Show 1-2 free insights (most locked)
+    # Score 30-50: Show 2-3 free insights
+    # Score 50-70: Show 3-4 free insights
+    # Score 70-85: Show 4-5 free insights
+    # Score 85-100: Show 5-6 free insights (least locked)
+    
+    if score <= 30:
+        free_count = 2  # Low score = fewer free insights
+    elif score <= 50:
+        free_count = 3
+    elif score <= 70:
+        free_count = 4
+    elif score <= 85:
+        free_count = 5
+    else:  # score > 85
+        free_count = 6  # High score = more free insights
+    
+    # Filter to get only passing insights (green) for "What AI Currently Understands"
+    passing_insights = [insight for insight in audit_result['details'] if insight.get('status') == 'pass']
+    other_insights = [insight for insight in audit_result['details'] if insight.get('status') != 'pass']
+    
+    # Ensure we don't exceed available passing insights
+    actual_free_count = min(free_count, len(passing_insights))
+    
+    # Return dynamic number of free insights (only passing ones)
+    free_insights = passing_insights[:actual_free_count]
+    
+    # Combine remaining passing insights with all non-passing insights for locked section
+    remaining_passing = passing_insights[actual_free_count:] if len(passing_insights) > actual_free_count else []
+    locked_insights = remaining_passing + other_insights
+    
+    # Transform insights to interpretation-focused language
+    free_insights_transformed = [transform_to_interpretation(insight, url) for insight in free_insights]
+    locked_insights_transformed = [transform_to_locked_insight(insight, url) for insight in locked_insights]
+    
+    # Generate interpretive summary based on score
+    summary = generate_interpretive_summary(audit_result['score'])
+    
+    partial_report = {
+        'score': audit_result['score'],
+        'summary': summary,
+        'freeInsights': free_insights_transformed,
+        'lockedInsights': locked_insights_transformed,
+        'totalInsights': total_checks,
+        'reportId': report_id,
+        'locked': True,
+        'reviewRecommendations': audit_result.get('reviewRecommendations', []),
+        'cached': cached,
+        'profile': profile,
+        'partial': audit_result.get('partial', False),
+        'partialReason': audit_result.get('partialReason'),
+        'crawl': audit_result.get('crawl'),
+        'crawlerAccess': audit_result.get('crawlerAccess')
+    }
+    
+    return partial_report
+
+class ScanJob:
+    """An asynchronous scan and the progress events it has produced so far"""
+    def __init__(self, url, force_refresh=False, early_stop=False, profile='full', crawl_depth=0, crawl_pages=CRAWL_MAX_PAGES):
+        self.id = str(uuid.uuid4())
+        self.url = url
+        self.force_refresh = force_refresh
+        self.early_stop = early_stop
+        self.profile = profile
+        self.crawl_depth = crawl_depth
+        self.crawl_pages = crawl_pages
+        self.status = 'queued'  # queued, running, done, error
+        self.progress = []
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.changed = threading.Condition()
+    
+    def add_progress(self, stage):
+        with self.changed:
+            self.progress.append({'stage': stage, 'timestamp': datetime.now().isoformat()})
+            self.changed.notify_all()
+    
+    def set_status(self, status, result=None, error=None):
+        with self.changed:
+            self.status = status
+            self.result = result
+            self.error = error
+            if status in ('done', 'error'):
+                self.finished = time.time()
+            self.changed.notify_all()
+    
+    def is_finished(self):
+        return self.status in ('done', 'error')
+    
+    def to_dict(self):
+        job_dict = {
+            'jobId': self.id,
+            'url': self.url,
+            'status': self.status,
+            'progress': list(self.progress),
+            'statusUrl': f'/api/scan/jobs/{self.id}',
+            'eventsUrl': f'/api/scan/jobs/{self.id}/events'
+        }
+        if self.status == 'done':
+            job_dict['result'] = self.result
+        elif self.status == 'error':
+            job_dict['error'] = self.error
+        return job_dict
+
+class ScanJobManager:
+    """Runs scan jobs on a worker pool and keeps their state for polling"""
+    def __init__(self, max_workers=SCAN_WORKERS, queue_limit=SCAN_QUEUE_LIMIT, job_ttl=SCAN_JOB_TTL):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scan-worker')
+        self.queue_limit = queue_limit
+        self.job_ttl = job_ttl
+        self.jobs = {}
+        self.lock = threading.Lock()
+    
+    def submit(self, url, force_refresh=False, early_stop=False, profile='full', crawl_depth=0, crawl_pages=CRAWL_MAX_PAGES):
+        """Queue a scan, or return None when the queue is full"""
+        with self.lock:
+            self.prune()
+            pending = sum(1 for job in self.jobs.values() if not job.is_finished())
+            if pending >= self.queue_limit:
+                return None
+            job = ScanJob(url, force_refresh, early_stop, profile, crawl_depth, crawl_pages)
+            self.jobs[job.id] = job
+        self.executor.submit(self.run_job, job)
+        return job
+    
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+    
+    def prune(self):
+        """Forget finished jobs older than the TTL (caller holds the lock)"""
+        cutoff = time.time() - self.job_ttl
+        expired = [job_id for job_id, job in self.jobs.items() if job.finished and job.finished < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
+    
+    def shutdown(self):
+        """Let queued and running jobs finish"""
+        self.executor.shutdown(wait=True)
+    
+    def run_job(self, job):
+        job.set_status('running')
+        try:
+            # This pool is separate from the HTTP workers, so it can wait for a scan slot
+            result = run_scan(job.url, progress=job.add_progress, force_refresh=job.force_refresh,
+                              early_stop=job.early_stop, profile=job.profile,
+                              crawl_depth=job.crawl_depth, crawl_pages=job.crawl_pages)
+            job.set_status('done', result=result)
+        except Exception as error:
+            print(f'Error in scan job {job.id}: {error}', file=sys.stderr)
+            job.set_status('error', error=str(error) if str(error) else 'An error occurred while scanning the website')
+
+scan_jobs = ScanJobManager()
+
+class HostLimiter:
+    """Counts in-flight scans per host so batches don't hammer one site or CDN"""
+    def __init__(self, per_host=BATCH_PER_HOST):
+        self.per_host = per_host
+        self.in_flight = {}
+        self.lock = threading.Lock()
+    
+    def try_acquire(self, host):
+        with self.lock:
+            if self.in_flight.get(host, 0) >= self.per_host:
+                return False
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            return True
+    
+    def release(self, host):
+        with self.lock:
+            self.in_flight[host] -= 1
+            if not self.in_flight[host]:
+                del self.in_flight[host]
+
+# Shared by every batch, so concurrent batches also respect the per-host limit
+batch_host_limiter = HostLimiter()
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_SCAN_WORKERS, thread_name_prefix='batch-worker')
+
+def crawl_options(data):
+    """(crawl_depth, crawl_pages) from a scan request body: depth 0 unless "crawl" is set,
+    both clamped to CRAWL_MAX_DEPTH / CRAWL_MAX_PAGES. Raises ValueError for non-numbers"""
+    if not data.get('crawl'):
+        return 0, CRAWL_MAX_PAGES
+    depth = max(1, min(int(data.get('crawl_depth') or 1), CRAWL_MAX_DEPTH))
+    pages = max(1, min(int(data.get('crawl_pages') or CRAWL_MAX_PAGES), CRAWL_MAX_PAGES))
+    return depth, pages
+
+def validate_scan_url(url):
+    """Return an error message for a URL that can't be scanned, or None"""
+    if not url or not isinstance(url, str):
+        return 'URL is required'
+    try:
+        parsed = urlparse(url)
+        if not parsed.scheme or not parsed.scheme.startswith('http'):
+            return 'URL must use http or https protocol'
+    except Exception:
+        return 'Invalid URL format'
+    return None
+
+def run_batch_scan(urls, force_refresh=False, profile='full', concurrency=BATCH_CONCURRENCY,
+                   crawl_depth=0, crawl_pages=CRAWL_MAX_PAGES):
+    """Scan a list of URLs, at most `concurrency` at a time and BATCH_PER_HOST per host.
+    Yields a result dict per URL as each finishes (in completion order), then a summary"""
+    started = time.time()
+    results = queue.Queue()
+    pending = deque(enumerate(urls))
+    running = 0
+    scores = []
+    failures = []
+    
+    def scan(index, url, host):
+        try:
+            report = run_scan(url, force_refresh=force_refresh, profile=profile,
+                              crawl_depth=crawl_depth, crawl_pages=crawl_pages, slots=batch_scan_slots)
+            results.put({'type': 'result', 'index': index, 'url': url, 'status': 'ok', 'report': report})
+        except Exception as error:
+            results.put({'type': 'result', 'index': index, 'url': url, 'status': 'error',
+                         'error': str(error) if str(error) else 'An error occurred while scanning the website'})
+        finally:
+            batch_host_limiter.release(host)
+    
+    while pending or running:
+        # Start every waiting URL whose host has room, up to the batch's concurrency
+        deferred = deque()
+        while pending and running < concurrency:
+            index, url = pending.popleft()
+            error = validate_scan_url(url)
+            if error:
+                results.put({'type': 'result', 'index': index, 'url': url, 'status': 'error', 'error': error})
+                running += 1  # Collected below like any other result
+                continue
+            host = urlparse(url).hostname or ''
+            if batch_host_limiter.try_acquire(host):
+                batch_executor.submit(scan, index, url, host)
+                running += 1
+            else:
+                deferred.append((index, url))
+        pending.extendleft(reversed(deferred))
+        try:
+            # Wake up now and then even with nothing running here: another batch may free a host
+            result = results.get(timeout=0.5 if running == 0 else None)
+        except queue.Empty:
+            continue
+        running -= 1
+        if result['status'] == 'ok':
+            scores.append(result['report']['score'])
+        else:
+            failures.append({'index': result['index'], 'url': result['url'], 'error': result['error']})
+        yield result
+    
+    # Same bands as generate_interpretive_summary
+    distribution = {'0-39': 0, '40-59': 0, '60-79': 0, '80-100': 0}
+    for score in scores:
+        band = '80-100' if score >= 80 else ('60-79' if score >= 60 else ('40-59' if score >= 40 else '0-39'))
+        distribution[band] += 1
+    yield {
+        'type': 'summary',
+        'total': len(urls),
+        'succeeded': len(scores),
+        'failed': len(failures),
+        'averageScore': round(sum(scores) / len(scores)) if scores else None,
+        'minScore': min(scores) if scores else None,
+        'maxScore': max(scores) if scores else None,
+        'scoreDistribution': distribution,
+        'failures': failures,
+        'durationMs': round((time.time() - started) * 1000)
+    }
+
 class RequestHandler(BaseHTTPRequestHandler):
     """HTTP request handler"""
     
@@ -1294,6 +3329,14 @@ class RequestHandler(BaseHTTPRequestHandler):
             self.handle_pdf_download(path)
         elif path == '/api/admin/scans':
             self.handle_admin_scans()
+        elif path == '/api/admin/scans/stream':
+            self.handle_admin_scans_stream()
+        elif path == '/api/admin/stats':
+            self.handle_admin_stats()
+        elif path.startswith('/api/scan/jobs/') and path.endswith('/events'):
+            self.handle_scan_job_events(path)
+        elif path.startswith('/api/scan/jobs/'):
+            self.handle_scan_job_status(path)
         elif path.endswith('.html'):
             # Serve any other HTML file
             filename = path.lstrip('/')
@@ -1320,6 +3363,8 @@ class RequestHandler(BaseHTTPRequestHandler):
         """Handle API requests"""
         if self.path == '/api/scan':
             self.handle_scan()
+        elif self.path == '/api/scan/batch':
+            self.handle_scan_batch()
         elif self.path == '/api/payment':
             self.handle_payment()
         elif self.path == '/api/unlock':
@@ -1349,142 +3394,44 @@ class RequestHandler(BaseHTTPRequestHandler):
             content_length = int(self.headers.get('Content-Length', 0))
             post_data = self.rfile.read(content_length)
             data = json.loads(post_data.decode('utf-8'))
+            if not isinstance(data, dict):
+                self.send_json_response({'error': 'Request body must be a JSON object'}, 400)
+                return
             url = data.get('url')
             
-            if not url:
-                self.send_json_response({'error': 'URL is required'}, 400)
+            # Validate URL
+            url_error = validate_scan_url(url)
+            if url_error:
+                self.send_json_response({'error': url_error}, 400)
                 return
             
-            # Validate URL
+            force_refresh = bool(data.get('force_refresh'))
+            early_stop = bool(data.get('early_stop'))
+            profile = data.get('profile') or 'full'
+            if profile not in AUDIT_PROFILES:
+                self.send_json_response({'error': f'Unknown scan profile. Use one of: {", ".join(AUDIT_PROFILES)}'}, 400)
+                return
             try:
-                parsed = urlparse(url)
-                if not parsed.scheme or not parsed.scheme.startswith('http'):
-                    self.send_json_response({'error': 'URL must use http or https protocol'}, 400)
-                    return
-            except Exception:
-                self.send_json_response({'error': 'Invalid URL format'}, 400)
+                crawl_depth, crawl_pages = crawl_options(data)
+            except (TypeError, ValueError):
+                self.send_json_response({'error': 'crawl_depth and crawl_pages must be numbers'}, 400)
                 return
             
-            audit_result = perform_ai_audit(url)
+            if data.get('async'):
+                # Job mode: return at once and let the client poll or stream progress
+                job = scan_jobs.submit(url, force_refresh, early_stop, profile, crawl_depth, crawl_pages)
+                if not job:
+                    self.send_json_response({'error': 'Too many scans are queued. Please try again in a few seconds.'}, 503)
+                    return
+                self.send_json_response(job.to_dict(), 202)
+                return
             
-            # Generate review-based recommendations
-            # Fetch HTML again to analyze for recommendations
             try:
-                ssl_context = ssl._create_unverified_context()
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.5'
-                }
-                req = urllib.request.Request(url, headers=headers)
-                try:
-                    response = urllib.request.urlopen(req, timeout=10, context=ssl_context)
-                except urllib.error.HTTPError as e:
-                    if e.code == 403:
-                        simple_headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'}
-                        req = urllib.request.Request(url, headers=simple_headers)
-                        response = urllib.request.urlopen(req, timeout=10, context=ssl_context)
-                    else:
-                        raise
-                html = response.read().decode('utf-8', errors='ignore')
-                
-                # Parse again to get parser data for recommendations
-                parser = HTMLAuditParser()
-                parser.feed(html)
-                
-                # Check for review widgets
-                review_widgets_found = []
-                if 'google' in html.lower() and ('review' in html.lower() or 'rating' in html.lower()):
-                    if 'maps/embed' in html.lower() or 'place_id' in html.lower():
-                        review_widgets_found.append('Google Reviews Widget')
-                if 'tripadvisor' in html.lower():
-                    review_widgets_found.append('TripAdvisor Widget')
-                if 'yelp' in html.lower() and 'review' in html.lower():
-                    review_widgets_found.append('Yelp Widget')
-                parser.review_widgets = review_widgets_found
-                
-                review_recommendations = generate_review_recommendations(parser, url, html)
-            except Exception as e:
-                # If we can't fetch again, generate basic recommendations
-                print(f'Warning: Could not generate review recommendations: {e}', flush=True)
-                parser = HTMLAuditParser()
-                review_recommendations = generate_review_recommendations(parser, url, '')
-            
-            # Add recommendations to audit result
-            audit_result['reviewRecommendations'] = review_recommendations
-            
-            # Store full report
-            report_id = str(uuid.uuid4())
-            timestamp = datetime.now().isoformat()
-            reports_store[report_id] = {
-                'url': url,
-                'full_report': audit_result,
-                'timestamp': time.time(),
-                'timestamp_iso': timestamp
-            }
-            
-            # Store for admin view
-            admin_scans.append({
-                'report_id': report_id,
-                'url': url,
-                'score': audit_result['score'],
-                'timestamp': timestamp,
-                'payment_status': 'free'
-            })
-            
-            # Transform audit checks into AI interpretation insights
-            total_checks = len(audit_result['details'])
-            score = audit_result['score']
-            
-            # Dynamic logic: Lower score = fewer free insights, Higher score = more free insights
-            # Score 0-30: Show 1-2 free insights (most locked)
-            # Score 30-50: Show 2-3 free insights
-            # Score 50-70: Show 3-4 free insights
-            # Score 70-85: Show 4-5 free insights
-            # Score 85-100: Show 5-6 free insights (least locked)
-            
-            if score <= 30:
-                free_count = 2  # Low score = fewer free insights
-            elif score <= 50:
-                free_count = 3
-            elif score <= 70:
-                free_count = 4
-            elif score <= 85:
-                free_count = 5
-            else:  # score > 85
-                free_count = 6  # High score = more free insights
-            
-            # Filter to get only passing insights (green) for "What AI Currently Understands"
-            passing_insights = [insight for insight in audit_result['details'] if insight.get('status') == 'pass']
-            other_insights = [insight for insight in audit_result['details'] if insight.get('status') != 'pass']
-            
-            # Ensure we don't exceed available passing insights
-            actual_free_count = min(free_count, len(passing_insights))
-            
-            # Return dynamic number of free insights (only passing ones)
-            free_insights = passing_insights[:actual_free_count]
-            
-            # Combine remaining passing insights with all non-passing insights for locked section
-            remaining_passing = passing_insights[actual_free_count:] if len(passing_insights) > actual_free_count else []
-            locked_insights = remaining_passing + other_insights
-            
-            # Transform insights to interpretation-focused language
-            free_insights_transformed = [transform_to_interpretation(insight, url) for insight in free_insights]
-            locked_insights_transformed = [transform_to_locked_insight(insight, url) for insight in locked_insights]
-            
-            # Generate interpretive summary based on score
-            summary = generate_interpretive_summary(audit_result['score'])
-            
-            partial_report = {
-                'score': audit_result['score'],
-                'summary': summary,
-                'freeInsights': free_insights_transformed,
-                'lockedInsights': locked_insights_transformed,
-                'totalInsights': total_checks,
-                'reportId': report_id,
-                'locked': True,
-                'reviewRecommendations': audit_result.get('reviewRecommendations', [])
-            }
+                partial_report = run_scan(url, force_refresh=force_refresh, wait_for_slot=False, early_stop=early_stop, profile=profile,
+                                          crawl_depth=crawl_depth, crawl_pages=crawl_pages)
+            except ServerBusyError as error:
+                self.send_json_response({'error': str(error)}, 503)
+                return
             
             self.send_json_response(partial_report)
         except Exception as error:
@@ -1495,18 +3442,130 @@ class RequestHandler(BaseHTTPRequestHandler):
                 'error': str(error) if str(error) else 'An error occurred while scanning the website'
             }, 500)
     
+    def handle_scan_batch(self):
+        """Handle the /api/scan/batch endpoint: scan many URLs and stream one NDJSON line per URL
+        as each finishes, then a summary line"""
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+            data = json.loads(self.rfile.read(content_length).decode('utf-8'))
+        except Exception:
+            self.send_json_response({'error': 'Invalid JSON body'}, 400)
+            return
+        if not isinstance(data, dict):
+            self.send_json_response({'error': 'Request body must be a JSON object'}, 400)
+            return
+        urls = data.get('urls')
+        if not isinstance(urls, list) or not urls:
+            self.send_json_response({'error': 'urls must be a non-empty list'}, 400)
+            return
+        if len(urls) > BATCH_MAX_URLS:
+            self.send_json_response({'error': f'A batch may contain at most {BATCH_MAX_URLS} URLs'}, 400)
+            return
+        profile = data.get('profile') or 'full'
+        if profile not in AUDIT_PROFILES:
+            self.send_json_response({'error': f'Unknown scan profile. Use one of: {", ".join(AUDIT_PROFILES)}'}, 400)
+            return
+        try:
+            concurrency = max(1, min(int(data.get('concurrency') or BATCH_CONCURRENCY), BATCH_CONCURRENCY))
+            crawl_depth, crawl_pages = crawl_options(data)
+        except (TypeError, ValueError):
+            self.send_json_response({'error': 'concurrency, crawl_depth and crawl_pages must be numbers'}, 400)
+            return
+        if not batch_request_slots.acquire(blocking=False):
+            self.send_json_response({'error': 'Too many batch scans running; try again shortly'}, 503)
+            return
+        
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            batch = run_batch_scan(urls, force_refresh=bool(data.get('force_refresh')), profile=profile, concurrency=concurrency,
+                                   crawl_depth=crawl_depth, crawl_pages=crawl_pages)
+            try:
+                for line in batch:
+                    self.wfile.write(json.dumps(line).encode('utf-8') + b'\n')
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                batch.close()  # Client went away: start no more scans; running ones finish on their own
+        finally:
+            batch_request_slots.release()
+    
+    def handle_scan_job_status(self, path):
+        """Return the current state of an async scan job"""
+        job = scan_jobs.get(path.rstrip('/').split('/')[-1])
+        if not job:
+            self.send_json_response({'error': 'Scan job not found'}, 404)
+            return
+        self.send_json_response(job.to_dict())
+    
+    def handle_scan_job_events(self, path):
+        """Stream an async scan job's progress as server-sent events"""
+        job = scan_jobs.get(path.rstrip('/').split('/')[-2])
+        if not job:
+            self.send_json_response({'error': 'Scan job not found'}, 404)
+            return
+        if not scan_stream_slots.acquire(blocking=False):
+            self.send_json_response({'error': 'Too many progress streams open; poll statusUrl instead'}, 503)
+            return
+        try:
+            self.send_sse_headers()
+            sent = 0
+            while True:
+                with job.changed:
+                    if sent == len(job.progress) and not job.is_finished():
+                        job.changed.wait(timeout=15)
+                    new_events = job.progress[sent:]
+                    finished = job.is_finished()
+                for event in new_events:
+                    self.send_sse_event('progress', event)
+                sent += len(new_events)
+                if finished:
+                    if job.status == 'done':
+                        self.send_sse_event('done', job.result)
+                    else:
+                        self.send_sse_event('error', {'error': job.error})
+                    return
+                if not new_events:
+                    # Keep proxies from closing an idle stream
+                    self.wfile.write(b': keepalive\n\n')
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client went away; the job keeps running
+        finally:
+            scan_stream_slots.release()
+    
+    def send_sse_headers(self):
+        """Start a server-sent events response"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+    
+    def send_sse_event(self, event, data, event_id=None):
+        """Write one server-sent event with a JSON payload"""
+        id_line = f'id: {event_id}\n' if event_id is not None else ''
+        self.wfile.write(f'{id_line}event: {event}\ndata: {json.dumps(data)}\n\n'.encode('utf-8'))
+        self.wfile.flush()
+    
     def handle_payment(self):
         """Handle payment processing"""
         try:
             content_length = int(self.headers.get('Content-Length', 0))
             post_data = self.rfile.read(content_length)
             data = json.loads(post_data.decode('utf-8'))
+            if not isinstance(data, dict):
+                self.send_json_response({'error': 'Request body must be a JSON object'}, 400)
+                return
             
             report_id = data.get('reportId')
             email = data.get('email', '').strip()
             payment_method = data.get('paymentMethod', 'demo')  # 'demo', 'stripe', 'paypal'
             
-            if not report_id or report_id not in reports_store:
+            report_data = report_repository.get_report(report_id) if report_id else None
+            if not report_data:
                 self.send_json_response({'error': 'Invalid report ID'}, 400)
                 return
             
@@ -1516,28 +3575,18 @@ class RequestHandler(BaseHTTPRequestHandler):
             
             # Simulate payment processing (in production, integrate with Stripe/PayPal)
             payment_id = str(uuid.uuid4())
-            payments_store[payment_id] = {
-                'report_id': report_id,
-                'email': email,
-                'status': 'completed',
-                'timestamp': time.time()
-            }
-            
-            # Update admin scan payment status
-            for scan in admin_scans:
-                if scan['report_id'] == report_id:
-                    scan['payment_status'] = 'paid'
-                    break
+            # Also marks the admin scan as paid
+            report_repository.add_payment(payment_id, report_id, email, 'completed')
             
-            # Send full report via email
-            full_report = reports_store[report_id]['full_report']
-            email_sent = send_email_report(email, reports_store[report_id]['url'], full_report, report_id)
+            # Queue the full report email; it is sent in the background
+            full_report = report_data['full_report']
+            email_sent = send_email_report(email, report_data['url'], full_report, report_id)
             
             self.send_json_response({
                 'success': True,
                 'paymentId': payment_id,
                 'emailSent': email_sent,
-                'message': 'Payment processed successfully. Full report sent to your email.' if email_sent else 'Payment processed successfully. Full report available below.'
+                'message': 'Payment processed successfully. Your full report is on its way to your email.' if email_sent else 'Payment processed successfully. Full report available below.'
             })
         except Exception as error:
             print(f'Payment error: {error}', file=sys.stderr)
@@ -1551,23 +3600,20 @@ class RequestHandler(BaseHTTPRequestHandler):
             content_length = int(self.headers.get('Content-Length', 0))
             post_data = self.rfile.read(content_length)
             data = json.loads(post_data.decode('utf-8'))
+            if not isinstance(data, dict):
+                self.send_json_response({'error': 'Request body must be a JSON object'}, 400)
+                return
             
             report_id = data.get('reportId')
             
-            if not report_id or report_id not in reports_store:
+            report_data = report_repository.get_report(report_id) if report_id else None
+            if not report_data:
                 self.send_json_response({'error': 'Invalid report ID'}, 400)
                 return
             
             # Check if any payment exists for this report
-            payment_found = False
-            for payment_id, payment in payments_store.items():
-                if payment['report_id'] == report_id and payment['status'] == 'completed':
-                    payment_found = True
-                    break
-            
-            if payment_found:
+            if report_repository.is_paid(report_id):
                 # Return full report with transformed insights
-                report_data = reports_store[report_id]
                 full_report = report_data['full_report']
                 url = report_data['url']
                 
@@ -1598,10 +3644,10 @@ class RequestHandler(BaseHTTPRequestHandler):
     
     def generate_pdf_html(self, report_id):
         """Generate HTML for PDF export"""
-        if report_id not in reports_store:
+        report_data = report_repository.get_report(report_id)
+        if report_data is None:
             return None
         
-        report_data = reports_store[report_id]
         url = report_data['url']
         report = report_data['full_report']
         timestamp = report_data.get('timestamp_iso', datetime.now().isoformat())
@@ -1672,21 +3718,18 @@ class RequestHandler(BaseHTTPRequestHandler):
             content_length = int(self.headers.get('Content-Length', 0))
             post_data = self.rfile.read(content_length)
             data = json.loads(post_data.decode('utf-8'))
+            if not isinstance(data, dict):
+                self.send_json_response({'error': 'Request body must be a JSON object'}, 400)
+                return
             
             report_id = data.get('reportId')
             
-            if not report_id or report_id not in reports_store:
+            if not report_id or not report_repository.report_exists(report_id):
                 self.send_json_response({'error': 'Invalid report ID'}, 400)
                 return
             
             # Check if payment was made
-            payment_found = False
-            for payment_id, payment in payments_store.items():
-                if payment['report_id'] == report_id and payment['status'] == 'completed':
-                    payment_found = True
-                    break
-            
-            if not payment_found:
+            if not report_repository.is_paid(report_id):
                 self.send_json_response({'error': 'PDF download available after payment only'}, 403)
                 return
             
@@ -1715,18 +3758,12 @@ class RequestHandler(BaseHTTPRequestHandler):
         try:
             report_id = path.split('/')[-1]
             
-            if not report_id or report_id not in reports_store:
+            if not report_id or not report_repository.report_exists(report_id):
                 self.send_error(404)
                 return
             
             # Check payment
-            payment_found = False
-            for payment_id, payment in payments_store.items():
-                if payment['report_id'] == report_id and payment['status'] == 'completed':
-                    payment_found = True
-                    break
-            
-            if not payment_found:
+            if not report_repository.is_paid(report_id):
                 self.send_error(403)
                 return
             
@@ -1745,18 +3782,83 @@ class RequestHandler(BaseHTTPRequestHandler):
             self.send_error(500)
     
     def handle_admin_scans(self):
-        """Return admin scan data"""
+        """Return admin scan data: the 100 most recent scans, or with ?since=CURSOR only the scans
+        added or updated since (up to ?limit=, default 100). Either way 'cursor' is the value for the next ?since="""
         try:
-            # Return recent scans (last 100)
-            recent_scans = sorted(admin_scans, key=lambda x: x.get('timestamp', ''), reverse=True)[:100]
+            query = parse_qs(urlparse(self.path).query)
+            try:
+                since = int(query['since'][0]) if 'since' in query else None
+                limit = min(max(int(query.get('limit', ['100'])[0]), 1), ADMIN_SCANS_PAGE_LIMIT)
+            except ValueError:
+                self.send_json_response({'error': 'since and limit must be integers'}, 400)
+                return
+            if since is None:
+                # Return recent scans (last 100). The cursor is read first: a change racing
+                # the query is sent again with the next delta rather than missed
+                cursor = report_repository.latest_change()
+                self.send_json_response({
+                    'scans': report_repository.recent_scans(100),
+                    'total': report_repository.count_scans(),
+                    'cursor': cursor
+                })
+                return
+            scans, cursor, has_more = report_repository.scan_changes(since, limit)
             self.send_json_response({
-                'scans': recent_scans,
-                'total': len(admin_scans)
+                'scans': scans,
+                'total': report_repository.count_scans(),
+                'cursor': cursor,
+                'hasMore': has_more
             })
         except Exception as error:
             print(f'Admin error: {error}', file=sys.stderr)
             self.send_json_response({'error': str(error)}, 500)
     
+    def handle_admin_scans_stream(self):
+        """Push new scans and payment-status changes after ?since=CURSOR as server-sent events.
+        Each 'scans' event carries the changed rows and its cursor as the event ID, so a reconnecting
+        EventSource resumes from Last-Event-ID"""
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            cursor = max(int(query.get('since', ['0'])[0]), int(self.headers.get('Last-Event-ID') or 0))
+        except ValueError:
+            self.send_json_response({'error': 'since must be an integer'}, 400)
+            return
+        # Each stream holds an HTTP worker; past the limit admin pages fall back to polling
+        if not admin_stream_slots.acquire(blocking=False):
+            self.send_json_response({'error': 'Too many admin streams open'}, 503)
+            return
+        try:
+            self.send_sse_headers()
+            while True:
+                scans, cursor, has_more = report_repository.scan_changes(cursor, ADMIN_SCANS_PAGE_LIMIT)
+                if scans:
+                    self.send_sse_event('scans', {'scans': scans, 'total': report_repository.count_scans(), 'cursor': cursor},
+                                        event_id=cursor)
+                if has_more:
+                    continue
+                if not report_repository.wait_for_change(cursor, timeout=15):
+                    if report_repository.closed:
+                        return  # Server shutting down
+                    # Keep proxies from closing an idle stream
+                    self.wfile.write(b': keepalive\n\n')
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Admin page closed
+        finally:
+            admin_stream_slots.release()
+    
+    def handle_admin_stats(self):
+        """Return cache and pipeline statistics"""
+        self.send_json_response({
+            'auditCache': audit_cache.stats(),
+            'pageValidators': page_validators.stats(),
+            'outboundPool': outbound_pool.stats(),
+            'dnsCache': dns_cache.stats(),
+            'siteFiles': site_files_cache.stats(),
+            'emailQueue': email_queue.stats(),
+            'reports': report_repository.report_stats()
+        })
+    
     def serve_admin_page(self):
         """Serve admin page"""
         admin_html = """<!DOCTYPE html>
@@ -1795,30 +3897,75 @@ class RequestHandler(BaseHTTPRequestHandler):
         </table>
     </div>
     <script>
+        // Scans shown (newest 100), keyed by report ID; changes are merged in as they arrive
+        const scans = new Map();
+        let cursor = 0;
+        
+        function applyChanges(data) {
+            data.scans.forEach(scan => scans.set(scan.report_id, scan));
+            cursor = data.cursor;
+            document.getElementById('totalScans').textContent = data.total;
+            renderScans();
+        }
+        
+        function renderScans() {
+            const recent = [...scans.values()].sort((a, b) => b.timestamp.localeCompare(a.timestamp)).slice(0, 100);
+            scans.clear();
+            recent.forEach(scan => scans.set(scan.report_id, scan));
+            const tbody = document.getElementById('scansBody');
+            tbody.innerHTML = '';
+            recent.forEach(scan => {
+                const row = tbody.insertRow();
+                row.insertCell(0).textContent = scan.timestamp;
+                row.insertCell(1).textContent = scan.url;
+                const scoreCell = row.insertCell(2);
+                scoreCell.textContent = scan.score;
+                scoreCell.className = 'score';
+                const statusCell = row.insertCell(3);
+                statusCell.textContent = scan.payment_status === 'paid' ? 'Paid' : 'Free';
+                statusCell.className = scan.payment_status === 'paid' ? 'status-paid' : 'status-free';
+            });
+        }
+        
         async function loadScans() {
             try {
                 const response = await fetch('/api/admin/scans');
-                const data = await response.json();
-                document.getElementById('totalScans').textContent = data.total;
-                const tbody = document.getElementById('scansBody');
-                tbody.innerHTML = '';
-                data.scans.forEach(scan => {
-                    const row = tbody.insertRow();
-                    row.insertCell(0).textContent = scan.timestamp;
-                    row.insertCell(1).textContent = scan.url;
-                    const scoreCell = row.insertCell(2);
-                    scoreCell.textContent = scan.score;
-                    scoreCell.className = 'score';
-                    const statusCell = row.insertCell(3);
-                    statusCell.textContent = scan.payment_status === 'paid' ? 'Paid' : 'Free';
-                    statusCell.className = scan.payment_status === 'paid' ? 'status-paid' : 'status-free';
-                });
+                applyChanges(await response.json());
+            } catch (error) {
+                console.error('Error loading scans:', error);
+            }
+        }
+        
+        async function loadChanges() {
+            // Only scans added or updated since the last cursor
+            try {
+                let data;
+                do {
+                    const response = await fetch(`/api/admin/scans?since=${cursor}`);
+                    data = await response.json();
+                    applyChanges(data);
+                } while (data.hasMore);
             } catch (error) {
                 console.error('Error loading scans:', error);
             }
         }
-        loadScans();
-        setInterval(loadScans, 5000); // Refresh every 5 seconds
+        
+        function watchScans() {
+            // New scans and payments are pushed; poll for changes if streaming isn't available
+            if (!window.EventSource) {
+                setInterval(loadChanges, 5000);
+                return;
+            }
+            const source = new EventSource(`/api/admin/scans/stream?since=${cursor}`);
+            source.addEventListener('scans', event => applyChanges(JSON.parse(event.data)));
+            source.onerror = () => {
+                if (source.readyState === EventSource.CLOSED) {
+                    setInterval(loadChanges, 5000);
+                }
+            };
+        }
+        
+        loadScans().then(watchScans);
     </script>
 </body>
 </html>
@@ -1843,11 +3990,37 @@ class RequestHandler(BaseHTTPRequestHandler):
         """Suppress default logging"""
         pass
 
+class PooledHTTPServer(HTTPServer):
+    """HTTP server that handles requests on a bounded pool of worker threads"""
+    def __init__(self, server_address, handler_class, max_workers=SERVER_WORKERS):
+        # Set up the pool first: a failed bind calls server_close() from inside HTTPServer.__init__
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='http-worker')
+        super().__init__(server_address, handler_class)
+    
+    def process_request(self, request, client_address):
+        """Hand the connection to a worker instead of serving it inline"""
+        self.executor.submit(self.process_request_thread, request, client_address)
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+    
+    def server_close(self):
+        """Stop accepting connections, then let in-flight requests (e.g. scans) finish"""
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
 def run_server(port=3000, host='0.0.0.0'):
     """Start the HTTP server"""
+    open_storage()
     try:
         server_address = (host, port)
-        httpd = HTTPServer(server_address, RequestHandler)
+        httpd = PooledHTTPServer(server_address, RequestHandler)
         
         # Get the actual port (in case port 0 was used for auto-assignment)
         actual_port = httpd.server_address[1]
@@ -1859,35 +4032,212 @@ def run_server(port=3000, host='0.0.0.0'):
         else:
             print(f'📝 Open your browser and navigate to: http://{host}:{actual_port}', flush=True)
         print(f'🛑 Press Ctrl+C to stop the server', flush=True)
-        print(f'✅ Server is ready and listening on port {actual_port}', flush=True)
+        print(f'✅ Server is ready and listening on port {actual_port} ({httpd.max_workers} workers, {SCAN_WORKERS} concurrent scans)', flush=True)
         
-        httpd.serve_forever()
+        serve_until_stopped(httpd)
     except OSError as e:
         if 'Address already in use' in str(e):
             print(f'❌ Port {port} is already in use. Trying alternative port...', flush=True)
             # Try next port
             try:
                 server_address = (host, 0)  # Let OS assign port
-                httpd = HTTPServer(server_address, RequestHandler)
+                httpd = PooledHTTPServer(server_address, RequestHandler)
                 actual_port = httpd.server_address[1]
                 print(f'🚀 Server running on port {actual_port}', flush=True)
-                httpd.serve_forever()
+                serve_until_stopped(httpd)
             except Exception as e2:
                 print(f'❌ Failed to start server: {e2}', flush=True)
                 sys.exit(1)
         else:
             print(f'❌ Failed to start server: {e}', flush=True)
             sys.exit(1)
-    except KeyboardInterrupt:
-        print('\n👋 Server stopped', flush=True)
-        httpd.server_close()
     except Exception as e:
         print(f'❌ Server error: {e}', flush=True)
         import traceback
         traceback.print_exc()
         sys.exit(1)
 
+def serve_until_stopped(httpd):
+    """Serve until Ctrl+C or SIGTERM, then shut down gracefully"""
+    def request_shutdown(signum, frame):
+        # shutdown() blocks until serve_forever() returns, so call it off the main thread
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+    
+    signal.signal(signal.SIGTERM, request_shutdown)
+    email_queue.start()  # Resumes report emails queued before a restart
+    report_repository.start_purging()
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print('\n⏳ Shutting down, waiting for in-flight requests to finish...', flush=True)
+    report_repository.close_change_waiters()
+    httpd.server_close()
+    scan_jobs.shutdown()
+    batch_executor.shutdown(wait=True)
+    crawl_executor.shutdown(wait=True)
+    site_files_cache.shutdown()
+    email_queue.shutdown()
+    report_repository.stop_purging()
+    outbound_pool.close_idle()
+    print('👋 Server stopped', flush=True)
+
+# Offline batch audits: python3 server_standalone.py audit URLS_FILE --output results.jsonl
+
+def download_page(url, profile='full'):
+    """Download a page's text without parsing it, for parsing in another process.
+    Returns (text, partial_reason, SiteFiles or None when the profile doesn't read robots.txt)"""
+    wants_site_files = not profile_signals(profile).isdisjoint(SITE_FILE_SIGNALS)
+    if wants_site_files:
+        site_files_cache.prefetch(url)
+    try:
+        response = open_page(url)
+        reader = ResponseTextReader(response, max_bytes=MAX_PAGE_BYTES, deadline=time.time() + FETCH_DEADLINE)
+        text = ''.join(reader)
+        return text, reader.truncated_reason, site_files_cache.get(url) if wants_site_files else None
+    except urllib.error.URLError as error:
+        raise fetch_error(error)
+    except Exception as error:
+        error_msg = str(error)
+        if 'Failed to fetch or analyze website' in error_msg:
+            raise
+        raise Exception(f'Failed to fetch or analyze website: {error_msg}')
+
+def audit_page_text(url, text, partial_reason, profile, site_files=None):
+    """Parse and score downloaded page text (runs in a parse worker process)"""
+    parser = HTMLAuditParser(profile_signals(profile))
+    for start in range(0, len(text), FETCH_CHUNK_SIZE):
+        parser.feed(text[start:start + FETCH_CHUNK_SIZE])
+    parser.close()
+    page = PageAnalysis(url, parser, partial_reason)
+    if site_files:
+        page = apply_site_files(page, site_files)
+    return audit_page(url, page, profile)
+
+def read_url_list(source):
+    """URLs from a file (or stdin for '-'), one per line; blank lines and # comments are skipped"""
+    stream = sys.stdin if source == '-' else open(source, encoding='utf-8')
+    try:
+        return [line.strip() for line in stream if line.strip() and not line.lstrip().startswith('#')]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def read_checkpoint(path):
+    """(index, url) pairs already written by an earlier run of the same job"""
+    done = set()
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as checkpoint:
+            for line in checkpoint:
+                index, _, url = line.rstrip('\n').partition('\t')
+                if index.isdigit() and url:
+                    done.add((int(index), url))
+    return done
+
+def run_cli_audit(argv):
+    """Audit a list of URLs without the HTTP server, writing one JSON line per URL.
+    Pages are downloaded on a thread pool and parsed/scored on a process pool. Each URL audited
+    successfully is recorded in a checkpoint file, so rerunning the same command resumes the job
+    and retries the URLs that failed"""
+    import argparse
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    
+    arg_parser = argparse.ArgumentParser(prog='server_standalone.py audit', description=run_cli_audit.__doc__)
+    arg_parser.add_argument('urls', help="file with one URL per line, or - for stdin")
+    arg_parser.add_argument('--output', '-o', default='-', help='JSONL output file (default: stdout)')
+    arg_parser.add_argument('--checkpoint', help='checkpoint file (default: OUTPUT.checkpoint; none for stdout)')
+    arg_parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint and start over')
+    arg_parser.add_argument('--profile', default='full', choices=sorted(AUDIT_PROFILES))
+    arg_parser.add_argument('--fetch-workers', type=int, default=16, help='concurrent downloads (default: 16)')
+    arg_parser.add_argument('--parse-workers', type=int, default=os.cpu_count() or 2,
+                            help='parser processes (default: CPU count)')
+    args = arg_parser.parse_args(argv)
+    
+    urls = read_url_list(args.urls)
+    checkpoint_path = args.checkpoint or (f'{args.output}.checkpoint' if args.output != '-' else None)
+    done = set() if args.restart else read_checkpoint(checkpoint_path)
+    todo = [(index, url) for index, url in enumerate(urls) if (index, url) not in done]
+    if done:
+        print(f'Resuming: {len(urls) - len(todo)} of {len(urls)} URLs already audited', file=sys.stderr, flush=True)
+    
+    append = bool(done)
+    output = sys.stdout if args.output == '-' else open(args.output, 'a' if append else 'w', encoding='utf-8')
+    checkpoint = open(checkpoint_path, 'a' if append else 'w', encoding='utf-8') if checkpoint_path else None
+    
+    def write_result(index, url, started, result=None, error=None):
+        line = {'index': index, 'url': url, 'status': 'ok' if error is None else 'error',
+                'elapsedMs': round((time.time() - started) * 1000)}
+        if error is None:
+            line['result'] = result
+        else:
+            line['error'] = str(error) if str(error) else 'An error occurred while scanning the website'
+        # The result line goes out before the checkpoint entry: a crash in between
+        # repeats that URL on resume rather than losing it. Failures are not checkpointed,
+        # so a resume retries them and appends a new line for the same index
+        output.write(json.dumps(line) + '\n')
+        output.flush()
+        if checkpoint and error is None:
+            checkpoint.write(f'{index}\t{url}\n')
+            checkpoint.flush()
+    
+    fetch_workers = max(1, args.fetch_workers)
+    parse_workers = max(1, args.parse_workers)
+    # Bound the pages held in memory: downloads and parses in flight at once
+    max_in_flight = fetch_workers + parse_workers * 2
+    started_at = time.time()
+    completed = failed = 0
+    pending = iter(todo)
+    in_flight = {}  # future -> (stage, index, url, started)
+    try:
+        # Parse workers are spawned, not forked: forking while fetch and robots.txt threads hold
+        # locks can leave a child deadlocked
+        with ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix='cli-fetch') as fetchers, \
+                ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context('spawn')) as parsers:
+            while True:
+                while len(in_flight) < max_in_flight:
+                    next_url = next(pending, None)
+                    if next_url is None:
+                        break
+                    index, url = next_url
+                    url_error = validate_scan_url(url)
+                    if url_error:
+                        write_result(index, url, time.time(), error=url_error)
+                        completed += 1
+                        failed += 1
+                        continue
+                    in_flight[fetchers.submit(download_page, url, args.profile)] = ('fetch', index, url, time.time())
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage, index, url, started = in_flight.pop(future)
+                    error = future.exception()
+                    if error is None and stage == 'fetch':
+                        text, partial_reason, site_files = future.result()
+                        in_flight[parsers.submit(audit_page_text, url, text, partial_reason, args.profile,
+                                                 site_files)] = ('parse', index, url, started)
+                        continue
+                    write_result(index, url, started, result=None if error else future.result(), error=error)
+                    completed += 1
+                    failed += error is not None
+                    if completed % 100 == 0:
+                        rate = completed / max(time.time() - started_at, 0.001)
+                        print(f'{completed}/{len(todo)} audited ({failed} failed, {rate:.1f} URLs/s)', file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        print('\nInterrupted; rerun the same command to resume from the checkpoint', file=sys.stderr, flush=True)
+        return 130
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if checkpoint:
+            checkpoint.close()
+    print(f'Done: {completed} audited, {failed} failed in {time.time() - started_at:.1f}s', file=sys.stderr, flush=True)
+    return 0
+
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'audit':
+        sys.exit(run_cli_audit(sys.argv[2:]))
     # Get port from environment variable (for cloud platforms) or command line
     port = int(os.environ.get('PORT', sys.argv[1] if len(sys.argv) > 1 else 3000))
     # Use 0.0.0.0 to accept connections from any interface (for cloud deployment)
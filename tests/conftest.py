@@ -0,0 +1,48 @@
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server_standalone as server
+
+PAGE = b'''<html><head><title>Corner Cafe</title><meta name="description" content="Coffee and cake">
+<script type="application/ld+json">{"@type": "Restaurant", "name": "Corner Cafe"}</script></head>
+<body><h1>Corner Cafe</h1><p>Open daily 8am-6pm. Call 555-0100.</p></body></html>'''
+
+
+@pytest.fixture
+def page_server():
+    """A local keep-alive site serving PAGE at every path except /missing (404); yields its base URL"""
+    class PageHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if self.path == '/missing':
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """A report repository on a temporary database, standing in for the server's"""
+    repository = server.ReportRepository(str(tmp_path / 'audit.db'), user_file=None)
+    monkeypatch.setattr(server, 'report_repository', repository)
+    return repository
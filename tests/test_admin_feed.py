@@ -0,0 +1,58 @@
+"""The admin scan change feed (cursors and waiting for changes), on a temporary database"""
+import threading
+import time
+
+import pytest
+
+import server_standalone as server
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = server.ReportRepository(str(tmp_path / 'audit.db'), user_file=None)
+    for index in range(5):
+        repository.add_report(f'r{index}', f'https://{index}.example', {'score': index}, index)
+    return repository
+
+
+def test_pages_follow_the_cursor(repository):
+    scans, cursor, has_more = repository.scan_changes(0, limit=2)
+    assert [scan['report_id'] for scan in scans] == ['r0', 'r1']
+    assert has_more
+    scans, cursor, has_more = repository.scan_changes(cursor, limit=2)
+    assert [scan['report_id'] for scan in scans] == ['r2', 'r3']
+    assert has_more
+    scans, cursor, has_more = repository.scan_changes(cursor, limit=2)
+    assert [scan['report_id'] for scan in scans] == ['r4']
+    assert (cursor, has_more) == (5, False)
+    assert repository.scan_changes(cursor, limit=2) == ([], 5, False)
+
+
+def test_payment_moves_the_scan_to_the_end_of_the_feed(repository):
+    cursor = repository.latest_change()
+    repository.add_payment('p1', 'r1', 'a@example.com')
+    scans, new_cursor, _ = repository.scan_changes(cursor)
+    assert [(scan['report_id'], scan['payment_status']) for scan in scans] == [('r1', 'paid')]
+    assert new_cursor == cursor + 1
+    assert [scan['report_id'] for scan in repository.scan_changes(0)[0]] == ['r0', 'r2', 'r3', 'r4', 'r1']
+    assert repository.count_scans() == 5
+
+
+def test_wait_for_change_wakes_on_a_new_scan(repository):
+    cursor = repository.latest_change()
+    timer = threading.Timer(0.1, repository.add_report, ('r5', 'https://5.example', {'score': 5}, 5))
+    timer.start()
+    started = time.time()
+    assert repository.wait_for_change(cursor, timeout=5)
+    assert time.time() - started < 2
+    timer.join()
+    assert not repository.wait_for_change(repository.latest_change(), timeout=0.05)
+
+
+def test_closing_ends_waiting_streams(repository):
+    cursor = repository.latest_change()
+    threading.Timer(0.1, repository.close_change_waiters).start()
+    started = time.time()
+    assert not repository.wait_for_change(cursor, timeout=5)
+    assert time.time() - started < 2
+    assert repository.closed
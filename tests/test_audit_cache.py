@@ -0,0 +1,52 @@
+"""AuditCache, and run_scan's use of it against a local site"""
+import time
+
+import server_standalone as server
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = server.AuditCache(ttl=60, max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # b is now the least recently used
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_expire_after_the_ttl():
+    cache = server.AuditCache(ttl=0.1, max_entries=10)
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    time.sleep(0.15)
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert (stats['entries'], stats['hits'], stats['misses']) == (0, 1, 1)
+
+
+def test_disabled_cache_stores_nothing():
+    cache = server.AuditCache(ttl=0, max_entries=10)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+
+
+def scan_stages(url, **options):
+    stages = []
+    server.run_scan(url, progress=stages.append, **options)
+    return stages
+
+
+def test_rescan_reuses_the_cached_result(page_server, storage, monkeypatch):
+    monkeypatch.setattr(server, 'audit_cache', server.AuditCache(ttl=60, max_entries=10))
+    assert 'fetched' in scan_stages(f'{page_server}/')
+    assert scan_stages(f'{page_server}/') == ['cached']
+    assert 'fetched' in scan_stages(f'{page_server}/', force_refresh=True)
+
+
+def test_partial_results_are_not_cached(page_server, storage, monkeypatch):
+    monkeypatch.setattr(server, 'audit_cache', server.AuditCache(ttl=60, max_entries=10))
+    monkeypatch.setattr(server, 'MAX_PAGE_BYTES', 40)
+    assert 'fetched' in scan_stages(f'{page_server}/')
+    assert 'fetched' in scan_stages(f'{page_server}/')
+    assert server.audit_cache.stats()['entries'] == 0
@@ -0,0 +1,100 @@
+"""Batch scans, against a local site"""
+import http.client
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import server_standalone as server
+
+
+def test_batch_streams_results_then_a_summary(page_server, storage):
+    urls = [f'{page_server}/', f'{page_server}/missing', 'ftp://example.com/']
+    events = list(server.run_batch_scan(urls))
+    results, summary = events[:-1], events[-1]
+    assert sorted(result['index'] for result in results) == [0, 1, 2]
+    by_index = {result['index']: result for result in results}
+    assert by_index[0]['status'] == 'ok' and storage.report_exists(by_index[0]['report']['reportId'])
+    assert by_index[1]['status'] == 'error' and '404' in by_index[1]['error']
+    assert by_index[2]['error'] == 'URL must use http or https protocol'
+    assert summary['type'] == 'summary'
+    assert (summary['total'], summary['succeeded'], summary['failed']) == (3, 1, 2)
+    assert summary['averageScore'] == by_index[0]['report']['score']
+    assert sorted(failure['index'] for failure in summary['failures']) == [1, 2]
+
+
+def test_batch_limits_scans_per_host_and_uses_its_own_slots(monkeypatch):
+    lock = threading.Lock()
+    running = {}
+    peak = {}
+    slots_used = set()
+
+    def fake_scan(url, slots=None, **options):
+        host = server.urlparse(url).hostname
+        slots_used.add(slots)
+        with lock:
+            running[host] = running.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), running[host])
+        time.sleep(0.05)
+        with lock:
+            running[host] -= 1
+        return {'score': 50}
+
+    monkeypatch.setattr(server, 'run_scan', fake_scan)
+    urls = [f'https://a.example/{index}' for index in range(6)] + [f'https://b.example/{index}' for index in range(2)]
+    events = list(server.run_batch_scan(urls, concurrency=4))
+    assert events[-1]['succeeded'] == 8
+    assert peak['a.example'] <= server.BATCH_PER_HOST
+    assert slots_used == {server.batch_scan_slots}
+
+
+@pytest.fixture
+def http_server(storage):
+    httpd = server.PooledHTTPServer(('127.0.0.1', 0), server.RequestHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.parametrize('path', ['/api/scan', '/api/scan/batch', '/api/payment', '/api/unlock', '/api/pdf'])
+def test_non_object_bodies_are_rejected(http_server, path):
+    request = urllib.request.Request(http_server + path, data=b'["https://example.com/"]',
+                                     headers={'Content-Type': 'application/json'}, method='POST')
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request, timeout=10)
+    assert error.value.code == 400
+    assert json.loads(error.value.read()) == {'error': 'Request body must be a JSON object'}
+
+
+def test_batch_requests_beyond_the_limit_get_a_503(http_server, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(server, 'run_scan', lambda url, **options: release.wait(10) and {'score': 1})
+    monkeypatch.setattr(server, 'batch_request_slots', threading.BoundedSemaphore(1))
+    host, port = server.urlparse(http_server).netloc.split(':')
+    body = json.dumps({'urls': ['https://example.com/']})
+
+    def post_batch():
+        connection = http.client.HTTPConnection(host, int(port), timeout=10)
+        connection.request('POST', '/api/scan/batch', body, {'Content-Type': 'application/json'})
+        return connection, connection.getresponse()
+
+    first, streaming = post_batch()
+    try:
+        assert streaming.status == 200
+        second, busy = post_batch()
+        assert busy.status == 503
+        assert 'batch' in json.loads(busy.read())['error']
+        second.close()
+    finally:
+        release.set()
+    lines = [json.loads(line) for line in streaming.read().splitlines()]
+    first.close()
+    assert lines[-1]['succeeded'] == 1
+    third, response = post_batch()  # The slot was released
+    assert response.status == 200
+    response.read()
+    third.close()
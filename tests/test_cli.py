@@ -0,0 +1,29 @@
+"""The offline audit CLI, against a local site"""
+import json
+
+import server_standalone as server
+
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+
+def test_resume_skips_audited_urls_and_retries_failures(page_server, tmp_path):
+    urls = tmp_path / 'urls.txt'
+    urls.write_text(f'{page_server}/\n{page_server}/missing\n{page_server}/about\n', encoding='utf-8')
+    output = tmp_path / 'results.jsonl'
+    argv = [str(urls), '--output', str(output), '--fetch-workers', '2', '--parse-workers', '1']
+
+    assert server.run_cli_audit(argv) == 0
+    first = {line['index']: line for line in read_lines(output)}
+    assert [first[index]['status'] for index in range(3)] == ['ok', 'error', 'ok']
+    assert server.read_checkpoint(f'{output}.checkpoint') == {(0, f'{page_server}/'), (2, f'{page_server}/about')}
+
+    assert server.run_cli_audit(argv) == 0
+    lines = read_lines(output)
+    assert len(lines) == 4
+    assert (lines[-1]['index'], lines[-1]['status']) == (1, 'error')  # Only the failure was audited again
+
+    assert server.run_cli_audit(argv + ['--restart']) == 0
+    assert sorted(line['index'] for line in read_lines(output)) == [0, 1, 2]
@@ -0,0 +1,50 @@
+"""OutboundConnectionPool keep-alive reuse, against a local site"""
+import pytest
+
+import server_standalone as server
+from conftest import PAGE
+
+HEADERS = {'User-Agent': 'test'}
+
+
+@pytest.fixture
+def pool():
+    pool = server.OutboundConnectionPool()
+    yield pool
+    pool.close_idle()
+
+
+def read_all(response):
+    body = b''
+    while True:
+        data = response.read(16)
+        if not data:
+            return body
+        body += data
+
+
+def test_connection_is_reused_after_a_full_read(pool, page_server):
+    first = pool.open(f'{page_server}/', HEADERS)
+    assert read_all(first) == PAGE
+    assert first.connection is None  # Released to the pool
+    second = pool.open(f'{page_server}/other', HEADERS)
+    assert read_all(second) == PAGE
+    assert (pool.connections_opened, pool.connections_reused) == (1, 1)
+
+
+def test_connection_is_discarded_after_a_partial_read(pool, page_server):
+    first = pool.open(f'{page_server}/', HEADERS)
+    assert first.read(10) == PAGE[:10]
+    first.close()
+    assert pool.idle_count == 0
+    second = pool.open(f'{page_server}/', HEADERS)
+    assert read_all(second) == PAGE
+    assert (pool.connections_opened, pool.connections_reused) == (2, 0)
+
+
+def test_idle_connections_expire(page_server):
+    pool = server.OutboundConnectionPool(idle_timeout=0)
+    read_all(pool.open(f'{page_server}/', HEADERS))
+    read_all(pool.open(f'{page_server}/', HEADERS))
+    assert (pool.connections_opened, pool.connections_reused) == (2, 0)
+
@@ -0,0 +1,45 @@
+"""ContentDecoder, fed compressed bodies in chunks of every size"""
+import gzip
+import zlib
+
+import pytest
+
+import server_standalone as server
+
+BODY = b'<html><head><title>Corner Cafe</title></head><body>' + b'<p>Open daily</p>' * 200 + b'</body></html>'
+
+
+def raw_deflate(data):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decode_in_chunks(encoding, payload, size):
+    decoder = server.ContentDecoder(encoding)
+    decoded = b''.join(decoder.decode(payload[start:start + size]) for start in range(0, len(payload), size))
+    return decoded + decoder.flush()
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 1 << 16])
+@pytest.mark.parametrize('encoding, payload', [
+    ('gzip', gzip.compress(BODY)),
+    ('deflate', zlib.compress(BODY)),
+    ('deflate', raw_deflate(BODY)),
+    ('identity', BODY),
+])
+def test_bodies_decode_whatever_the_chunk_size(encoding, payload, size):
+    assert decode_in_chunks(encoding, payload, size) == BODY
+
+
+def test_first_deflate_byte_alone_is_held_back():
+    payload = zlib.compress(BODY)
+    decoder = server.ContentDecoder('deflate')
+    assert decoder.decode(payload[:1]) == b''
+    assert decoder.decompressor is None
+    assert decoder.decode(payload[1:]) + decoder.flush() == BODY
+
+
+def test_empty_deflate_body():
+    decoder = server.ContentDecoder('deflate')
+    assert decoder.decode(b'') == b''
+    assert decoder.flush() == b''
@@ -0,0 +1,70 @@
+"""Site crawling, against local servers"""
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import server_standalone as server
+
+
+def start_server(handler_class):
+    httpd = HTTPServer(('127.0.0.1', 0), handler_class)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+@pytest.fixture
+def redirected_site():
+    """A site on one port whose landing page is reached through a redirect from another port"""
+    class SiteHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/':
+                body = b'<html><body><nav><a href="/contact">Contact us</a></nav></body></html>'
+            elif self.path == '/contact':
+                body = b'<html><body><p>Call us</p></body></html>'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    site = start_server(SiteHandler)
+    site_url = f'http://127.0.0.1:{site.server_address[1]}/'
+
+    class RedirectHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(301)
+            self.send_header('Location', site_url)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    redirect = start_server(RedirectHandler)
+    yield f'http://127.0.0.1:{redirect.server_address[1]}/', site_url
+    redirect.shutdown()
+    site.shutdown()
+    redirect.server_close()
+    site.server_close()
+
+
+def test_fetch_records_the_final_url(redirected_site):
+    start_url, site_url = redirected_site
+    page = server.fetch_and_parse(start_url)
+    assert page.url == start_url
+    assert page.final_url == site_url
+
+
+def test_crawl_follows_links_on_the_redirected_origin(redirected_site):
+    start_url, site_url = redirected_site
+    site, report = server.crawl_site(start_url, max_depth=1)
+    assert [page['url'] for page in report['pages']] == [start_url, site_url + 'contact']
+    assert report['pages'][1]['status'] == 'ok'
+    assert site.final_url == site_url
@@ -0,0 +1,74 @@
+"""DNSCache, with a stand-in resolver and a local site"""
+import socket
+import time
+
+import pytest
+
+import server_standalone as server
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Replaces socket.getaddrinfo: missing.example doesn't exist, every other host is 127.0.0.1"""
+    hosts = []
+    real_getaddrinfo = socket.getaddrinfo
+
+    def getaddrinfo(host, port, *args):
+        hosts.append(host)
+        if host == 'missing.example':
+            raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+        return real_getaddrinfo('127.0.0.1', port, *args)
+
+    monkeypatch.setattr(server.socket, 'getaddrinfo', getaddrinfo)
+    return hosts
+
+
+def test_addresses_are_reused_until_the_ttl(lookups):
+    cache = server.DNSCache(ttl=0.1)
+    first = cache.resolve('a.example', 80)
+    assert cache.resolve('A.example', 80) == first
+    assert lookups == ['a.example']
+    time.sleep(0.15)
+    cache.resolve('a.example', 80)
+    assert lookups == ['a.example', 'a.example']
+
+
+def test_missing_domains_are_remembered_until_the_negative_ttl(lookups):
+    cache = server.DNSCache(negative_ttl=0.1)
+    for _ in range(3):
+        with pytest.raises(socket.gaierror) as error:
+            cache.resolve('missing.example', 80)
+        assert error.value.errno == socket.EAI_NONAME
+    assert lookups == ['missing.example']
+    assert cache.stats()['negativeHits'] == 2
+    time.sleep(0.15)
+    with pytest.raises(socket.gaierror):
+        cache.resolve('missing.example', 80)
+    assert lookups == ['missing.example', 'missing.example']
+
+
+def test_other_resolver_errors_are_not_cached(monkeypatch):
+    calls = []
+
+    def failing_getaddrinfo(host, port, *args):
+        calls.append(host)
+        raise socket.gaierror(socket.EAI_AGAIN, 'Temporary failure in name resolution')
+
+    monkeypatch.setattr(server.socket, 'getaddrinfo', failing_getaddrinfo)
+    cache = server.DNSCache()
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            cache.resolve('flaky.example', 80)
+    assert len(calls) == 2
+
+
+def test_page_fetches_resolve_through_the_cache(page_server, monkeypatch):
+    cache = server.DNSCache()
+    monkeypatch.setattr(server, 'dns_cache', cache)
+    pool = server.OutboundConnectionPool()
+    for _ in range(2):
+        response = pool.open(f'{page_server}/', {'User-Agent': 'test'})
+        response.close()  # Discards the connection, so the next fetch connects again
+    assert pool.connections_opened == 2
+    stats = cache.stats()
+    assert (stats['misses'], stats['hits']) == (1, 1)
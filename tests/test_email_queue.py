@@ -0,0 +1,175 @@
+"""EmailDeliveryQueue, with a fake SMTP server and a temporary database"""
+import smtplib
+import time
+
+import pytest
+
+import server_standalone as server
+
+
+class FakeSMTP:
+    """Stands in for smtplib.SMTP; fails the next `failures` sends"""
+    sent = []
+    failures = 0
+    connections = 0
+
+    def __init__(self, host, port, timeout=None):
+        FakeSMTP.connections += 1
+
+    def starttls(self):
+        raise AssertionError('a local test server is used without STARTTLS')
+
+    def login(self, user, password):
+        raise AssertionError('a local test server is used without a login')
+
+    def send_message(self, msg):
+        if FakeSMTP.failures:
+            FakeSMTP.failures -= 1
+            raise smtplib.SMTPDataError(451, b'Try again later')
+        FakeSMTP.sent.append(msg['To'])
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def repository(tmp_path, monkeypatch):
+    repository = server.ReportRepository(str(tmp_path / 'audit.db'), user_file=None)
+    monkeypatch.setattr(server, 'report_repository', repository)
+    monkeypatch.setattr(server.smtplib, 'SMTP', FakeSMTP)
+    monkeypatch.setenv('SMTP_LOCAL_TEST_SERVER', '1')
+    monkeypatch.delenv('SMTP_STARTTLS', raising=False)
+    FakeSMTP.sent = []
+    FakeSMTP.failures = 0
+    FakeSMTP.connections = 0
+    return repository
+
+
+def add_delivery(repository, report_id='r1', email='a@example.com'):
+    report = server.audit_page_text('https://example.com/', '<html><head><title>Cafe</title></head></html>', None, 'full')
+    repository.add_report(report_id, 'https://example.com/', report, report['score'])
+    return repository.add_email_delivery(report_id, email)
+
+
+def test_sends_over_one_connection(repository):
+    email_queue = server.EmailDeliveryQueue()
+    first = add_delivery(repository, 'r1', 'a@example.com')
+    second = add_delivery(repository, 'r2', 'b@example.com')
+    email_queue.deliver([(first, 0), (second, 0)])
+    assert FakeSMTP.sent == ['a@example.com', 'b@example.com']
+    assert FakeSMTP.connections == 1
+    assert repository.get_email_delivery(first)['status'] == 'sent'
+    assert email_queue.stats()['deliveries'] == {'sent': 2}
+
+
+def test_failed_sends_back_off_then_fail(repository):
+    email_queue = server.EmailDeliveryQueue(max_attempts=3, retry_delay=10)
+    delivery_id = add_delivery(repository)
+    FakeSMTP.failures = 3
+    attempts = 0
+    for expected_delay in (10, 20):
+        started = time.time()
+        email_queue.deliver([(delivery_id, attempts)])
+        due, retry_id, attempts = email_queue.retries.pop()
+        assert retry_id == delivery_id
+        assert started + expected_delay <= due <= time.time() + expected_delay
+        delivery = repository.get_email_delivery(delivery_id)
+        assert (delivery['status'], delivery['attempts']) == ('queued', attempts)
+    email_queue.deliver([(delivery_id, attempts)])
+    delivery = repository.get_email_delivery(delivery_id)
+    assert (delivery['status'], delivery['attempts']) == ('failed', 3)
+    assert 'Try again later' in delivery['last_error']
+    assert email_queue.retries == []
+    assert (email_queue.retried, email_queue.failed, email_queue.sent) == (2, 1, 0)
+
+
+def test_retry_is_sent_when_due(repository):
+    email_queue = server.EmailDeliveryQueue(retry_delay=0)
+    delivery_id = add_delivery(repository)
+    FakeSMTP.failures = 1
+    email_queue.deliver([(delivery_id, 0)])
+    email_queue.deliver(email_queue.next_batch())
+    assert FakeSMTP.sent == ['a@example.com']
+    assert repository.get_email_delivery(delivery_id)['attempts'] == 2
+
+
+def test_missing_report_is_marked_failed(repository):
+    email_queue = server.EmailDeliveryQueue()
+    delivery_id = repository.add_email_delivery('no-such-report', 'a@example.com')
+    email_queue.deliver([(delivery_id, 0)])
+    delivery = repository.get_email_delivery(delivery_id)
+    assert delivery['status'] == 'failed'
+    assert delivery['last_error'] == 'Report no longer exists'
+    assert FakeSMTP.sent == []
+
+
+def test_unexpected_error_keeps_the_rest_of_the_batch(repository, monkeypatch):
+    email_queue = server.EmailDeliveryQueue(retry_delay=30)
+    broken = add_delivery(repository, 'r1', 'a@example.com')
+    working = add_delivery(repository, 'r2', 'b@example.com')
+    get_report = repository.get_report
+
+    def flaky_get_report(report_id):
+        if report_id == 'r1':
+            raise server.sqlite3.OperationalError('database is locked')
+        return get_report(report_id)
+
+    monkeypatch.setattr(repository, 'get_report', flaky_get_report)
+    email_queue.deliver([(broken, 0), (working, 0)])
+    assert FakeSMTP.sent == ['b@example.com']
+    assert [(retry_id, attempts) for _, retry_id, attempts in email_queue.retries] == [(broken, 1)]
+    assert repository.get_email_delivery(broken)['status'] == 'queued'
+
+
+def test_unexpected_error_on_the_last_attempt_marks_the_delivery_failed(repository, monkeypatch):
+    email_queue = server.EmailDeliveryQueue(max_attempts=2)
+    delivery_id = add_delivery(repository)
+
+    def locked_get_report(report_id):
+        raise server.sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(repository, 'get_report', locked_get_report)
+    email_queue.deliver([(delivery_id, 1)])
+    delivery = repository.get_email_delivery(delivery_id)
+    assert (delivery['status'], delivery['attempts'], delivery['last_error']) == ('failed', 2, 'database is locked')
+    assert email_queue.retries == []
+    assert email_queue.failed == 1
+    assert repository.queued_email_deliveries() == []  # Not resumed after a restart
+
+def test_worker_survives_errors(repository, monkeypatch):
+    email_queue = server.EmailDeliveryQueue()
+    next_batch = email_queue.next_batch
+    calls = []
+
+    def failing_once():
+        calls.append(1)
+        if len(calls) == 1:
+            raise server.sqlite3.OperationalError('database is locked')
+        return next_batch()
+
+    monkeypatch.setattr(email_queue, 'next_batch', failing_once)
+    email_queue.start()
+    try:
+        delivery_id = add_delivery(repository)
+        email_queue.jobs.put((delivery_id, 0))
+        deadline = time.time() + 5
+        while repository.get_email_delivery(delivery_id)['status'] != 'sent' and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        email_queue.shutdown()
+    assert FakeSMTP.sent == ['a@example.com']
+    assert len(calls) > 1
+
+
+def test_smtp_server_alone_does_not_enable_sending(monkeypatch):
+    monkeypatch.delenv('SMTP_LOCAL_TEST_SERVER', raising=False)
+    monkeypatch.delenv('SMTP_USER', raising=False)
+    monkeypatch.delenv('SMTP_PASSWORD', raising=False)
+    monkeypatch.setenv('SMTP_SERVER', 'localhost')
+    assert not server.smtp_settings()['enabled']
+    monkeypatch.setenv('SMTP_LOCAL_TEST_SERVER', '1')
+    settings = server.smtp_settings()
+    assert settings['enabled'] and not settings['starttls']
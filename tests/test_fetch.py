@@ -0,0 +1,65 @@
+"""Page fetching limits, against local servers"""
+import socket
+import threading
+import time
+
+import pytest
+
+import server_standalone as server
+
+
+@pytest.fixture
+def drip_server():
+    """An HTTP server that answers with headers, then a few body bytes at a time and never finishes"""
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(5)
+    stop = threading.Event()
+
+    def serve():
+        while not stop.is_set():
+            try:
+                client, _ = listener.accept()
+            except OSError:
+                return
+            client.recv(65536)
+            try:
+                client.sendall(b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: 1000000\r\n\r\n<html>')
+                while not stop.is_set():
+                    client.sendall(b'<p>')
+                    time.sleep(0.05)
+            except OSError:
+                pass
+            finally:
+                client.close()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{listener.getsockname()[1]}/'
+    stop.set()
+    listener.close()
+
+
+def test_deadline_stops_a_slow_drip_body(drip_server):
+    response = server.outbound_pool.open(drip_server, {'User-Agent': 'test'}, timeout=10)
+    started = time.time()
+    reader = server.ResponseTextReader(response, deadline=started + 0.5)
+    text = ''.join(reader)
+    assert time.time() - started < 2
+    assert reader.truncated_reason == 'deadline'
+    assert text.startswith('<html><p>')
+
+
+def test_fetch_and_parse_honours_the_deadline(drip_server):
+    started = time.time()
+    page = server.fetch_and_parse(drip_server, deadline=started + 0.5)
+    assert time.time() - started < 2
+    assert page.partial_reason == 'deadline'
+
+
+def test_size_cap_truncates_the_body(drip_server):
+    response = server.outbound_pool.open(drip_server, {'User-Agent': 'test'}, timeout=10)
+    reader = server.ResponseTextReader(response, max_bytes=20, deadline=time.time() + 5)
+    text = ''.join(reader)
+    assert reader.truncated_reason == 'size_limit'
+    assert len(text) == 20
@@ -0,0 +1,163 @@
+"""HTMLAuditParser, fed whole documents and the same documents in chunks"""
+import pytest
+
+import server_standalone as server
+
+# Whole document first, then chunk sizes that split every keyword and tag somewhere
+CHUNK_SIZES = [None, 1, 2, 3, 7, 64]
+
+MENU_PAGE = '''<html lang="en"><head><title>Corner Cafe</title></head><body>
+<p>Italian cuisine with outdoor seating, live music and a wine bar.</p>
+<p>Vegan and gluten-free options. Gift cards and catering available.</p>
+<p>Call (555) 123-4567 - rated 4.5 stars</p>
+</body></html>'''
+
+
+def parse(html, chunk_size=None, signals=None):
+    """Feed html to a new parser in one piece, or in chunk_size pieces, and close it"""
+    parser = server.HTMLAuditParser(signals)
+    if chunk_size is None:
+        parser.feed(html)
+    else:
+        for start in range(0, len(html), chunk_size):
+            parser.feed(html[start:start + chunk_size])
+    parser.close()
+    return parser
+
+
+def text_signals(parser):
+    return {attr: getattr(parser, attr) for attr in
+            [*server.TEXT_FLAG_KEYWORDS, *server.TEXT_COLLECTION_KEYWORDS, 'phone_number', 'rating_mentions', 'title']}
+
+
+def expected_text_signals(text):
+    """What testing `keyword in text` for every keyword of every signal gives"""
+    text = text.lower()
+    expected = {attr: any(keyword in text for keyword in keywords) for attr, keywords in server.TEXT_FLAG_KEYWORDS.items()}
+    for attr, keywords in server.TEXT_COLLECTION_KEYWORDS.items():
+        expected[attr] = sorted(keyword.title() for keyword in keywords if keyword in text)
+    return expected
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_keywords_split_across_chunks_are_found(chunk_size):
+    parser = parse(MENU_PAGE, chunk_size)
+    assert parser.title == 'Corner Cafe'
+    assert parser.cuisine_type == ['Cafe', 'Italian', 'Bar']
+    assert {'Outdoor Seating', 'Live Music', 'Wine Bar', 'Bar', 'Catering'} <= set(parser.special_features)
+    assert parser.dietary_restrictions == ['Vegan', 'Gluten-Free']
+    assert parser.gift_cards and parser.catering_info and parser.cuisine_mentions
+    assert parser.phone_number and parser.rating_mentions
+    assert not parser.parking_info
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_keyword_signals_match_a_substring_test(chunk_size):
+    parser = parse(MENU_PAGE, chunk_size)
+    found = text_signals(parser)
+    for attr, value in expected_text_signals(MENU_PAGE).items():
+        assert (sorted(found[attr]) if isinstance(value, list) else found[attr]) == value, attr
+
+
+def test_chunked_document_gives_the_whole_document_signals():
+    whole = text_signals(parse(MENU_PAGE))
+    for chunk_size in CHUNK_SIZES[1:]:
+        assert text_signals(parse(MENU_PAGE, chunk_size)) == whole
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_resolved_keywords_stop_being_matched(chunk_size):
+    parser = parse('<p>Gift cards</p><p>Free parking</p>', chunk_size, signals=['gift_cards', 'parking_info'])
+    assert parser.gift_cards and parser.parking_info
+    assert not parser.open_keywords
+
+
+def test_keywords_found_after_the_pattern_shrinks(monkeypatch):
+    monkeypatch.setattr(server, 'KEYWORD_PATTERN_REBUILD_NODES', 1)
+    parser = server.HTMLAuditParser(['gift_cards', 'catering_info', 'wifi_info'])
+    full_size = parser.keyword_pattern_size
+    parser.feed('<p>Gift cards</p><p>Catering</p><p>Menu</p>')
+    assert parser.keyword_pattern_size < full_size  # Rebuilt for the wifi keywords only
+    parser.feed('<p>Free Wi-Fi</p>')
+    parser.close()
+    assert parser.gift_cards and parser.catering_info and parser.wifi_info
+    assert not parser.open_keywords
+
+
+def test_unwanted_signals_are_not_parsed():
+    parser = parse(MENU_PAGE, signals=['gift_cards'])
+    assert parser.gift_cards
+    assert not parser.catering_info and parser.cuisine_type == []
+    assert not parser.phone_number and parser.title == 'Corner Cafe'
+
+
+def json_ld_page(body, script_type='application/ld+json'):
+    return f'<html><head><script type="{script_type}">{body}</script></head><body><p>Welcome</p></body></html>'
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('body', [
+    '{"@context": "https://schema.org", "@type": "Restaurant", "name": "Corner Cafe"}',
+    '{"@context": "https://schema.org", "@graph": [{"@type": "WebSite"}, {"@type": "BarOrPub"}]}',
+    '{"@type": ["LocalBusiness", "FoodEstablishment"]}',
+    '[{"@type": "Organization"}, {"@type": "WebPage", "about": {"@type": ["Thing", "CafeOrCoffeeShop", "Restaurant"]}}]',
+])
+def test_restaurant_json_ld_is_found(body, chunk_size):
+    parser = parse(json_ld_page(body), chunk_size)
+    assert parser.restaurant_schema
+    assert parser.json_ld_count == 1
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('body', [
+    '{"@context": "https://schema.org", "@graph": [{"@type": "WebSite"}, {"@type": ["Organization", "Brand"]}]}',
+    '{"@type": "Restaurant", "name": ',  # Malformed
+    '{"@type": 42, "name": "Restaurant"}',
+])
+def test_other_json_ld_is_not_a_restaurant(body, chunk_size):
+    parser = parse(json_ld_page(body), chunk_size)
+    assert not parser.restaurant_schema
+    assert parser.json_ld_count == 1
+
+
+def test_json_ld_type_is_case_insensitive():
+    assert parse(json_ld_page('{"@type": "Restaurant"}', 'Application/LD+JSON')).restaurant_schema
+    assert not parse('<script>var schema = {"@type": "Restaurant"};</script>').restaurant_schema
+
+
+WIDGET_PAGE = '''<html><head><title>Corner Cafe</title>
+<!-- TripAdvisor certificate --></head><body>
+<iframe src="https://www.Google.com/MAPS/EMBED?pb=1"></iframe>
+<div class="reviews" data-place_id="abc">See what guests say</div>
+<a href="https://www.yelp.com/biz/corner-cafe">Yelp</a>
+</body></html>'''
+
+
+def expected_widgets(html):
+    """What testing `token in html.lower()` for every widget token gives"""
+    html = html.lower()
+    return server.detect_review_widgets({token for token in server.REVIEW_WIDGET_TOKENS if token in html})
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_widget_tokens_split_across_chunks_are_found(chunk_size):
+    parser = parse(WIDGET_PAGE, chunk_size)
+    assert parser.review_widgets == ['Google Reviews Widget', 'TripAdvisor Widget', 'Yelp Widget']
+    assert parser.review_widgets == expected_widgets(WIDGET_PAGE)
+    assert parser.review_platforms == ['Yelp']
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('html', [
+    '<p>Find us on Google</p><iframe src="https://maps.google.com/maps/embed"></iframe>',  # No review or rating
+    '<a href="https://yelp.com/biz/x">Yelp</a>',  # No review
+    MENU_PAGE,
+])
+def test_pages_without_widgets(html, chunk_size):
+    parser = parse(html, chunk_size)
+    assert parser.review_widgets == expected_widgets(html) == []
+
+
+def test_widgets_are_only_detected_when_wanted():
+    parser = parse(WIDGET_PAGE, signals=['title'])
+    assert not parser.raw_open_tokens and parser.review_widgets == []
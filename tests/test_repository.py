@@ -0,0 +1,164 @@
+"""ReportRepository, on a temporary SQLite database"""
+import json
+import time
+
+import pytest
+
+import server_standalone as server
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return server.ReportRepository(str(tmp_path / 'audit.db'), user_file=None)
+
+
+def user_rows(repository):
+    rows = repository.connection().execute('SELECT email, url, report_id, score FROM users ORDER BY id')
+    return [tuple(row) for row in rows]
+
+
+def test_report_round_trip_through_the_database(tmp_path):
+    path = str(tmp_path / 'audit.db')
+    repository = server.ReportRepository(path, user_file=None)
+    repository.add_report('r1', 'https://a.example', {'score': 42, 'checks': ['x']}, 42)
+    assert repository.get_report('r1')['full_report'] == {'score': 42, 'checks': ['x']}
+    reopened = server.ReportRepository(path, user_file=None)  # Nothing resident yet
+    report = reopened.get_report('r1')
+    assert (report['url'], report['full_report']) == ('https://a.example', {'score': 42, 'checks': ['x']})
+    assert reopened.report_exists('r1') and not reopened.report_exists('r2')
+    assert reopened.get_report('r2') is None
+    assert reopened.count_scans() == 1
+
+
+def test_payment_marks_the_scan_paid(repository):
+    repository.add_report('r1', 'https://a.example', {'score': 42}, 42)
+    assert not repository.is_paid('r1')
+    repository.add_payment('p1', 'r1', 'a@example.com', status='pending')
+    assert not repository.is_paid('r1')
+    repository.add_payment('p2', 'r1', 'a@example.com')
+    assert repository.is_paid('r1')
+    assert repository.recent_scans()[0]['payment_status'] == 'paid'
+
+
+def test_change_seq_migration_numbers_existing_scans(tmp_path):
+    path = str(tmp_path / 'audit.db')
+    connection = server.sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE admin_scans (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id TEXT NOT NULL UNIQUE,
+            url TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            timestamp TEXT NOT NULL,
+            payment_status TEXT NOT NULL
+        );
+        INSERT INTO admin_scans (report_id, url, score, timestamp, payment_status)
+            VALUES ('old1', 'https://a.example', 10, '2024-01-01T00:00:00', 'free'),
+                   ('old2', 'https://b.example', 20, '2024-01-02T00:00:00', 'paid');
+    """)
+    connection.close()
+    repository = server.ReportRepository(path, user_file=None)
+    assert repository.latest_change() == 2
+    scans, cursor, has_more = repository.scan_changes(0)
+    assert [scan['report_id'] for scan in scans] == ['old1', 'old2']
+    assert (cursor, has_more) == (2, False)
+    repository.add_report('new', 'https://c.example', {'score': 30}, 30)
+    assert repository.scan_changes(2)[0][0]['report_id'] == 'new'
+    server.ReportRepository(path, user_file=None)  # Migrating again changes nothing
+    assert repository.scan_changes(0)[1] == 3
+
+
+def test_users_are_looked_up_by_email_and_report(repository):
+    repository.add_user('a@example.com', 'https://a.example', 'r1', 70)
+    repository.add_user('b@example.com', 'https://b.example', 'r2', 50)
+    repository.add_user('a@example.com', 'https://c.example', 'r3', 60)
+    assert [user['report_id'] for user in repository.users_by_email('a@example.com')] == ['r1', 'r3']
+    [user] = repository.users_by_report('r2')
+    assert (user['email'], user['url'], user['score']) == ('b@example.com', 'https://b.example', 50)
+    assert set(user) == set(server.ReportRepository.USER_FIELDS)
+    assert repository.users_by_email('missing@example.com') == []
+
+
+def test_user_indexes_are_added_to_existing_databases(tmp_path):
+    path = str(tmp_path / 'audit.db')
+    server.ReportRepository(path, user_file=None)
+    connection = server.sqlite3.connect(path)
+    connection.executescript('DROP INDEX users_email; DROP INDEX users_report;')  # A database from before the indexes
+    connection.close()
+    repository = server.ReportRepository(path, user_file=None)
+    for column, index in (('email', 'users_email'), ('report_id', 'users_report')):
+        plan = repository.connection().execute(f'EXPLAIN QUERY PLAN SELECT * FROM users WHERE {column} = ?', ('x',)).fetchall()
+        assert any(index in row['detail'] for row in plan)
+
+
+def test_user_file_migration_skips_malformed_entries(tmp_path, capsys):
+    user_file = tmp_path / 'user_database.json'
+    user_file.write_text(json.dumps([
+        {'email': 'a@example.com', 'url': 'https://a.example', 'report_id': 'r1', 'score': 70,
+         'timestamp': '2024-01-01T00:00:00', 'date': '2024-01-01 00:00:00'},
+        {'email': None, 'url': 'https://b.example', 'report_id': 'r2', 'score': 50,
+         'timestamp': '2024-01-01T00:00:00', 'date': '2024-01-01 00:00:00'},
+        'not a user',
+        {'email': 'c@example.com', 'url': {'nested': True}, 'report_id': 'r3'},
+        {'email': 'd@example.com', 'url': 'https://d.example', 'report_id': 'r4'},
+    ]))
+    repository = server.ReportRepository(str(tmp_path / 'audit.db'), user_file=str(user_file))
+    assert user_rows(repository) == [('a@example.com', 'https://a.example', 'r1', 70),
+                                     ('d@example.com', 'https://d.example', 'r4', '')]
+    assert not user_file.exists()
+    assert (tmp_path / 'user_database.json.migrated').exists()
+    assert '3 malformed entries skipped' in capsys.readouterr().out
+
+
+def test_user_file_migration_runs_once(tmp_path):
+    user_file = tmp_path / 'user_database.json'
+    entry = {'email': 'a@example.com', 'url': 'https://a.example', 'report_id': 'r1', 'score': 70,
+             'timestamp': '2024-01-01T00:00:00', 'date': '2024-01-01 00:00:00'}
+    user_file.write_text(json.dumps([entry]))
+    server.ReportRepository(str(tmp_path / 'audit.db'), user_file=str(user_file))
+    user_file.write_text(json.dumps([entry]))  # e.g. restored from a backup
+    repository = server.ReportRepository(str(tmp_path / 'audit.db'), user_file=str(user_file))
+    assert len(user_rows(repository)) == 1
+
+
+def test_user_file_that_is_not_a_list_is_left_alone(tmp_path):
+    user_file = tmp_path / 'user_database.json'
+    user_file.write_text('{"email": "a@example.com"}')
+    repository = server.ReportRepository(str(tmp_path / 'audit.db'), user_file=str(user_file))
+    assert user_rows(repository) == []
+    assert user_file.exists()
+
+
+def test_add_user(repository):
+    repository.add_user('a@example.com', 'https://a.example', 'r1', 80)
+    assert user_rows(repository) == [('a@example.com', 'https://a.example', 'r1', 80)]
+
+
+def test_purge_keeps_paid_and_recent_reports(tmp_path):
+    repository = server.ReportRepository(str(tmp_path / 'audit.db'), user_file=None, unpaid_ttl=0.2)
+    repository.add_report('unpaid', 'https://a.example', {'score': 10}, 10)
+    repository.add_report('paid', 'https://b.example', {'score': 20}, 20)
+    repository.add_payment('p1', 'paid', 'a@example.com')
+    time.sleep(0.3)
+    repository.add_report('recent', 'https://c.example', {'score': 30}, 30)
+    assert repository.purge_expired() == 1
+    assert repository.get_report('unpaid') is None
+    assert repository.get_report('paid')['full_report'] == {'score': 20}
+    assert repository.get_report('recent') is not None
+    assert repository.count_scans() == 3  # Admin scan rows are kept
+    assert repository.report_stats()['expired'] == 1
+
+
+def test_purge_runs_in_the_background(tmp_path):
+    repository = server.ReportRepository(str(tmp_path / 'audit.db'), user_file=None, unpaid_ttl=0.1)
+    repository.add_report('unpaid', 'https://a.example', {'score': 10}, 10)
+    time.sleep(0.2)
+    repository.start_purging(interval=0.05)
+    try:
+        deadline = time.time() + 5
+        while repository.report_exists('unpaid') and time.time() < deadline:
+            time.sleep(0.05)
+        assert not repository.report_exists('unpaid')
+    finally:
+        repository.stop_purging()
+    assert not repository.purge_thread.is_alive()
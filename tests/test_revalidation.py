@@ -0,0 +1,72 @@
+"""Conditional re-fetches (ETag / 304 Not Modified), against a local site"""
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import server_standalone as server
+
+PAGE = b'<html><head><title>Corner Cafe</title></head><body><p>Open daily</p></body></html>'
+
+
+@pytest.fixture
+def etag_server():
+    """Serves PAGE with an ETag and answers 304 to a matching If-None-Match; records the conditions sent"""
+    conditions = []
+
+    class ETagHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            conditions.append(self.headers.get('If-None-Match'))
+            if self.headers.get('If-None-Match') == '"v1"':
+                self.send_response(304)
+                self.send_header('ETag', '"v1"')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('ETag', '"v1"')
+            self.send_header('Content-Length', str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = HTTPServer(('127.0.0.1', 0), ETagHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}/', conditions
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def validators(monkeypatch):
+    store = server.PageValidatorStore()
+    monkeypatch.setattr(server, 'page_validators', store)
+    return store
+
+
+def test_not_modified_reuses_the_stored_page(etag_server, validators):
+    url, conditions = etag_server
+    first = server.fetch_and_parse(url)
+    second = server.fetch_and_parse(url)
+    assert conditions == [None, '"v1"']
+    assert second is first
+    assert second.parser.title == 'Corner Cafe'
+    stats = validators.stats()
+    assert (stats['conditionalRequests'], stats['notModified']) == (1, 1)
+
+
+def test_pages_without_validators_are_not_stored(page_server, validators):
+    server.fetch_and_parse(f'{page_server}/')
+    assert validators.lookup((server.normalize_url(f'{page_server}/'), server.profile_signals('full'))) == ({}, None)
+
+
+def test_site_files_leave_the_stored_page_alone(etag_server, validators):
+    url, _ = etag_server
+    stored = server.fetch_and_parse(url)
+    with_site_files = server.apply_site_files(stored, server.SiteFiles('missing'))
+    assert with_site_files is not stored
+    assert with_site_files.crawler_access is not None
+    assert stored.crawler_access is None
+    assert stored.parser.ai_crawler_access is None
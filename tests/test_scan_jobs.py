@@ -0,0 +1,103 @@
+"""Asynchronous scan jobs, against a local site"""
+import http.client
+import threading
+import time
+
+import pytest
+
+import server_standalone as server
+
+
+@pytest.fixture
+def jobs():
+    manager = server.ScanJobManager(max_workers=2, queue_limit=2)
+    yield manager
+    manager.shutdown()
+
+
+def wait_until_finished(job, timeout=10):
+    deadline = time.time() + timeout
+    with job.changed:
+        while not job.is_finished() and time.time() < deadline:
+            job.changed.wait(deadline - time.time())
+    return job.to_dict()
+
+
+def test_job_reports_progress_and_result(jobs, page_server, storage):
+    job = jobs.submit(f'{page_server}/')
+    assert jobs.get(job.id) is job
+    job_dict = wait_until_finished(job)
+    assert job_dict['status'] == 'done'
+    assert [event['stage'] for event in job_dict['progress']][:2] == ['fetched', 'parsed']
+    assert job_dict['result']['reportId']
+    assert storage.report_exists(job_dict['result']['reportId'])
+    assert job_dict['statusUrl'] == f'/api/scan/jobs/{job.id}'
+
+
+def test_failed_job_reports_the_error(jobs, page_server, storage):
+    job_dict = wait_until_finished(jobs.submit(f'{page_server}/missing'))
+    assert job_dict['status'] == 'error'
+    assert '404' in job_dict['error']
+    assert 'result' not in job_dict
+
+
+def test_full_queue_refuses_new_jobs(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(server, 'run_scan', lambda url, **options: release.wait(10) and {'score': 1})
+    manager = server.ScanJobManager(max_workers=1, queue_limit=1)
+    try:
+        first = manager.submit('https://example.com/')
+        assert manager.submit('https://example.com/') is None
+        release.set()
+        assert wait_until_finished(first)['status'] == 'done'
+        assert manager.submit('https://example.com/') is not None
+    finally:
+        release.set()
+        manager.shutdown()
+
+
+def test_finished_jobs_are_pruned_after_the_ttl(page_server, storage):
+    manager = server.ScanJobManager(max_workers=1, job_ttl=0)
+    try:
+        job = manager.submit(f'{page_server}/')
+        wait_until_finished(job)
+        time.sleep(0.01)
+        manager.submit(f'{page_server}/')  # Submitting prunes
+        assert manager.get(job.id) is None
+    finally:
+        manager.shutdown()
+
+
+def test_progress_streams_leave_workers_for_other_requests(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(server, 'run_scan', lambda url, **options: release.wait(10) and {'score': 1})
+    manager = server.ScanJobManager(max_workers=1)
+    monkeypatch.setattr(server, 'scan_jobs', manager)
+    monkeypatch.setattr(server, 'scan_stream_slots', threading.BoundedSemaphore(2))
+    httpd = server.PooledHTTPServer(('127.0.0.1', 0), server.RequestHandler, max_workers=4)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    streams = []
+    try:
+        job = manager.submit('https://example.com/')
+        statuses = []
+        for _ in range(4):  # One per HTTP worker
+            stream = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=5)
+            stream.request('GET', f'/api/scan/jobs/{job.id}/events')
+            response = stream.getresponse()
+            statuses.append(response.status)
+            if response.status == 200:
+                streams.append(stream)
+            else:
+                response.read()
+                stream.close()
+        assert sorted(statuses) == [200, 200, 503, 503]
+        page = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=5)
+        page.request('GET', '/index.html')
+        assert page.getresponse().status == 200
+    finally:
+        release.set()
+        for stream in streams:
+            stream.close()
+        httpd.shutdown()
+        httpd.server_close()
+        manager.shutdown()
@@ -0,0 +1,79 @@
+"""robots.txt and sitemap fetching (SiteFilesCache), against a local site"""
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import server_standalone as server
+
+ROBOTS = b'User-agent: GPTBot\nDisallow: /\n'
+
+
+def sitemap_xml(entries):
+    urls = b''.join(b'<url><loc>https://example.com/%d</loc></url>' % index for index in range(entries))
+    return b'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">' + urls + b'</urlset>'
+
+
+@pytest.fixture
+def site():
+    """A site whose robots.txt answers at once and whose sitemap.xml waits for the sitemap_sent event"""
+    state = {'sitemap': sitemap_xml(3), 'sitemap_sent': threading.Event()}
+
+    class SiteHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/robots.txt':
+                body = ROBOTS
+            elif self.path == '/sitemap.xml':
+                state['sitemap_sent'].wait(10)
+                body = state['sitemap']
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), SiteHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}', state
+    state['sitemap_sent'].set()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def cache():
+    cache = server.SiteFilesCache()
+    yield cache
+    cache.shutdown()
+
+
+def test_robots_verdicts_do_not_wait_for_the_sitemap(site, cache):
+    base, state = site
+    started = time.time()
+    site_files = cache.get(f'{base}/')
+    assert time.time() - started < 2
+    report = site_files.report(f'{base}/')
+    assert report['robotsTxt'] == 'found' and 'GPTBot' in report['aiAgentsBlocked']
+    assert 'sitemap' not in report
+
+    state['sitemap_sent'].set()
+    _, _, sitemap_future = cache.prefetch(f'{base}/')
+    sitemap_future.result(timeout=5)
+    report = cache.get(f'{base}/').report(f'{base}/')
+    assert report['sitemap'] == {'url': f'{base}/sitemap.xml', 'type': 'urlset', 'entries': 3, 'truncated': False}
+
+
+def test_sitemap_download_is_capped(site, cache, monkeypatch):
+    base, state = site
+    monkeypatch.setattr(server, 'SITEMAP_MAX_BYTES', 1024)
+    state['sitemap'] = sitemap_xml(1000)
+    state['sitemap_sent'].set()
+    _, _, sitemap_future = cache.prefetch(f'{base}/')
+    summary = sitemap_future.result(timeout=5)
+    assert summary['truncated'] and 0 < summary['entries'] < 1000